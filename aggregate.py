@@ -0,0 +1,88 @@
+import numpy as np
+
+# สถิติต่อ window ที่เลือกได้ (ค่าหลักของแถวเป็น mean เสมอ) ; บันทึกเป็น field cpu_<stat> / ram_<stat> ของ session
+WINDOW_STATS = ("min", "max", "p95", "last")
+UNITS = {"cpu": "%", "ram": "MB"}
+MISSED = "missed"  # field จำนวน deadline ของ sub-sample ที่พลาดภายใน window (> 0 = มีช่วงที่ไม่มีข้อมูล)
+
+
+def parse_window_stats(text):
+    """ข้อความ "max,p95" / "all" / "none" เป็น tuple ของสถิติ ; "" = ทั้งหมด ; ชื่อที่ไม่รู้จักโยน ValueError"""
+    text = (text or "all").strip()
+    if text == "all":
+        return WINDOW_STATS
+    if text == "none":
+        return ()
+    stats = tuple(s.strip() for s in text.split(",") if s.strip())
+    unknown = [s for s in stats if s not in WINDOW_STATS]
+    if unknown:
+        raise ValueError(f"unknown window stat(s) {', '.join(unknown)}; choose from {', '.join(WINDOW_STATS)}")
+    return tuple(s for s in WINDOW_STATS if s in stats)
+
+
+def window_fields(stats):
+    """ชื่อ field ตามลำดับค่าที่ WindowAggregator.emit() คืน: สถิติของ CPU ทั้งหมดแล้วตามด้วย RAM"""
+    return tuple(f"{column}_{stat}" for column in UNITS for stat in stats)
+
+
+def window_stat(name):
+    """สถิติของ field (เช่น "cpu_max" -> "max", MISSED -> "sum") ; field อื่นคืน None"""
+    if name == MISSED:
+        return "sum"
+    column, _, stat = name.partition("_")
+    return stat if column in UNITS and stat in WINDOW_STATS else None
+
+
+def window_header(name):
+    """หัวคอลัมน์ของ field สถิติ เช่น "CPU max (%)" ; field อื่นคืน None"""
+    if name == MISSED:
+        return "Missed ticks"
+    stat = window_stat(name)
+    if stat is None:
+        return None
+    column = name.partition("_")[0]
+    return f"{column.upper()} {stat} ({UNITS[column]})"
+
+
+def combine(stat, current, value):
+    """รวมค่าสถิติหลาย window เป็นค่าเดียว (ใช้ตอน export แบบ bucket): min/max/last/sum ตามชื่อ, p95 ใช้ค่าสูงสุด"""
+    if current is None:
+        return value
+    if stat == "sum":
+        return current + value
+    if stat == "min":
+        return min(current, value)
+    if stat == "last":
+        return value
+    return max(current, value)
+
+
+class WindowAggregator:
+    """
+    รวม sub-sample ของหนึ่ง window เป็นแถวเดียว: mean ของทุกคอลัมน์ + min/max/p95/last ของ CPU และ RAM
+    - buffer เป็น numpy array (size, n_columns) จองครั้งเดียวแล้วเขียนทับทุก window
+      (ไม่มี list ที่โตขึ้นแล้วต้อง sum ซ้ำ) ; ถ้า window ยาวเกิน size แถวสุดท้ายถูกเขียนทับ
+    - คอลัมน์ 0, 1 = cpu, ram ; คอลัมน์ที่เหลือ = metric เพิ่มเติม (mean ข้าม NaN)
+    """
+
+    def __init__(self, size, n_columns, stats=WINDOW_STATS):
+        self.buffer = np.empty((max(1, size), n_columns))
+        self.stats = tuple(stats)
+        self.count = 0
+
+    def add(self, values):
+        self.buffer[min(self.count, len(self.buffer) - 1)] = values
+        self.count = min(self.count + 1, len(self.buffer))
+
+    def emit(self):
+        """คืน (means, peaks) แล้วเริ่ม window ใหม่ ; peaks เรียงตาม window_fields(stats)"""
+        data = self.buffer[:self.count]
+        self.count = 0
+        valid = ~np.isnan(data)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(valid, data, 0.0).sum(axis=0) / valid.sum(axis=0)  # คอลัมน์ที่ NaN ทั้งหมดเป็น NaN
+        core = data[:, :2]
+        values = {"min": core.min(axis=0), "max": core.max(axis=0),
+                  "p95": np.percentile(core, 95, axis=0) if "p95" in self.stats else None, "last": core[-1]}
+        peaks = [float(values[stat][i]) for i in range(2) for stat in self.stats]
+        return means.tolist(), peaks
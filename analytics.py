@@ -0,0 +1,266 @@
+import math
+from collections import deque, namedtuple, Counter
+
+# ค่าเริ่มต้นของการตรวจจับ (ใช้ทั้งตอน monitor และตอน export ผลจึงตรงกัน)
+WARMUP_SAMPLES = 30  # ยังไม่ตัดสิน spike/stall จนกว่าจะมีตัวอย่างอย่างน้อยเท่านี้
+WARMUP_SECONDS = 30.0  # ... และเวลาผ่านไปอย่างน้อยเท่านี้ (ช่วงเริ่ม training CPU/RAM ขึ้นเร็วเป็นปกติ)
+SPIKE_Z = 4.0  # spike = สูงกว่าค่าเฉลี่ยเกิน SPIKE_Z เท่าของส่วนเบี่ยงเบนมาตรฐาน
+SPIKE_MIN_CPU = 20.0  # ... และสูงกว่าค่าเฉลี่ยอย่างน้อยกี่ % CPU
+SPIKE_MIN_RAM = 100.0  # RSS เพิ่มในตัวอย่างเดียวอย่างน้อยกี่ MB
+SPIKE_COOLDOWN = 60.0  # วินาทีขั้นต่ำระหว่าง event spike ชนิดเดียวกัน
+STALL_RATIO = 0.2  # stall = CPU ต่ำกว่า 20% ของค่าเฉลี่ย session ...
+STALL_SECONDS = 10.0  # ... ต่อเนื่องอย่างน้อยกี่วินาที
+STALL_MIN_CPU = 5.0  # ไม่ตรวจ stall ถ้าค่าเฉลี่ย CPU ต่ำกว่านี้ (โปรเซสว่างอยู่แล้ว)
+SLOPE_WINDOW = 300.0  # ช่วงเวลา (วินาที) ของ linear regression บน RSS
+GROWTH_MB_PER_MIN = 10.0  # memory growth = slope ของ RSS ตั้งแต่กี่ MB/นาที (แจ้งอีกครั้งเมื่อลดต่ำกว่าครึ่งแล้วกลับขึ้นมา)
+QUANTILES = (50, 95, 99)
+
+# event หนึ่งครั้ง ; kind = memory_growth / cpu_stall / cpu_spike / ram_spike
+Event = namedtuple("Event", ["time", "kind", "message"])
+
+
+class Welford:
+    """ค่าเฉลี่ย/ความแปรปรวน/min/max แบบ streaming (Welford) ; O(1) ต่อค่า ไม่เก็บค่าดิบ"""
+
+    __slots__ = ("n", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = self.m2 = 0.0
+        self.min, self.max = math.inf, -math.inf
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+
+class P2Quantile:
+    """
+    percentile แบบ streaming ด้วยอัลกอริทึม P² (Jain & Chlamtac, 1985)
+    เก็บ marker 5 ตัว ; O(1) ต่อค่าและหน่วยความจำคงที่ (ค่าประมาณ ไม่ใช่ค่าแน่นอน)
+    """
+
+    def __init__(self, q):
+        self.p = q / 100
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        p = self.p
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        h = self.heights
+        if len(h) < 5:
+            h.append(x)
+            h.sort()
+            return
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= h[k + 1]:
+                k += 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # ปรับความสูงของ marker ด้วยสูตร parabolic ; ถ้าหลุดลำดับใช้ linear แทน
+                height = h[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+                if not h[i - 1] < height < h[i + 1]:
+                    height = h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+                h[i] = height
+                n[i] += d
+
+    def value(self):
+        """ค่าประมาณปัจจุบัน ; ไม่มีข้อมูลคืน None (น้อยกว่า 5 ค่าใช้ nearest-rank)"""
+        h = self.heights
+        if not h:
+            return None
+        if len(h) < 5 or self.positions[4] == 5:
+            return h[min(len(h) - 1, max(0, int(round(self.p * len(h))) - 1))]
+        return h[2]
+
+
+class RollingSlope:
+    """
+    slope (ต่อวินาที) ของ linear regression y เทียบกับ x ในช่วง window วินาทีล่าสุด
+    ผลรวม sx, sy, sxx, sxy ถูกปรับตามจุดที่เข้า/ออกจาก window: O(1) ต่อจุด (amortized)
+    ค่า x/y ถูกเลื่อนจุดอ้างอิงเป็นระยะ (คำนวณผลรวมใหม่จากจุดใน window) กันความคลาดเคลื่อนสะสม
+    """
+
+    def __init__(self, window=SLOPE_WINDOW):
+        self.window = window
+        self.points = deque()
+        self.origin = None
+
+    def _rebase(self, x, y):
+        self.origin = (self.points[0] if self.points else (x, y))
+        ox, oy = self.origin
+        self.sx = self.sy = self.sxx = self.sxy = 0.0
+        for px, py in self.points:
+            self._include(px - ox, py - oy, 1)
+
+    def _include(self, u, v, sign):
+        self.sx += sign * u
+        self.sy += sign * v
+        self.sxx += sign * u * u
+        self.sxy += sign * u * v
+
+    def add(self, x, y):
+        if self.origin is None or x - self.origin[0] > 8 * self.window:
+            self._rebase(x, y)
+        ox, oy = self.origin
+        self.points.append((x, y))
+        self._include(x - ox, y - oy, 1)
+        while x - self.points[0][0] > self.window:
+            px, py = self.points.popleft()
+            self._include(px - ox, py - oy, -1)
+
+    def span(self):
+        """ช่วงเวลาที่ window ครอบคลุมจริงตอนนี้ (วินาที)"""
+        return self.points[-1][0] - self.points[0][0] if self.points else 0.0
+
+    def slope(self):
+        """slope ต่อวินาที ; จุดไม่พอคืน None"""
+        n = len(self.points)
+        if n < 3:
+            return None
+        denominator = n * self.sxx - self.sx * self.sx
+        if denominator <= 0:
+            return None
+        return (n * self.sxy - self.sx * self.sy) / denominator
+
+
+class StreamAnalyzer:
+    """
+    สถิติและการตรวจจับความผิดปกติแบบ online ของ target หนึ่งตัว (O(1) ต่อตัวอย่าง ไม่เก็บตัวอย่างทั้ง session)
+    - Welford: mean/std/min/max ของ CPU และ RAM
+    - P²: p50/p95/p99 ของ CPU และ RAM (percentiles=False เพื่อข้าม เช่นตอน export ที่ต้องการแค่ event)
+    - RollingSlope: แนวโน้มของ RSS ใน SLOPE_WINDOW วินาทีล่าสุด
+    add() คืน list ของ Event: memory_growth, cpu_stall, cpu_spike, ram_spike
+    """
+
+    def __init__(self, percentiles=True):
+        self.cpu = Welford()
+        self.ram = Welford()
+        self.ram_step = Welford()  # การเปลี่ยนแปลงของ RSS ระหว่างตัวอย่างติดกัน
+        self.quantiles = {name: [P2Quantile(q) for q in QUANTILES] for name in ("cpu", "ram")} if percentiles else None
+        self.rss = RollingSlope(SLOPE_WINDOW)
+        self.start = None
+        self.last_ram = None
+        self.stall_since = None
+        self.stalled = False
+        self.growing = False
+        self.quiet_until = {"cpu_spike": -math.inf, "ram_spike": -math.inf}
+        self.counts = Counter()  # จำนวน event ต่อชนิด
+
+    def event(self, t, kind, message):
+        self.counts[kind] += 1
+        if kind in self.quiet_until:
+            self.quiet_until[kind] = t + SPIKE_COOLDOWN
+        return Event(t, kind, message)
+
+    def add(self, t, cpu, ram):
+        """ตัวอย่างหนึ่งครั้ง (time epoch, cpu %, ram MB) ; คืน list ของ Event ที่เกิดขึ้น"""
+        events = []
+        if self.start is None:
+            self.start = t
+        warm = self.cpu.n >= WARMUP_SAMPLES and t - self.start >= WARMUP_SECONDS
+
+        if warm:
+            mean, std = self.cpu.mean, self.cpu.std()
+            if cpu - mean >= max(SPIKE_Z * std, SPIKE_MIN_CPU) and t >= self.quiet_until["cpu_spike"]:
+                events.append(self.event(t, "cpu_spike", f"CPU spike {cpu:.1f}% (mean {mean:.1f}%, sd {std:.1f})"))
+            if mean >= STALL_MIN_CPU and cpu < STALL_RATIO * mean:
+                if self.stall_since is None:
+                    self.stall_since = t
+                elif not self.stalled and t - self.stall_since >= STALL_SECONDS:
+                    self.stalled = True
+                    events.append(self.event(t, "cpu_stall", f"CPU stalled at {cpu:.1f}% for "
+                                             f"{t - self.stall_since:.0f} s (mean {mean:.1f}%)"))
+            else:
+                self.stall_since = None
+                self.stalled = False
+
+        if self.last_ram is not None:
+            step = ram - self.last_ram
+            if (warm and step >= max(SPIKE_Z * self.ram_step.std(), SPIKE_MIN_RAM)
+                    and t >= self.quiet_until["ram_spike"]):
+                events.append(self.event(t, "ram_spike", f"RAM jumped +{step:.0f} MB to {ram:.0f} MB"))
+            self.ram_step.add(step)
+        self.last_ram = ram
+        self.cpu.add(cpu)
+        self.ram.add(ram)
+        if self.quantiles is not None:
+            for estimator in self.quantiles["cpu"]:
+                estimator.add(cpu)
+            for estimator in self.quantiles["ram"]:
+                estimator.add(ram)
+
+        self.rss.add(t, ram)
+        if self.rss.span() >= 0.8 * SLOPE_WINDOW:
+            slope = self.rss.slope()
+            per_minute = slope * 60 if slope is not None else 0.0
+            if not self.growing and per_minute >= GROWTH_MB_PER_MIN:
+                self.growing = True
+                events.append(self.event(t, "memory_growth", f"RSS growing {per_minute:.1f} MB/min over the last "
+                                         f"{SLOPE_WINDOW / 60:g} min (now {ram:.0f} MB)"))
+            elif self.growing and per_minute < GROWTH_MB_PER_MIN / 2:
+                self.growing = False
+        return events
+
+    def rss_slope(self):
+        """slope ของ RSS (MB/นาที) ใน window ล่าสุด ; ข้อมูลไม่พอคืน None"""
+        slope = self.rss.slope()
+        return slope * 60 if slope is not None else None
+
+    def summary(self):
+        """dict ของสถิติทั้ง session: samples, cpu/ram (mean, std, min, max, p50, p95, p99), rss_slope, events"""
+        result = {"samples": self.cpu.n, "rss_slope": self.rss_slope(), "events": dict(self.counts)}
+        for name, stats in (("cpu", self.cpu), ("ram", self.ram)):
+            values = {"mean": stats.mean, "std": stats.std(),
+                      "min": stats.min if stats.n else None, "max": stats.max if stats.n else None}
+            if self.quantiles is not None:
+                for q, estimator in zip(QUANTILES, self.quantiles[name]):
+                    values[f"p{q}"] = estimator.value()
+            result[name] = values
+        return result
+
+    def count_text(self):
+        """จำนวน event ต่อชนิด เช่น "cpu_stall x2, memory_growth x1" ; ไม่มี event คืน "" """
+        return ", ".join(f"{kind} x{n}" for kind, n in sorted(self.counts.items()))
+
+    def format_summary(self):
+        """ข้อความสรุปหลายบรรทัดสำหรับ CLI / GUI"""
+        s = self.summary()
+        lines = [f"Session statistics ({s['samples']} samples):"]
+        for name, unit in (("cpu", "%"), ("ram", "MB")):
+            cells = "  ".join(f"{k} {v:.2f}" for k, v in s[name].items() if v is not None)
+            lines.append(f"  {name.upper()} ({unit}): {cells}")
+        if s["rss_slope"] is not None:
+            lines.append(f"  RSS trend (last {SLOPE_WINDOW / 60:g} min): {s['rss_slope']:+.2f} MB/min")
+        lines.append(f"  Events: {self.count_text() or 'none'}")
+        return "\n".join(lines)
@@ -0,0 +1,262 @@
+"""
+ชุด benchmark ของ sampler: ความแม่นยำ, jitter, CPU ที่ตัว monitor ใช้เอง และเวลาอัปเดต UI
+
+    python benchmark.py                              # ทุก rate (0.01, 0.1, 1, 10 s) แล้วบันทึก JSON
+    python benchmark.py --rates 0.1 1 --duration 5   # เลือก rate / ระยะเวลาเอง
+    python benchmark.py --compare bench_results/old.json   # เทียบกับผลเวอร์ชันก่อน
+
+แต่ละ rate จะเริ่ม child process ที่มีภาระรู้ค่าแน่นอน (busy ตาม duty cycle ในทุก period
+และเพิ่ม RSS ด้วยอัตราคงที่) แล้ววัดด้วย create_sampler + DeadlineScheduler แบบเดียวกับตัวโปรแกรมจริง
+(--psutil บังคับใช้ backend psutil แทน /proc fast path เพื่อเทียบกัน)
+ค่าจริง (ground truth) ของ CPU มาจาก time.process_time() ของ child เอง ส่งกลับทาง stdout ตอนจบ
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import psutil
+from datetime import datetime
+from scheduler import DeadlineScheduler
+from sampler import create_sampler, FAST_PATH, MB
+
+RESULTS_DIR = "bench_results"
+DEFAULT_RATES = (0.01, 0.1, 1.0, 10.0)
+
+
+def percentile(values, q):
+    """percentile แบบ nearest-rank ; list ว่างคืน None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def summary(values):
+    return {"p50": percentile(values, 50), "p95": percentile(values, 95),
+            "p99": percentile(values, 99), "max": max(values) if values else None}
+
+
+def cpu_quantum(rate, cpu_count):
+    """CPU (%) ที่เท่ากับ 1 clock tick ในช่วง rate วินาที ; ระบบที่ไม่มี SC_CLK_TCK คืน None"""
+    try:
+        tick = 1 / os.sysconf("SC_CLK_TCK")
+    except (AttributeError, ValueError, OSError):
+        return None
+    return tick / rate * 100 / cpu_count
+
+
+def worker(duty, period, rss_rate, duration):
+    """ภาระสังเคราะห์ (รันใน child process): busy duty*period วินาทีในทุก period และเพิ่ม RSS rss_rate MB/s"""
+    chunks = []
+    start = time.monotonic()
+    cpu_start = time.process_time()
+    next_period = start
+    while True:
+        now = time.monotonic()
+        if now - start >= duration:
+            break
+        busy_until = next_period + duty * period
+        while time.monotonic() < busy_until:
+            pass
+        # เพิ่ม RSS ตามเวลาที่ผ่านไป (แตะทุกหน้าเพื่อให้นับเป็น resident จริง)
+        target = int((time.monotonic() - start) * rss_rate)
+        while len(chunks) < target:
+            chunks.append(bytearray(b"\1" * MB))
+        next_period += period
+        delay = next_period - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    wall = time.monotonic() - start
+    print(json.dumps({"cpu_time": time.process_time() - cpu_start, "wall": wall}), flush=True)
+
+
+def start_worker(duty, period, rss_rate, duration):
+    return subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--worker",
+         str(duty), str(period), str(rss_rate), str(duration)],
+        stdout=subprocess.PIPE, text=True)
+
+
+def run_rate(rate, duration, duty, period, rss_rate, fast=FAST_PATH):
+    """วัดหนึ่ง rate: คืน dict ของผลลัพธ์"""
+    duration = max(duration, rate * 5)  # อย่างน้อย 5 ตัวอย่าง
+    child = start_worker(duty, period, rss_rate, duration + 1.0)
+    time.sleep(0.2)  # ให้ child เริ่ม loop ก่อน
+    sampler = create_sampler(child.pid, fast=fast)
+    scheduler = DeadlineScheduler(rate)
+    cpu_count = sampler.cpu_count
+    expected_cpu = duty * 100 / cpu_count
+
+    jitter, cpu_err, samples, sample_cost = [], [], [], []
+    self_cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    first_cpu_time = sampler.last_cpu_time
+    while time.monotonic() - wall_start < duration:
+        tick = scheduler.wait()
+        t0 = time.perf_counter()
+        try:
+            cpu, ram, _ = sampler.sample(tick.interval)
+        except psutil.Error:
+            break
+        sample_cost.append((time.perf_counter() - t0) * 1000)
+        jitter.append(abs(tick.interval - rate) * 1000 / (tick.missed + 1))
+        # ตัวอย่างสั้นกว่า period ของภาระจะเห็นเฉพาะช่วง busy หรือ idle: เทียบเฉพาะเมื่อครอบคลุมหลาย period
+        if tick.interval >= period * 5:
+            cpu_err.append(abs(cpu - expected_cpu))
+        samples.append((tick.interval, cpu, ram))
+    wall = time.monotonic() - wall_start
+    self_cpu = (time.process_time() - self_cpu_start) / wall * 100
+    measured_cpu_time = sampler.last_cpu_time - first_cpu_time
+    sampler.close()
+
+    out, _ = child.communicate(timeout=duration + 30)
+    truth = json.loads(out.strip().splitlines()[-1])
+    truth_cpu = truth["cpu_time"] / truth["wall"] * 100 / cpu_count
+
+    total = sum(s[0] for s in samples)
+    mean_cpu = sum(s[0] * s[1] for s in samples) / total if total else 0.0
+    ram = [s[2] for s in samples]
+    growth = (ram[-1] - ram[0]) / (total - samples[0][0]) if len(ram) > 1 and total > samples[0][0] else None
+    return {
+        "rate": rate,
+        "backend": type(sampler).__name__,
+        "duration": wall,
+        "samples": len(samples),
+        "missed": scheduler.missed,
+        "jitter_ms": summary(jitter),
+        "sample_cost_ms": summary(sample_cost),
+        "monitor_self_cpu_percent": self_cpu,
+        "cpu": {
+            "expected": expected_cpu,
+            "ground_truth": truth_cpu,
+            "measured_mean": mean_cpu,
+            "mean_error": abs(mean_cpu - truth_cpu),
+            "sample_error": summary(cpu_err),
+            # ความละเอียดของ cpu_times (1 clock tick) คิดเป็น % ต่อตัวอย่าง: error ต่อตัวอย่างต่ำกว่านี้ไม่ได้
+            "quantum": cpu_quantum(rate, cpu_count),
+            "cpu_time_measured": measured_cpu_time,
+        },
+        "rss": {
+            "growth_expected_mb_s": rss_rate,
+            "growth_measured_mb_s": growth,
+        },
+    }
+
+
+def ui_flush_latency(rows_per_flush=(1, 10, 100, 1000), flushes=50):
+    """เวลาที่ใช้เพิ่มข้อมูลหนึ่งชุดเข้า SampleTableModel + PlotCanvas (แบบ offscreen) ; ไม่มี PyQt5 คืน None"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtWidgets import QApplication
+        from test import PlotCanvas, TABLE_COLUMNS
+        from table_model import SampleTableModel
+        from sample_store import SampleStore
+    except ImportError:
+        return None
+    app = QApplication.instance() or QApplication([])
+    results = {}
+    for n in rows_per_flush:
+        store = SampleStore("bench")
+        model = SampleTableModel(TABLE_COLUMNS, store)
+        graph = PlotCanvas()
+        graph.resize(800, 400)
+        graph.show()
+        app.processEvents()
+        times = []
+        t = time.time()
+        for i in range(flushes):
+            rows = [(t + j * 0.1, 50.0 + (j % 7), 1000.0 + j, 0.1) for j in range(n)]
+            t += n * 0.1
+            start = time.perf_counter()
+            model.extend(rows)
+            graph.append(rows)
+            app.processEvents()
+            times.append((time.perf_counter() - start) * 1000)
+        results[str(n)] = summary(times)
+        graph.close()
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "psutil": psutil.__version__,
+        "platform": platform.platform(),
+        "cpu_count": psutil.cpu_count(),
+    }
+
+
+def compare(old, new):
+    """พิมพ์ค่าหลักของผลเก่า/ใหม่ต่อ rate"""
+    old_rates = {r["rate"]: r for r in old["rates"]}
+    print(f"\n{'rate':>6} {'metric':<24} {'old':>10} {'new':>10}")
+    for r in new["rates"]:
+        o = old_rates.get(r["rate"])
+        if o is None:
+            continue
+        for name, get in (("cpu mean error (%)", lambda x: x["cpu"]["mean_error"]),
+                          ("jitter p95 (ms)", lambda x: x["jitter_ms"]["p95"]),
+                          ("sample cost p95 (ms)", lambda x: x["sample_cost_ms"]["p95"]),
+                          ("self cpu (%)", lambda x: x["monitor_self_cpu_percent"]),
+                          ("missed", lambda x: x["missed"])):
+            a, b = get(o), get(r)
+            if a is None or b is None:
+                continue
+            print(f"{r['rate']:>6g} {name:<24} {a:>10.3f} {b:>10.3f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        worker(*map(float, sys.argv[2:6]))
+        return
+    parser = argparse.ArgumentParser(description="Sampler overhead and accuracy benchmark")
+    parser.add_argument("--rates", type=float, nargs="+", default=list(DEFAULT_RATES), help="sampling intervals (s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per rate (at least 5 samples)")
+    parser.add_argument("--duty", type=float, default=0.5, help="busy fraction of the synthetic workload")
+    parser.add_argument("--period", type=float, default=0.002, help="workload busy/idle period (s)")
+    parser.add_argument("--rss-rate", type=float, default=5.0, help="workload RSS growth (MB/s)")
+    parser.add_argument("--psutil", action="store_true", help="use the portable psutil sampler instead of /proc")
+    parser.add_argument("--no-ui", action="store_true", help="skip the UI flush latency measurement")
+    parser.add_argument("--out", help=f"output JSON (default {RESULTS_DIR}/bench_<time>.json)")
+    parser.add_argument("--compare", help="previous result JSON to compare against")
+    args = parser.parse_args()
+
+    result = {"environment": environment(), "workload": {
+        "duty": args.duty, "period": args.period, "rss_rate": args.rss_rate}, "rates": []}
+    for rate in args.rates:
+        print(f"⏱️ rate {rate:g} s ...", flush=True)
+        r = run_rate(rate, args.duration, args.duty, args.period, args.rss_rate, FAST_PATH and not args.psutil)
+        result["rates"].append(r)
+        cpu = r["cpu"]
+        print(f"   {r['backend']}  samples {r['samples']}  missed {r['missed']}  jitter p95 {r['jitter_ms']['p95']:.3f} ms  "
+              f"self CPU {r['monitor_self_cpu_percent']:.2f}%  "
+              f"CPU truth {cpu['ground_truth']:.2f}% measured {cpu['measured_mean']:.2f}% "
+              f"(error {cpu['mean_error']:.3f})")
+    if not args.no_ui:
+        print("🖥️ UI flush latency ...", flush=True)
+        result["ui_flush_ms"] = ui_flush_latency()
+        for n, s in (result["ui_flush_ms"] or {}).items():
+            print(f"   {n:>5} rows/flush  p50 {s['p50']:.2f} ms  p95 {s['p95']:.2f} ms")
+
+    path = args.out or os.path.join(RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"📁 Saved {path}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+เปรียบเทียบหลาย session (เช่น training เดียวกันที่ batch size ต่างกัน) ในคำสั่งเดียว
+
+    python compare.py                                   # ทุกไฟล์ใน sessions/
+    python compare.py sessions/run_bs32*.mlog sessions/run_bs64*.mlog --plot bs.png --csv bs.csv
+    python compare.py monitor_20250101_*.csv monitor_old.xlsx   # ไฟล์ที่ export ไว้ก็ใช้ได้
+
+- โหลดทุก session เป็น numpy array แล้วต่อกันเป็น array เดียว (ไฟล์ .mlog อ่านผ่าน memory map)
+  สถิติต่อ session คำนวณพร้อมกันทุก session ด้วย reduceat / lexsort / bincount ไม่มี loop ต่อแถว
+  จึงรับได้หลายร้อย session รวมหลายล้านแถว
+- เทียบกันบนเวลาที่ผ่านไปนับจากตัวอย่างแรกของแต่ละ session (elapsed) ไม่ใช่เวลาจริง
+- ผลลัพธ์: ตารางสรุปทางหน้าจอ (และ --csv) + กราฟ overlay ของ CPU/RAM (--plot)
+"""
+import os
+import csv
+import glob
+import time
+import argparse
+import numpy as np
+from datetime import datetime
+from session_log import SessionLog, SESSION_DIR
+
+GRID_POINTS = 2000  # จำนวนจุดบนแกนเวลาร่วมของกราฟ overlay (ความละเอียดอัตโนมัติ)
+QUANTILE = 95  # percentile ในตารางสรุป
+MAX_LEGEND = 20  # จำนวน session สูงสุดที่ใส่ใน legend ; มากกว่านี้แสดงเส้น median ของทุก session แทน
+SUMMARY_HEADERS = ["Session", "Samples", "Duration (s)", "CPU mean (%)", f"CPU p{QUANTILE} (%)", "CPU peak (%)",
+                   "CPU-seconds", "RAM mean (MB)", f"RAM p{QUANTILE} (MB)", "RAM peak (MB)", "RAM peak at (s)",
+                   "Source"]
+# ชื่อคอลัมน์ในไฟล์ที่ export (exporter.HEADERS / ROLLUP_HEADERS)
+EXPORT_COLUMNS = {"cpu": ("CPU (%)", "CPU mean (%)"), "ram": ("RAM (MB)", "RAM mean (MB)"),
+                  "interval": ("Interval (s)",)}
+SOURCE_PREFIX = "Command/Source: "
+
+
+def expand_paths(args):
+    """ไฟล์ตาม argument (รองรับ glob และโฟลเดอร์ = ทุก .mlog ข้างใน) ; ไม่ระบุเลย = SESSION_DIR"""
+    paths = []
+    for arg in args or [SESSION_DIR]:
+        if os.path.isdir(arg):
+            paths.extend(sorted(glob.glob(os.path.join(arg, "*.mlog"))))
+        else:
+            paths.extend(sorted(glob.glob(arg)) or [arg])
+    return paths
+
+
+def load_mlog(path):
+    """ไฟล์ session -> (source, time, cpu, ram, interval) ; array เป็น view ของ memory map (ยังไม่อ่านจากดิสก์)"""
+    log = SessionLog(path)
+    data = log.array()
+    return log.source, data[:, 0], data[:, 1], data[:, 2], data[:, 3]
+
+
+def read_export_rows(path):
+    """แถวของไฟล์ CSV / Excel ที่ export ไว้ (รวมทุก sheet ของ Excel ; หัวตารางของ sheet ถัดไปถูกข้าม)"""
+    if path.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True)
+        try:
+            for ws in wb.worksheets:
+                yield from ws.iter_rows(values_only=True)
+        finally:
+            wb.close()
+        return
+    with open(path, newline="", encoding="utf-8") as file:
+        yield from csv.reader(file)
+
+
+def load_export(path):
+    """ไฟล์ CSV / Excel จาก exporter -> (source, time, cpu, ram, interval) ; ใช้ค่าเฉลี่ยถ้าเป็นไฟล์ที่รวม bucket"""
+    rows = read_export_rows(path)
+    headers = [str(h) for h in next(rows)]
+    index = {}
+    for key, names in EXPORT_COLUMNS.items():
+        found = [headers.index(name) for name in names if name in headers]
+        if not found:
+            raise ValueError(f"{path}: column {names[0]!r} not found")
+        index[key] = found[0]
+    times, columns, source = [], {key: [] for key in index}, ""
+    for row in rows:
+        last = row[-1] if row else None
+        if isinstance(last, str) and last.startswith(SOURCE_PREFIX):
+            source = last[len(SOURCE_PREFIX):]
+            continue
+        if not row or not row[0] or row[0] == headers[0]:
+            continue
+        times.append(row[0])
+        for key, i in index.items():
+            columns[key].append(row[i])
+    t = np.array(times, dtype="datetime64[ms]").astype(np.int64) / 1000.0
+    return (source, t, *(np.array(columns[key], dtype=float) for key in ("cpu", "ram", "interval")))
+
+
+def load_session(path):
+    return load_mlog(path) if path.lower().endswith(".mlog") else load_export(path)
+
+
+class SessionSet:
+    """
+    ทุก session ต่อกันเป็น array เดียวต่อคอลัมน์ ; session ที่ i อยู่ในช่วง starts[i] : starts[i] + lengths[i]
+    elapsed = เวลาตั้งแต่ตัวอย่างแรกของ session นั้น (วินาที)
+    """
+
+    def __init__(self, names, sources, parts):
+        self.names = names
+        self.sources = sources
+        self.lengths = np.array([len(p[0]) for p in parts], dtype=np.intp)
+        self.starts = np.concatenate(([0], np.cumsum(self.lengths)[:-1])).astype(np.intp)
+        t = np.concatenate([p[0] for p in parts])
+        self.cpu = np.concatenate([p[1] for p in parts])
+        self.ram = np.concatenate([p[2] for p in parts])
+        self.interval = np.concatenate([p[3] for p in parts])
+        self.ids = np.repeat(np.arange(len(names)), self.lengths)
+        self.elapsed = t - t[self.starts][self.ids]
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def rows(self):
+        return len(self.cpu)
+
+
+def load_sessions(paths, report=print):
+    """โหลดทุกไฟล์ ; ไฟล์ที่อ่านไม่ได้หรือว่างถูกข้ามพร้อมแจ้งผ่าน report"""
+    names, sources, parts = [], [], []
+    for path in paths:
+        try:
+            source, *columns = load_session(path)
+        except (OSError, ValueError, KeyError, StopIteration) as e:
+            report(f"⚠️ Skipped {path}: {e}")
+            continue
+        if not len(columns[0]):
+            report(f"⚠️ Skipped {path}: no samples")
+            continue
+        names.append(os.path.basename(path))
+        sources.append(source)
+        parts.append(columns)
+    return SessionSet(names, sources, parts) if parts else None
+
+
+def segment_quantile(values, sessions, q):
+    """
+    percentile q (nearest-rank) ของแต่ละ session พร้อมกัน ; คืน (ค่า percentile, ตำแหน่งของค่าสูงสุดในแต่ละ session)
+    เรียงทั้ง array ครั้งเดียวด้วย key = session * ช่วงของค่า + ค่า (argsort ครั้งเดียวเร็วกว่า lexsort สองคีย์หลายเท่า)
+    """
+    low = values.min()
+    span = values.max() - low + 1.0
+    order = np.argsort(sessions.ids * span + (values - low))
+    ranks = np.round(q / 100 * (sessions.lengths - 1)).astype(np.intp)
+    return values[order[sessions.starts + ranks]], order[sessions.starts + sessions.lengths - 1]
+
+
+def summarize(sessions, q=QUANTILE):
+    """สถิติต่อ session เป็น dict ของ array (หนึ่งค่าต่อ session) ตามลำดับ SUMMARY_HEADERS"""
+    starts, n = sessions.starts, sessions.lengths
+    stats = {"samples": n, "duration": np.maximum.reduceat(sessions.elapsed, starts)}
+    for column in ("cpu", "ram"):
+        values = getattr(sessions, column)
+        stats[f"{column}_mean"] = np.add.reduceat(values, starts) / n
+        stats[f"{column}_p{q}"], argmax = segment_quantile(values, sessions, q)
+        stats[f"{column}_peak"] = values[argmax]
+        if column == "ram":
+            stats["ram_peak_at"] = sessions.elapsed[argmax]
+        if column == "cpu":
+            # CPU-seconds = ผลรวมของ CPU% x ช่วงเวลาจริงของแต่ละตัวอย่าง (100% นาน 1 วินาที = 1 CPU-second)
+            stats["cpu_seconds"] = np.add.reduceat(values * sessions.interval, starts) / 100.0
+    return stats
+
+
+def align(sessions, step=None, points=GRID_POINTS):
+    """
+    ค่าเฉลี่ยของ CPU/RAM บนแกน elapsed ร่วมกัน (ช่องละ step วินาที ; None = เลือกให้ได้ไม่เกิน points ช่อง)
+    คืน (grid, cpu, ram) ; cpu/ram เป็น array (จำนวน session, จำนวนช่อง) ช่องที่ไม่มีตัวอย่างเป็น NaN
+    """
+    span = float(sessions.elapsed.max())
+    if step is None:
+        step = max(span / points, 1e-3)
+    n_bins = int(span // step) + 1
+    flat = sessions.ids * n_bins + (sessions.elapsed // step).astype(np.intp)
+    size = len(sessions) * n_bins
+    counts = np.bincount(flat, minlength=size).reshape(len(sessions), n_bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cpu = np.bincount(flat, sessions.cpu, size).reshape(counts.shape) / counts
+        ram = np.bincount(flat, sessions.ram, size).reshape(counts.shape) / counts
+    return np.arange(n_bins) * step, cpu, ram
+
+
+def summary_rows(sessions, stats, q=QUANTILE):
+    columns = ("samples", "duration", "cpu_mean", f"cpu_p{q}", "cpu_peak", "cpu_seconds",
+               "ram_mean", f"ram_p{q}", "ram_peak", "ram_peak_at")
+    for i, name in enumerate(sessions.names):
+        yield (name, *(stats[c][i].item() for c in columns), sessions.sources[i])
+
+
+def format_table(rows):
+    """ตารางข้อความ (ไม่รวมคอลัมน์ Source) ; กว้างตามชื่อ session ที่ยาวที่สุด"""
+    headers = SUMMARY_HEADERS[:-1]
+    rows = list(rows)
+    width = max([len(headers[0])] + [len(row[0]) for row in rows]) + 2
+    lines = [f"{headers[0]:<{width}}" + "".join(f"{h:>16}" for h in headers[1:])]
+    for name, samples, *values, _ in rows:
+        lines.append(f"{name:<{width}}{samples:>16}" + "".join(f"{v:>16.2f}" for v in values))
+    return "\n".join(lines)
+
+
+def write_summary_csv(path, rows):
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(SUMMARY_HEADERS)
+        writer.writerows(rows)
+
+
+def plot_overlay(path, sessions, grid, cpu, ram):
+    """กราฟ CPU และ RAM ของทุก session บนแกน elapsed เดียวกัน ; session จำนวนมากเพิ่มเส้น median"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    minutes = grid / 60.0
+    many = len(sessions) > MAX_LEGEND
+    fig, (ax_cpu, ax_ram) = plt.subplots(2, 1, sharex=True, figsize=(12, 8))
+    for ax, values, label in ((ax_cpu, cpu, "CPU (%)"), (ax_ram, ram, "RAM (MB)")):
+        # ทุก session เป็น Line ชุดเดียว (คอลัมน์ละเส้น) แทนการเรียก plot ทีละ session
+        ax.plot(minutes, values.T, linewidth=0.6 if many else 1.0, alpha=0.35 if many else 0.9)
+        if many:
+            with np.errstate(all="ignore"):
+                ax.plot(minutes, np.nanmedian(values, axis=0), color="black", linewidth=1.8,
+                        label=f"median of {len(sessions)} sessions")
+            ax.legend(loc="upper right")
+        ax.set_ylabel(label)
+        ax.grid(True, alpha=0.3)
+    if not many:
+        ax_cpu.legend(sessions.names, loc="upper right", fontsize="small")
+    ax_ram.set_xlabel("Elapsed (min)")
+    ax_cpu.set_title(f"{len(sessions)} sessions aligned on elapsed time")
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CPU/RAM profiles of several monitoring sessions")
+    parser.add_argument("paths", nargs="*",
+                        help=f"session logs (.mlog), exported .csv/.xlsx files or folders (default {SESSION_DIR}/)")
+    parser.add_argument("--plot", default=None, help="overlay plot file (default compare_<time>.png)")
+    parser.add_argument("--no-plot", action="store_true", help="print the summary table only")
+    parser.add_argument("--csv", default=None, help="also write the summary table to this CSV file")
+    parser.add_argument("--step", type=float, default=None,
+                        help=f"alignment step in seconds (default: span / {GRID_POINTS})")
+    args = parser.parse_args()
+    if args.step is not None and args.step <= 0:
+        parser.error("--step must be positive")
+
+    start = time.perf_counter()
+    sessions = load_sessions(expand_paths(args.paths))
+    if sessions is None:
+        parser.error("no sessions to compare")
+    stats = summarize(sessions)
+    rows = list(summary_rows(sessions, stats))
+    print(format_table(rows))
+    print(f"\n📊 {len(sessions)} sessions, {sessions.rows} samples in {time.perf_counter() - start:.2f} s")
+    if args.csv:
+        write_summary_csv(args.csv, rows)
+        print(f"📁 Saved summary to {os.path.abspath(args.csv)}")
+    if not args.no_plot:
+        path = args.plot or f"compare_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+        grid, cpu, ram = align(sessions, args.step)
+        plot_overlay(path, sessions, grid, cpu, ram)
+        print(f"📈 Saved overlay plot to {os.path.abspath(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import json
+import time
+import asyncio
+import signal
+import argparse
+import threading
+import psutil
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from discovery import ProcessIndex
+from matcher import MatchRules
+from filewatch import FileWatcher, PID_FILE, parse_pid
+from pool import SamplerPool
+from engine import monitor_pool
+from metrics import METRICS, parse_metrics, export_value
+from session_log import format_timestamp
+
+DEFAULT_PORT = 9101
+
+
+class RollingWindow:
+    """
+    ค่าเฉลี่ยและค่าสูงสุดของ window seconds ล่าสุด อัปเดตแบบ O(1) ต่อค่า (amortized)
+    - ผลรวมถูกบวก/ลบตามค่าที่เข้า/ออก
+    - ค่าสูงสุดใช้ monotonic deque (ค่าที่ไม่มีทางเป็น max อีกแล้วถูกทิ้งทันที)
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.values = deque()
+        self.peaks = deque()
+        self.total = 0.0
+
+    def add(self, t, value):
+        self.values.append((t, value))
+        self.total += value
+        while self.peaks and self.peaks[-1][1] <= value:
+            self.peaks.pop()
+        self.peaks.append((t, value))
+        cutoff = t - self.seconds
+        while self.values and self.values[0][0] <= cutoff:
+            self.total -= self.values.popleft()[1]
+        while self.peaks and self.peaks[0][0] <= cutoff:
+            self.peaks.popleft()
+
+    def mean(self):
+        return self.total / len(self.values) if self.values else 0.0
+
+    def max(self):
+        return self.peaks[0][1] if self.peaks else 0.0
+
+
+class MonitorDaemon:
+    """
+    ลูปตรวจจับ + เก็บตัวอย่างแบบไม่มี UI (ทุก training process บนเครื่อง เหมือนโหมด multi-target)
+    ทำงานบน asyncio event loop ของ thread ตัวเอง (engine.monitor_pool)
+    ทุก tick สร้าง snapshot ใหม่ (dict ที่ไม่ถูกแก้ไขอีก) แล้วแทนที่ self.snapshot ทีเดียว
+    HTTP thread อ่าน snapshot ได้โดยไม่ต้องล็อก ผู้ scrape ที่ถี่แค่ไหนก็ไม่ทำให้ sampler ช้าลง
+    """
+
+    def __init__(self, rate=1.0, tree=False, window=60.0, rescan=2.0, metrics=()):
+        self.rate = rate
+        self.metrics = tuple(metrics)
+        self.window = window
+        self.rescan = rescan
+        self.rules = MatchRules.load()
+        self.discovery = ProcessIndex(self.rules.classify)
+        self.handshake = FileWatcher(names=(PID_FILE,))
+        self.pool = SamplerPool(tree, metrics=self.metrics)
+        self.ticks = 0
+        self.missed = 0  # deadline ที่พลาดสะสม (รวมทุกช่วงที่มี target)
+        self.rolling = {}  # pid -> (RollingWindow ของ CPU, RollingWindow ของ RAM)
+        self.matlab_target = None
+        self.finished = 0
+        self.events = deque(maxlen=50)  # event ล่าสุดของทุก target (analytics.StreamAnalyzer)
+        self.stopping = threading.Event()
+        self.snapshot = self.make_snapshot({})
+
+    def adopt_targets(self):
+        self.discovery.scan()
+        found = [(e.pid, f"Python: {e.cmdline.lower()}") for e in self.discovery.candidates(self.rules.label)]
+        pid = parse_pid(self.handshake.text(PID_FILE))
+        if pid is not None and pid not in self.pool and psutil.pid_exists(pid):
+            found.append((pid, f"MATLAB (PID: {pid})"))
+            self.matlab_target = pid
+        for pid, source in found:
+            if pid in self.pool:
+                continue
+            try:
+                target = self.pool.add(pid, source)
+            except psutil.Error:
+                continue
+            self.rolling[pid] = (RollingWindow(self.window), RollingWindow(self.window))
+            print(f"[daemon] + {pid} {source} -> {target.log.path}", flush=True)
+
+    def drop(self, target, why):
+        self.rolling.pop(target.pid, None)
+        self.finished += 1
+        print(f"[daemon] - {target.pid} {why} after {target.samples} samples", flush=True)
+
+    def make_snapshot(self, rows):
+        targets = []
+        for pid, target in self.pool.targets.items():
+            row = rows.get(pid)
+            cpu, ram = self.rolling[pid]
+            targets.append({
+                "pid": pid,
+                "source": target.source,
+                "session": target.log.path,
+                "samples": target.samples,
+                "time": row[0] if row else None,
+                "cpu": row[1] if row else None,
+                "ram": row[2] if row else None,
+                "cpu_mean": cpu.mean(),
+                "cpu_max": cpu.max(),
+                "ram_mean": ram.mean(),
+                "ram_max": ram.max(),
+                "rss_slope": target.analyzer.rss_slope(),  # MB/นาที ใน analytics.SLOPE_WINDOW ล่าสุด
+                "events": dict(target.analyzer.counts),
+                # metric เพิ่มเติม (None = ยังไม่มีค่า / อ่านไม่ได้บนระบบนี้)
+                "metrics": {name: export_value(v) for name, v in zip(self.metrics, row[4:])} if row else {},
+            })
+        return {
+            "time": time.time(),
+            "rate": self.rate,
+            "window": self.window,
+            "targets": targets,
+            "finished": self.finished,
+            "ticks": self.ticks,
+            "missed": self.missed,
+            "sample_cost": self.pool.last_cost,
+            "metric_names": list(self.metrics),
+            "recent_events": list(self.events),
+        }
+
+    def run(self):
+        """ลูปหลัก (เรียกบน thread ของตัวเอง) ; จบเมื่อ stop() ถูกเรียก"""
+        self.handshake.start()
+        try:
+            asyncio.run(self.run_async())
+        finally:
+            self.pool.close()
+            self.handshake.stop()
+
+    async def run_async(self):
+        next_scan = 0.0
+        while not self.stopping.is_set():
+            if time.monotonic() >= next_scan:
+                self.adopt_targets()
+                next_scan = time.monotonic() + self.rescan
+            if not len(self.pool):
+                self.snapshot = self.make_snapshot({})
+                await asyncio.sleep(0.3)
+                continue
+            missed = self.missed
+            async for tick, rows, gone in monitor_pool(self.pool, self.rate):
+                self.ticks += 1
+                self.missed = missed + tick.missed
+                for target in gone:
+                    self.drop(target, "exited")
+                for pid, event in self.pool.events:
+                    self.events.append({"time": event.time, "pid": pid, "kind": event.kind, "message": event.message})
+                    print(f"[daemon] ! {pid} {format_timestamp(event.time)} {event.message}", flush=True)
+                if self.matlab_target in self.pool and not self.handshake.exists(PID_FILE):
+                    self.drop(self.pool.remove(self.matlab_target), "PID file deleted")
+                for pid, row in rows.items():
+                    if pid in self.rolling:
+                        self.rolling[pid][0].add(row[0], row[1])
+                        self.rolling[pid][1].add(row[0], row[2])
+                self.snapshot = self.make_snapshot(rows)
+                if self.stopping.is_set():
+                    break
+                if time.monotonic() >= next_scan:
+                    self.adopt_targets()
+                    next_scan = time.monotonic() + self.rescan
+
+    def stop(self):
+        self.stopping.set()
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(snapshot):
+    """แปลง snapshot เป็น Prometheus text exposition format (version 0.0.4)"""
+    window = f"{snapshot['window']:g}"
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if labels:
+                label_text = ",".join(f'{k}="{escape_label(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+            else:
+                lines.append(f"{name} {value}")
+
+    def per_target(key, extra=None):
+        samples = []
+        for t in snapshot["targets"]:
+            if t[key] is None:
+                continue
+            labels = {"pid": t["pid"], "source": t["source"]}
+            if extra:
+                labels.update(extra)
+            samples.append((labels, t[key]))
+        return samples
+
+    metric("monitor_process_cpu_percent", "gauge",
+           "CPU usage of the training process (percent of all cores)", per_target("cpu"))
+    metric("monitor_process_rss_megabytes", "gauge",
+           "Resident memory of the training process (MB)", per_target("ram"))
+    metric("monitor_process_cpu_percent_mean", "gauge",
+           "Mean CPU usage over the rolling window", per_target("cpu_mean", {"window": window}))
+    metric("monitor_process_cpu_percent_max", "gauge",
+           "Peak CPU usage over the rolling window", per_target("cpu_max", {"window": window}))
+    metric("monitor_process_rss_megabytes_mean", "gauge",
+           "Mean resident memory over the rolling window (MB)", per_target("ram_mean", {"window": window}))
+    metric("monitor_process_rss_megabytes_max", "gauge",
+           "Peak resident memory over the rolling window (MB)", per_target("ram_max", {"window": window}))
+    for name in snapshot["metric_names"]:
+        samples = [({"pid": t["pid"], "source": t["source"]}, t["metrics"][name])
+                   for t in snapshot["targets"] if t["metrics"].get(name) is not None]
+        metric(f"monitor_process_{name}", "gauge", f"{METRICS[name].header} of the training process", samples)
+    metric("monitor_process_rss_slope_megabytes_per_minute", "gauge",
+           "Linear-regression trend of resident memory over the analytics window (MB/min)", per_target("rss_slope"))
+    metric("monitor_process_events_total", "counter",
+           "Anomaly events raised for the training process (memory_growth, cpu_stall, cpu_spike, ram_spike)",
+           [({"pid": t["pid"], "source": t["source"], "kind": kind}, n)
+            for t in snapshot["targets"] for kind, n in sorted(t["events"].items())])
+    metric("monitor_process_samples_total", "counter",
+           "Samples recorded for the training process", per_target("samples"))
+    metric("monitor_targets", "gauge", "Training processes currently monitored",
+           [(None, len(snapshot["targets"]))])
+    metric("monitor_targets_finished_total", "counter", "Training processes that have finished",
+           [(None, snapshot["finished"])])
+    metric("monitor_ticks_total", "counter", "Sampling ticks fired", [(None, snapshot["ticks"])])
+    metric("monitor_missed_deadlines_total", "counter", "Sampling deadlines skipped because the sampler overran",
+           [(None, snapshot["missed"])])
+    metric("monitor_sample_duration_seconds", "gauge", "Time spent reading all targets in the last tick",
+           [(None, snapshot["sample_cost"])])
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """/metrics (Prometheus), /metrics.json (JSON), /healthz ; อ่าน snapshot ล่าสุดเท่านั้น"""
+
+    daemon = None  # MonitorDaemon ที่ถูกกำหนดตอนสร้าง server
+
+    def do_GET(self):
+        snapshot = self.daemon.snapshot
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, kind = prometheus_text(snapshot), "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body, kind = json.dumps(snapshot), "application/json"
+        elif path == "/healthz":
+            body, kind = "ok\n", "text/plain; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # ไม่ log ทุก request (scraper เรียกถี่)
+
+
+def serve(daemon, host="127.0.0.1", port=DEFAULT_PORT):
+    """สร้าง HTTP server (หนึ่ง thread ต่อ request) ที่อ่าน snapshot ของ daemon"""
+    handler = type("Handler", (MetricsHandler,), {"daemon": daemon})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless CPU/RAM monitor with a metrics HTTP endpoint")
+    parser.add_argument("--rate", type=float, default=1.0, help="sampling interval in seconds (default 1.0)")
+    parser.add_argument("--tree", action="store_true", help="include child processes")
+    parser.add_argument("--window", type=float, default=60.0, help="rolling window in seconds (default 60)")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to bind (default {DEFAULT_PORT})")
+    parser.add_argument("--metrics", default="",
+                        help=f"extra metrics, comma separated or 'all' ({', '.join(METRICS)})")
+    args = parser.parse_args()
+    try:
+        metrics = parse_metrics(args.metrics)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+    if args.window <= 0:
+        parser.error("--window must be positive")
+
+    daemon = MonitorDaemon(args.rate, args.tree, args.window, metrics=metrics)
+    server = serve(daemon, args.host, args.port)
+    threading.Thread(target=server.serve_forever, name="MetricsHTTP", daemon=True).start()
+    print(f"[daemon] serving http://{args.host}:{server.server_port}/metrics (rate {args.rate}s)", flush=True)
+
+    # supervisor ส่ง SIGTERM: หยุดลูปแล้วปิดไฟล์ session ให้เรียบร้อย
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    worker = threading.Thread(target=daemon.run, name="Sampler")
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.5)
+    except KeyboardInterrupt:
+        daemon.stop()
+        worker.join()
+    server.shutdown()
+    print("[daemon] stopped", flush=True)
+
+
+if __name__ == "__main__":
+    main()
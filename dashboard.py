@@ -0,0 +1,192 @@
+"""
+dashboard ใน terminal สำหรับ test_CLI (display mode 3): วาดทับที่เดิมด้วย ANSI escape แทนการพิมพ์ทีละแถว
+- วาดใหม่ทุก FRAME_INTERVAL วินาที ไม่ขึ้นกับความถี่ของการเก็บตัวอย่าง (0.01 s หรือ 10 s ก็ได้ frame rate เท่ากัน)
+- หนึ่ง frame = ข้อความเดียว เขียนด้วย write + flush ครั้งเดียว ; ไม่เพิ่ม scrollback ของ terminal (เหมาะกับ SSH)
+- แต่ละ target (Panel) แสดงค่าปัจจุบัน, sparkline ของค่าล่าสุด, peak, สถิติของ session (StreamAnalyzer) และ event ล่าสุด
+"""
+import math
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from engine import next_tick
+from scheduler import DeadlineScheduler
+from metrics import header, format_value
+from aggregate import window_stat
+from session_log import format_timestamp
+
+FRAME_INTERVAL = 0.25  # วินาทีต่อ frame (4 fps)
+HISTORY = 512  # จำนวนค่าล่าสุดที่เก็บไว้วาด sparkline (ตัดตามความกว้างของจอ)
+RAM_MIN_SPAN = 1.0  # ช่วงแกนขั้นต่ำ (MB) ของ sparkline RAM ไม่ให้ความต่างระดับ KB ดูเป็นการกระโดด
+RECENT_EVENTS = 5  # จำนวน event ล่าสุดที่แสดงท้ายจอ
+SPARK = " ▁▂▃▄▅▆▇█"
+
+HOME = "\x1b[H"
+CLEAR_SCREEN = "\x1b[2J"
+CLEAR_LINE = "\x1b[K"  # ลบส่วนที่เหลือของบรรทัด (เศษจาก frame ก่อน)
+CLEAR_BELOW = "\x1b[J"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+
+
+def sparkline(values, width, low=None, high=None):
+    """ค่าล่าสุด width ตัวเป็นแถบ ▁▂▃▄▅▆▇█ ; low/high = ช่วงของแกน (ค่าเริ่มต้นคือ min/max ของค่าที่แสดง)"""
+    values = list(values)[-width:] if width > 0 else []
+    if not values:
+        return ""
+    low = min(values) if low is None else low
+    high = max(values) if high is None else high
+    top = len(SPARK) - 1
+    if high <= low:
+        return SPARK[1] * len(values)
+    scale = top / (high - low)
+    return "".join(SPARK[min(top, max(1, int(round((v - low) * scale))))] for v in values)
+
+
+def format_elapsed(seconds):
+    seconds = int(max(seconds, 0))
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def cell(value):
+    return f"{value:>9.2f}" if value is not None else f"{'-':>9}"
+
+
+class Panel:
+    """
+    ข้อมูลที่วาดของ target หนึ่งตัว
+    - names = field เพิ่มเติมของแถวตามลำดับ (สถิติต่อ window + metric) ; peak ใช้ cpu_max/ram_max ถ้ามี
+    - analyzer = StreamAnalyzer ของ target (อัปเดตโดยผู้เรียก) ใช้แสดง mean/p95/แนวโน้ม RSS/จำนวน event
+    - tree_sampler = ProcessTreeSampler (โหมด tree) แสดง child ที่ใช้ CPU มากที่สุด
+    """
+
+    def __init__(self, source, names=(), analyzer=None, tree_sampler=None, pid=None):
+        self.source = source
+        self.names = tuple(names)
+        self.analyzer = analyzer
+        self.tree_sampler = tree_sampler
+        self.pid = pid
+        self.metrics = [(i, name) for i, name in enumerate(self.names) if not window_stat(name)]
+        self.peak_index = {column: self.names.index(f"{column}_max") if f"{column}_max" in self.names else None
+                           for column in ("cpu", "ram")}
+        self.cpu = deque(maxlen=HISTORY)
+        self.ram = deque(maxlen=HISTORY)
+        self.peaks = {"cpu": -math.inf, "ram": -math.inf}
+        self.row = None
+        self.start = None
+        self.samples = 0
+        self.status = None  # ข้อความเมื่อ target จบแล้ว
+
+    def add(self, row):
+        """row = (time, cpu, ram, interval, *field ตาม names)"""
+        if self.start is None:
+            self.start = row[0]
+        self.row = row
+        self.samples += 1
+        self.cpu.append(row[1])
+        self.ram.append(row[2])
+        for column, value in (("cpu", row[1]), ("ram", row[2])):
+            i = self.peak_index[column]
+            if i is not None and row[4 + i] == row[4 + i]:
+                value = max(value, row[4 + i])  # peak ของ sub-sample ภายใน window
+            if value > self.peaks[column]:
+                self.peaks[column] = value
+
+    def lines(self, width):
+        pid = f"[{self.pid}] " if self.pid is not None else ""
+        title = f"{pid}{self.source}"
+        if self.status:
+            title = f"{pid}({self.status}) {self.source}"
+        if self.row is None:
+            return [title, "  waiting for the first sample..."]
+        t, cpu, ram, interval = self.row[:4]
+        lines = [title, f"  elapsed {format_elapsed(t - self.start)}   samples {self.samples}   "
+                        f"last {format_timestamp(t)}   interval {interval:.3f} s"]
+        stats = self.analyzer.summary() if self.analyzer is not None else {}
+        cpu_axis = (0.0, max(100.0, max(self.cpu)))
+        ram_axis = (min(self.ram), max(max(self.ram), min(self.ram) + RAM_MIN_SPAN))
+        for column, label, value, history, (low, high) in (("cpu", "CPU (%)", cpu, self.cpu, cpu_axis),
+                                                           ("ram", "RAM (MB)", ram, self.ram, ram_axis)):
+            s = stats.get(column, {})
+            text = (f"  {label:<9}{cell(value)}  peak{cell(self.peaks[column])}  mean{cell(s.get('mean'))}"
+                    f"  p95{cell(s.get('p95'))}  ")
+            lines.append(text + sparkline(history, width - len(text), low, high))
+        if self.metrics:
+            lines.append("  " + "   ".join(f"{header(name)} {format_value(name, self.row[4 + i]).strip()}"
+                                            for i, name in self.metrics))
+        if self.analyzer is not None:
+            slope = stats.get("rss_slope")
+            trend = f"{slope:+.2f} MB/min" if slope is not None else "-"
+            lines.append(f"  RSS trend {trend}   events: {self.analyzer.count_text() or 'none'}")
+        if self.tree_sampler is not None and self.tree_sampler.breakdown:
+            lines.append(f"  └ {len(self.tree_sampler.breakdown) - 1} child processes")
+            for c in self.tree_sampler.top_children(3):
+                lines.append(f"    {c.cpu:>8.2f} %  {c.ram:>10.2f} MB  {c.name} (PID {c.pid})")
+        return lines
+
+
+class Dashboard:
+    """
+    หน้าจอทั้งหมด: หัวข้อ + Panel ของทุก target + event ล่าสุด
+    ใช้ด้วย open() แล้วรัน animate() เป็น task ของ asyncio จนจบ monitor จากนั้น close() (วาด frame สุดท้ายแล้วคืน cursor)
+    """
+
+    def __init__(self, title, stream=None, frame_interval=FRAME_INTERVAL):
+        self.title = title
+        self.stream = stream if stream is not None else sys.stdout
+        self.frame_interval = frame_interval
+        self.panels = {}  # key (pid หรือ None) -> Panel
+        self.events = deque(maxlen=RECENT_EVENTS)
+        self.start = time.time()
+        self.frames = 0
+        self.dropped = 0  # แถวที่ consumer ของหน้าจอทิ้ง (ดู engine.Subscription)
+
+    def panel(self, key, source, names=(), analyzer=None, tree_sampler=None):
+        """Panel ของ key ; สร้างใหม่ถ้ายังไม่มี"""
+        if key not in self.panels:
+            self.panels[key] = Panel(source, names, analyzer, tree_sampler, key)
+        return self.panels[key]
+
+    def note(self, text):
+        """ข้อความหนึ่งบรรทัดในรายการ event ล่าสุด (แทน print ซึ่งจะเลื่อนหน้าจอ)"""
+        self.events.append(text)
+
+    def render(self):
+        """หนึ่ง frame เป็นข้อความเดียว ; ตัดบรรทัดตามขนาด terminal ปัจจุบัน"""
+        columns, rows = shutil.get_terminal_size()
+        width = columns - 1  # กัน terminal ตัดขึ้นบรรทัดใหม่เองที่คอลัมน์สุดท้าย
+        dropped = f"   (display skipped {self.dropped} rows)" if self.dropped else ""
+        lines = [f"{self.title}   {format_elapsed(time.time() - self.start)}   "
+                 f"{time.strftime('%H:%M:%S')}{dropped}", ""]
+        for panel in self.panels.values():
+            lines.extend(panel.lines(width))
+            lines.append("")
+        if self.events:
+            lines.append("Recent events:")
+            lines.extend(self.events)
+        lines = lines[:max(rows - 1, 1)]
+        return HOME + "".join(f"{line[:width]}{CLEAR_LINE}\n" for line in lines) + CLEAR_BELOW
+
+    def draw(self):
+        self.stream.write(self.render())
+        self.stream.flush()
+        self.frames += 1
+
+    def open(self):
+        if os.name == "nt":
+            os.system("")  # เปิดการตีความ ANSI escape ของ console บน Windows 10+
+        self.stream.write(HIDE_CURSOR + CLEAR_SCREEN)
+        self.draw()
+
+    async def animate(self):
+        """วาดทุก frame_interval วินาทีตาม deadline (frame ที่ช้าไม่สะสมเป็นความหน่วง) จนกว่า task ถูกยกเลิก"""
+        scheduler = DeadlineScheduler(self.frame_interval)
+        while True:
+            await next_tick(scheduler)
+            self.draw()
+
+    def close(self):
+        self.draw()
+        self.stream.write(SHOW_CURSOR)
+        self.stream.flush()
@@ -0,0 +1,118 @@
+import os
+import time
+import psutil
+from collections import namedtuple
+
+# ผลการ scan หนึ่งครั้ง: เวลาที่ใช้ (วินาที), จำนวนโปรเซสในเครื่อง, จำนวนที่ต้องอ่านข้อมูลจริง, จำนวน candidate
+ScanStats = namedtuple("ScanStats", ["duration", "processes", "inspected", "candidates"])
+
+# ข้อมูลที่จำไว้ต่อโปรเซส ; label = None แปลว่าเคยตรวจแล้วไม่ใช่ process ที่ต้องการ
+Entry = namedtuple("Entry", ["pid", "create_time", "label", "proc", "name", "cmdline"])
+
+
+def python_script(proc, name, cmdline):
+    """ตัวจำแนกเริ่มต้น: Python ที่รันไฟล์ .py"""
+    if "python" in name.lower() and ".py" in " ".join(cmdline).lower():
+        return "python"
+    return None
+
+
+def matlab_or(classify):
+    """สร้างตัวจำแนกที่แยก MATLAB ออกก่อน แล้วส่งโปรเซสที่เหลือให้ classify"""
+    def inner(proc, name, cmdline):
+        if "matlab" in name.lower():
+            return "matlab"
+        return classify(proc, name, cmdline)
+    return inner
+
+
+class ProcessIndex:
+    """
+    ดัชนีโปรเซสแบบ incremental สำหรับการตรวจจับ training process
+    - แต่ละ scan ใช้ psutil.pids() (อ่าน directory เดียว) แล้วอ่าน name/cmdline เฉพาะ PID ที่เพิ่งเกิด
+    - จำผลไว้ตาม (pid, create_time) รวมถึงโปรเซสที่ไม่ผ่านเงื่อนไข จึงไม่ต้องอ่าน cmdline ซ้ำ
+    - โปรเซสที่อายุน้อยกว่า recheck_age วินาทีจะถูกตรวจซ้ำ (เช่น shell ที่กำลัง exec เป็น python)
+    - candidate ถูกตรวจตัวตนอีกครั้งด้วย create_time ก่อนคืนค่า (กัน PID ถูกนำกลับมาใช้)
+    """
+
+    def __init__(self, classify=python_script, recheck_age=2.0, exclude=None):
+        self.classify = classify
+        self.recheck_age = recheck_age
+        self.exclude = set(exclude) if exclude is not None else {os.getpid()}
+        self.entries = {}
+        self.young = set()
+        self.scans = 0
+        self.total_time = 0.0
+        self.last_scan = None
+
+    def _inspect(self, pid):
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                name = proc.name()
+                create_time = proc.create_time()
+                try:
+                    cmdline = proc.cmdline()
+                except psutil.AccessDenied:
+                    cmdline = []
+        except psutil.Error:
+            self.entries.pop(pid, None)
+            return None
+        label = self.classify(proc, name, cmdline)
+        entry = Entry(pid, create_time, label, proc, name, " ".join(cmdline))
+        self.entries[pid] = entry
+        if label is None and time.time() - create_time < self.recheck_age:
+            self.young.add(pid)
+        else:
+            self.young.discard(pid)
+        return entry
+
+    def scan(self):
+        """อัปเดตดัชนีแล้วคืน ScanStats"""
+        start = time.perf_counter()
+        pids = set(psutil.pids())
+        for gone in self.entries.keys() - pids:
+            del self.entries[gone]
+        self.young &= pids
+
+        todo = (pids - self.entries.keys() - self.exclude) | self.young
+        for pid in todo:
+            self._inspect(pid)
+
+        candidates = sum(1 for e in self.entries.values() if e.label is not None)
+        duration = time.perf_counter() - start
+        self.scans += 1
+        self.total_time += duration
+        self.last_scan = ScanStats(duration, len(pids), len(todo), candidates)
+        return self.last_scan
+
+    def candidates(self, label=None):
+        """candidate ที่ยังมีชีวิตอยู่ เรียงตาม PID ; label=None คืนทุกประเภท"""
+        found = []
+        for pid in sorted(self.entries):
+            entry = self.entries[pid]
+            if entry.label is None or (label is not None and entry.label != label):
+                continue
+            try:
+                # zombie (จบแล้วแต่ parent ยังไม่ reap) ยัง is_running() เป็น True
+                gone = not entry.proc.is_running() or entry.proc.status() == psutil.STATUS_ZOMBIE
+            except psutil.Error:
+                gone = True
+            if gone:
+                del self.entries[pid]
+                continue
+            found.append(entry)
+        return found
+
+    def find(self, label=None):
+        """scan แล้วคืน candidate ตัวแรก (หรือ None)"""
+        self.scan()
+        found = self.candidates(label)
+        return found[0] if found else None
+
+    def summary(self):
+        if not self.scans:
+            return "no scans yet"
+        last = self.last_scan
+        return (f"{self.scans} scans, avg {self.total_time / self.scans * 1000:.2f} ms, "
+                f"last {last.duration * 1000:.2f} ms ({last.inspected} inspected / {last.processes} processes)")
@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class MinMaxBins:
+    """
+    ลดจำนวนจุดของกราฟแบบ min/max binning โดยผูกจำนวน bin กับความกว้างของกราฟ (pixel)
+    - แต่ละ bin เก็บค่าต่ำสุด/สูงสุดพร้อมตำแหน่ง x ของมัน ทำให้ peak ไม่หายไปจากกราฟ
+    - เพิ่มข้อมูลทีละชุดได้ (incremental) ไม่ต้องคำนวณใหม่จากข้อมูลทั้งหมด
+    - เมื่อ x เกินช่วงที่ครอบคลุม จะขยายช่วงเป็น 2 เท่าแล้วรวม bin ที่ติดกันทีละคู่
+    ทำให้จำนวนจุดที่ต้องวาดคงที่ (ไม่เกิน 2 * n_bins) ไม่ว่าข้อมูลจะมีกี่ล้านจุด
+    """
+
+    def __init__(self, n_bins, span=1.0, origin=0.0):
+        n_bins = max(2, int(n_bins))
+        self.n_bins = n_bins + (n_bins % 2)  # ต้องเป็นเลขคู่เพื่อรวมทีละคู่ได้
+        self.span = float(span)
+        self.origin = float(origin)
+        self.clear()
+
+    def clear(self):
+        n = self.n_bins
+        self.lo = np.full(n, np.inf)
+        self.lo_x = np.zeros(n)
+        self.hi = np.full(n, -np.inf)
+        self.hi_x = np.zeros(n)
+
+    def _grow(self, x_max):
+        while x_max >= self.origin + self.span:
+            half = self.n_bins // 2
+            rows = np.arange(half)
+            lo = self.lo.reshape(half, 2)
+            hi = self.hi.reshape(half, 2)
+            take_lo = np.argmin(lo, axis=1)
+            take_hi = np.argmax(hi, axis=1)
+            new_lo, new_lo_x = lo[rows, take_lo], self.lo_x.reshape(half, 2)[rows, take_lo]
+            new_hi, new_hi_x = hi[rows, take_hi], self.hi_x.reshape(half, 2)[rows, take_hi]
+            self.clear()
+            self.lo[:half], self.lo_x[:half] = new_lo, new_lo_x
+            self.hi[:half], self.hi_x[:half] = new_hi, new_hi_x
+            self.span *= 2
+
+    def add(self, x, y):
+        """เพิ่มจุดชุดใหม่ (x ต้องไม่น้อยกว่า origin)"""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if not len(x):
+            return
+        self._grow(x.max())
+        idx = ((x - self.origin) * (self.n_bins / self.span)).astype(np.intp)
+        np.clip(idx, 0, self.n_bins - 1, out=idx)
+
+        # เรียงตาม (bin, y) แล้วหยิบตัวแรก/ตัวสุดท้ายของแต่ละ bin = min/max
+        order = np.lexsort((y, idx))
+        idx_sorted = idx[order]
+        starts = np.flatnonzero(np.r_[True, idx_sorted[1:] != idx_sorted[:-1]])
+        ends = np.r_[starts[1:], len(order)] - 1
+        bins = idx_sorted[starts]
+        first, last = order[starts], order[ends]
+
+        better = y[first] < self.lo[bins]
+        self.lo[bins[better]] = y[first][better]
+        self.lo_x[bins[better]] = x[first][better]
+        better = y[last] > self.hi[bins]
+        self.hi[bins[better]] = y[last][better]
+        self.hi_x[bins[better]] = x[last][better]
+
+    def points(self):
+        """คืน (xs, ys) สำหรับวาดเส้น: 2 จุดต่อ bin เรียงตาม x"""
+        filled = np.isfinite(self.lo)
+        lo_first = self.lo_x <= self.hi_x
+        xs = np.column_stack((np.where(lo_first, self.lo_x, self.hi_x), np.where(lo_first, self.hi_x, self.lo_x)))
+        ys = np.column_stack((np.where(lo_first, self.lo, self.hi), np.where(lo_first, self.hi, self.lo)))
+        return xs[filled].ravel(), ys[filled].ravel()
+
+    def max(self):
+        filled = np.isfinite(self.hi)
+        return float(self.hi[filled].max()) if filled.any() else 0.0
+
+
+def minmax_downsample(x, y, n_bins, x0, x1):
+    """ลดจุดเฉพาะช่วง [x0, x1] (ใช้ตอนผู้ใช้ซูมกราฟ) ; x ต้องเรียงจากน้อยไปมาก"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    start, stop = np.searchsorted(x, [x0, x1])
+    start, stop = max(0, start - 1), min(len(x), stop + 1)  # เก็บจุดนอกขอบไว้ให้เส้นต่อเนื่อง
+    if stop - start <= 2 * n_bins:
+        return x[start:stop], y[start:stop]
+    bins = MinMaxBins(n_bins, span=max(x[stop - 1] - x[start], 1e-9) * (1 + 1e-9), origin=x[start])
+    bins.add(x[start:stop], y[start:stop])
+    return bins.points()
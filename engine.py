@@ -0,0 +1,147 @@
+"""
+engine สำหรับเก็บตัวอย่างแบบ asyncio (ไม่มี thread ต่อ target)
+
+    async for sample in monitor(pid, 0.5):
+        print(sample.time, sample.cpu, sample.ram)
+
+- การรอ deadline ใช้ asyncio.sleep ตาม DeadlineScheduler จึงไม่บล็อก event loop
+  หลาย target / หลาย consumer ทำงานบน loop เดียวกันได้
+- การอ่านแต่ละครั้งเป็น syscall สั้น ๆ (หลัก µs กับ ProcStatSampler) จึงทำบน loop โดยตรง
+- Fanout แจกข้อมูลชุดเดียวให้หลาย consumer ; แต่ละตัวมีคิวขนาดจำกัดของตัวเอง (ดู Subscription)
+"""
+import asyncio
+import psutil
+from collections import namedtuple
+from scheduler import DeadlineScheduler
+from sampler import create_sampler
+from instrument import STATS, clock
+
+
+class Reading(namedtuple("Reading", ["pid", "tick", "cpu", "ram", "extra"])):
+    """ตัวอย่างหนึ่งครั้งของ target หนึ่งตัว ; extra = ค่า metric เพิ่มเติมตามลำดับที่เปิดใช้"""
+
+    __slots__ = ()
+
+    @property
+    def time(self):
+        return self.tick.time
+
+    @property
+    def interval(self):
+        return self.tick.interval
+
+    @property
+    def row(self):
+        """แถวรูปแบบเดียวกับ session log / SampleStore: (time, cpu, ram, interval, *extra)"""
+        return (self.tick.time, self.cpu, self.ram, self.tick.interval) + self.extra
+
+
+async def next_tick(scheduler):
+    """รอ deadline ถัดไปของ DeadlineScheduler โดยไม่บล็อก event loop"""
+    delay = scheduler.delay()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    return scheduler.fire()
+
+
+async def monitor(target, rate, metrics=(), tree=False, scheduler=None):
+    """
+    async generator ของ Reading ทุก rate วินาทีจนโปรเซสจบ
+    - target = PID (สร้าง sampler ด้วย create_sampler และปิดเมื่อจบ) หรือ sampler ที่สร้างไว้แล้ว
+    - scheduler = DeadlineScheduler ของผู้เรียก (ใช้แทน rate) เมื่อต้องเปลี่ยน interval ระหว่างทำงาน
+      หรืออ่าน missed / expected_samples() หลังจบ (เช่น GUI)
+    - ผู้ใช้หยุดก่อนได้ด้วย break (generator ถูกปิดและคืน fd ของ sampler)
+    """
+    owned = isinstance(target, int)
+    sampler = create_sampler(target, metrics, tree) if owned else target
+    if scheduler is None:
+        scheduler = DeadlineScheduler(rate)
+    try:
+        while True:
+            tick = await next_tick(scheduler)
+            t0 = clock()
+            try:
+                cpu, ram, _ = sampler.sample(tick.interval)
+            except psutil.Error:
+                return
+            STATS.record("sample", t0)
+            yield Reading(sampler.pid, tick, cpu, ram, sampler.extra)
+    finally:
+        if owned:
+            sampler.close()
+
+
+async def monitor_pool(pool, rate, scheduler=None):
+    """
+    async generator ของ (tick, rows, gone) ทุก rate วินาทีสำหรับทุก target ใน SamplerPool
+    ผู้ใช้เพิ่ม/ลบ target ระหว่างรอบได้ (อยู่บน loop เดียวกัน) ; จบเมื่อ pool ว่าง
+    scheduler = DeadlineScheduler ของผู้เรียก (ดู monitor)
+    """
+    if scheduler is None:
+        scheduler = DeadlineScheduler(rate)
+    while len(pool):
+        tick = await next_tick(scheduler)
+        t0 = clock()
+        rows, gone = pool.sample(tick)
+        STATS.record("sample", t0)
+        yield tick, rows, gone
+
+
+_END = object()
+
+
+class Subscription:
+    """
+    คิวของ consumer หนึ่งตัว (ใช้เป็น async iterator)
+    - wait=False (ค่าเริ่มต้น): เมื่อคิวเต็มจะทิ้งรายการเก่าสุดแล้วนับใน dropped
+      consumer ที่ช้า (เช่นหน้าจอ) จึงไม่ทำให้ producer ช้าตาม
+    - wait=True: producer รอจนคิวมีที่ (ไม่มีข้อมูลหาย เช่น ตัวเขียนไฟล์ session / exporter)
+    """
+
+    def __init__(self, maxsize=256, wait=False):
+        self.queue = asyncio.Queue(maxsize)
+        self.wait = wait
+        self.dropped = 0
+
+    async def offer(self, item):
+        if self.wait:
+            await self.queue.put(item)
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self.queue.get()
+        if item is _END:
+            raise StopAsyncIteration
+        return item
+
+
+class Fanout:
+    """แจกทุกรายการจาก producer หนึ่งตัวให้ทุก Subscription ; ปิดทุกคิวเมื่อ producer จบ"""
+
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self, maxsize=256, wait=False):
+        subscription = Subscription(maxsize, wait)
+        self.subscribers.append(subscription)
+        return subscription
+
+    async def publish(self, item):
+        for subscription in self.subscribers:
+            await subscription.offer(item)
+
+    async def pump(self, source):
+        """ส่งทุกรายการของ async iterator source แล้วปิดคิว (consumer ได้ StopAsyncIteration)"""
+        try:
+            async for item in source:
+                await self.publish(item)
+        finally:
+            for subscription in self.subscribers:
+                await subscription.offer(_END)
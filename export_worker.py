@@ -0,0 +1,116 @@
+import os
+from PyQt5.QtWidgets import (
+    QDialog, QFormLayout, QDateTimeEdit, QDoubleSpinBox, QDialogButtonBox,
+    QFileDialog, QProgressDialog
+)
+from PyQt5.QtCore import Qt, QThread, QDateTime, pyqtSignal
+from exporter import ExportCancelled, run_export, auto_resolution
+from session_log import SessionLog
+
+
+class ExportWorker(QThread):
+    """export ไฟล์ session บน background thread ; GUI รับความคืบหน้าผ่าน signal"""
+
+    progress = pyqtSignal(int)  # เปอร์เซ็นต์
+    succeeded = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, kind, path, log_path, start=None, end=None, resolution=None, parent=None):
+        super().__init__(parent)
+        self.kind = kind
+        self.path = path
+        self.log_path = log_path
+        self.start_time = start
+        self.end_time = end
+        self.resolution = resolution
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def report(self, done, total):
+        self.progress.emit(int(done * 100 / total) if total else 100)
+
+    def run(self):
+        try:
+            run_export(self.kind, self.path, SessionLog(self.log_path), self.start_time, self.end_time,
+                       self.resolution, progress=self.report, cancelled=lambda: self.cancelled)
+            self.succeeded.emit(self.path)
+        except ExportCancelled:
+            self.failed.emit("Export cancelled")
+        except Exception as e:
+            self.failed.emit(f"Export failed: {e}")
+
+
+class ExportOptionsDialog(QDialog):
+    """
+    เลือกช่วงเวลาและความละเอียดของข้อมูลก่อน export
+    ความละเอียดถูกเสนอให้อัตโนมัติตามช่วงที่เลือก (ดู exporter.auto_resolution) และแก้เองได้
+    """
+
+    def __init__(self, log, parent=None):
+        super().__init__(parent)
+        self.log = log
+        first, last = log.time_range()
+        self.setWindowTitle("Export Options")
+        self.start_edit = QDateTimeEdit(QDateTime.fromMSecsSinceEpoch(int(first * 1000)))
+        self.end_edit = QDateTimeEdit(QDateTime.fromMSecsSinceEpoch(int(last * 1000) + 1000))
+        for edit in (self.start_edit, self.end_edit):
+            edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+            edit.setCalendarPopup(True)
+        self.resolution_spinbox = QDoubleSpinBox()
+        self.resolution_spinbox.setRange(0.0, 86400.0)
+        self.resolution_spinbox.setSpecialValueText("Full resolution")
+        self.resolution_spinbox.setSuffix(" s")
+        self.suggest_resolution()
+        self.start_edit.dateTimeChanged.connect(self.suggest_resolution)
+        self.end_edit.dateTimeChanged.connect(self.suggest_resolution)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout = QFormLayout()
+        layout.addRow("From:", self.start_edit)
+        layout.addRow("To:", self.end_edit)
+        layout.addRow("Resolution:", self.resolution_spinbox)
+        layout.addRow(buttons)
+        self.setLayout(layout)
+
+    def suggest_resolution(self):
+        start, end, _ = self.options()
+        self.resolution_spinbox.setValue(auto_resolution(self.log, start, end) or 0.0)
+
+    def options(self):
+        """(start, end, resolution) ; resolution None = ทุกตัวอย่าง"""
+        start = self.start_edit.dateTime().toMSecsSinceEpoch() / 1000
+        end = self.end_edit.dateTime().toMSecsSinceEpoch() / 1000
+        return start, end, self.resolution_spinbox.value() or None
+
+
+def start_export(parent, log_path, kind, status_label):
+    """ถามชื่อไฟล์/ตัวเลือก แล้วเริ่ม export บน background thread พร้อม progress dialog ที่กดยกเลิกได้"""
+    if kind == "excel":
+        path, _ = QFileDialog.getSaveFileName(parent, "Save Excel File", "", "Excel Files (*.xlsx)")
+    else:
+        path, _ = QFileDialog.getSaveFileName(parent, "Save CSV File", "", "CSV Files (*.csv)")
+    if not path:
+        return
+    dialog = ExportOptionsDialog(SessionLog(log_path), parent=parent)
+    accepted = dialog.exec_() == QDialog.Accepted
+    options = dialog.options()
+    dialog.deleteLater()
+    if not accepted:
+        return
+
+    worker = ExportWorker(kind, path, log_path, *options, parent=parent)
+    progress = QProgressDialog(f"Exporting to {os.path.basename(path)}...", "Cancel", 0, 100, parent)
+    progress.setWindowModality(Qt.WindowModal)
+    progress.canceled.connect(worker.cancel)
+    worker.progress.connect(progress.setValue)
+    worker.succeeded.connect(lambda p: status_label.setText(f"{'Excel' if kind == 'excel' else 'CSV'} saved to {p}"))
+    worker.failed.connect(status_label.setText)
+    worker.finished.connect(progress.close)
+    worker.finished.connect(progress.deleteLater)
+    worker.finished.connect(worker.deleteLater)
+    status_label.setText(f"Exporting to {path}...")
+    worker.start()
@@ -0,0 +1,162 @@
+import csv
+import os
+from openpyxl import Workbook
+from session_log import format_timestamp
+from rollup import Accumulator, suggest_resolution
+from metrics import header, export_value
+from analytics import StreamAnalyzer
+from aggregate import window_stat, combine, MISSED
+
+HEADERS = ["Time", "CPU (%)", "RAM (MB)", "Interval (s)", "Source"]
+# หัวตารางเมื่อรวมข้อมูลตาม resolution: เก็บ min/max/last ไว้ด้วย peak จึงไม่หายไปกับค่าเฉลี่ย
+ROLLUP_HEADERS = ["Time", "CPU mean (%)", "CPU min (%)", "CPU max (%)", "CPU last (%)",
+                  "RAM mean (MB)", "RAM min (MB)", "RAM max (MB)", "RAM last (MB)", "Interval (s)", "Source"]
+EXCEL_MAX_ROWS = 1048576  # จำนวนแถวสูงสุดต่อ sheet ของ Excel
+AUTO_MAX_ROWS = 100000  # จำนวนแถวเป้าหมายเมื่อเลือก resolution อัตโนมัติ
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def auto_resolution(log, start=None, end=None, max_rows=AUTO_MAX_ROWS):
+    """เลือกชั้นของ rollup ที่ละเอียดที่สุดที่ช่วง [start, end] ได้ไม่เกิน max_rows แถว (None = ทุกตัวอย่าง)"""
+    first, last = log.time_range()
+    start = first if start is None else max(start, first)
+    end = last if end is None else min(end, last)
+    span = max(end - start, 0.0)
+    samples = len(log) * span / (last - first) if last > first else len(log)
+    return suggest_resolution(span, samples, max_rows)
+
+
+def export_headers(log, resolution=None):
+    """
+    หัวคอลัมน์ของ iter_export_rows: field เพิ่มเติมของ session และ Events อยู่ก่อน Source
+    (รวม bucket: metric เป็นค่าเฉลี่ย, สถิติต่อ window เช่น cpu_max รวมตามชนิดของมัน
+    และขึ้นต้นด้วย "Window" เพื่อไม่ให้ชื่อซ้ำกับ min/max ของ bucket ; Missed ticks เป็นผลรวมของ bucket)
+    """
+    base = ROLLUP_HEADERS if resolution else HEADERS
+    if resolution:
+        extra = [header(name) if name == MISSED else f"Window {header(name)}" if window_stat(name) else f"{header(name)} mean"
+                 for name in log.extra]
+    else:
+        extra = [header(name) for name in log.extra]
+    return base[:-1] + extra + ["Events"] + base[-1:]
+
+
+def iter_export_rows(log, start=None, end=None, resolution=None, progress=None, cancelled=None, every=10000):
+    """
+    อ่านแถวจากไฟล์ session แบบ stream สำหรับ export
+    - start/end (epoch) เลือกช่วงเวลา
+    - resolution (วินาที) รวมตัวอย่างเป็น bucket แบบเดียวกับ rollup.Tier (mean/min/max/last ตาม ROLLUP_HEADERS)
+      เวลาของแถวคือเวลาเริ่ม bucket ; metric เพิ่มเติมเป็นค่าเฉลี่ยของค่าที่อ่านได้ใน bucket
+      สถิติต่อ window ของ CLI (cpu_max, ram_p95 ...) รวมด้วย aggregate.combine (max ของ max, min ของ min ...)
+    - Events = event ของ analytics.StreamAnalyzer (memory growth, CPU stall, spike) ที่เกิดที่แถว/bucket นั้น
+      คำนวณใหม่จากทุก record ตั้งแต่ต้นไฟล์ ผลจึงตรงกับที่แสดงระหว่าง monitor
+    - progress(done, total) และ cancelled() ถูกเรียกทุก ๆ `every` record
+    """
+    source = log.source
+    total = len(log)
+    bucket, acc = None, Accumulator()
+    stats = [window_stat(name) for name in log.extra]  # None = metric (ค่าเฉลี่ย)
+
+    def empty_extra():
+        return [None if stat else 0.0 for stat in stats], [0] * len(stats)
+    extra_sum, extra_n = empty_extra()
+    analyzer = StreamAnalyzer(percentiles=False)
+    bucket_events = []
+
+    def rollup_row():
+        means = (s if stat else s / n if n else None for s, n, stat in zip(extra_sum, extra_n, stats))
+        return (format_timestamp(bucket * resolution), acc.cpu_sum / acc.n, acc.cpu_min, acc.cpu_max, acc.cpu_last,
+                acc.ram_sum / acc.n, acc.ram_min, acc.ram_max, acc.ram_last, acc.interval, *means,
+                "; ".join(bucket_events), source)
+    for done, (t, cpu, ram, interval, *extra) in enumerate(log.iter_records(), 1):
+        if done % every == 0:
+            if cancelled is not None and cancelled():
+                raise ExportCancelled()
+            if progress is not None:
+                progress(done, total)
+        if end is not None and t > end:
+            break
+        events = analyzer.add(t, cpu, ram)
+        if start is not None and t < start:
+            continue
+        if not resolution:
+            yield (format_timestamp(t), cpu, ram, interval, *map(export_value, extra),
+                   "; ".join(e.message for e in events), source)
+            continue
+        b = int(t // resolution)
+        if b != bucket:
+            if acc.n:
+                yield rollup_row()
+                acc.reset()
+                extra_sum, extra_n = empty_extra()
+                bucket_events.clear()
+            bucket = b
+        acc.add(cpu, ram, interval)
+        bucket_events.extend(e.message for e in events)
+        for i, value in enumerate(extra):
+            if value == value:  # ข้าม NaN (อ่านไม่ได้)
+                if stats[i]:
+                    extra_sum[i] = combine(stats[i], extra_sum[i], value)
+                else:
+                    extra_sum[i] += value
+                extra_n[i] += 1
+    if acc.n:
+        yield rollup_row()
+    if progress is not None:
+        progress(total, total)
+
+
+def footer(headers, source):
+    return [""] * (len(headers) - 1) + [f"Command/Source: {source}"]
+
+
+def export_csv(path, rows, source, headers=HEADERS, chunk=10000):
+    """เขียน CSV ทีละ chunk แถว (ใช้หน่วยความจำคงที่)"""
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk:
+                writer.writerows(batch)
+                batch.clear()
+        writer.writerows(batch)
+        writer.writerow(footer(headers, source))
+
+
+def export_excel(path, rows, source, headers=HEADERS):
+    """
+    เขียน Excel ด้วย openpyxl แบบ write-only (stream ลงไฟล์ ไม่เก็บทั้ง workbook ในหน่วยความจำ)
+    ถ้าเกินจำนวนแถวสูงสุดของ Excel จะขึ้น sheet ใหม่ต่อ
+    """
+    wb = Workbook(write_only=True)
+    sheets = 1
+    ws = wb.create_sheet("Monitoring_Log")
+    ws.append(headers)
+    used = 1
+    for row in rows:
+        if used >= EXCEL_MAX_ROWS - 1:
+            sheets += 1
+            ws = wb.create_sheet(f"Monitoring_Log_{sheets}")
+            ws.append(headers)
+            used = 1
+        ws.append(row)
+        used += 1
+    ws.append(footer(headers, source))
+    wb.save(path)
+
+
+def run_export(kind, path, log, start=None, end=None, resolution=None, progress=None, cancelled=None):
+    """export ไฟล์ session เป็น 'csv' หรือ 'excel' ; ถ้ายกเลิกหรือล้มเหลวกลางคันจะลบไฟล์ที่เขียนไม่เสร็จ"""
+    rows = iter_export_rows(log, start, end, resolution, progress, cancelled)
+    writer = export_excel if kind == "excel" else export_csv
+    try:
+        writer(path, rows, log.source, export_headers(log, resolution))
+    except BaseException:  # ยกเลิก, Ctrl+C, disk เต็ม, openpyxl ล้ม: ไม่ทิ้งไฟล์ครึ่ง ๆ ไว้
+        if os.path.exists(path):
+            os.remove(path)
+        raise
@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import select
+import struct
+import tempfile
+import threading
+import ctypes
+import ctypes.util
+
+# ไฟล์ handshake ที่ MATLAB สร้าง/ลบ ; ตำแหน่งเปลี่ยนได้ด้วย environment variable MONITOR_HANDSHAKE_DIR
+PID_FILE = "training_pid.txt"
+FLAG_FILE = "monitoring_flag.txt"
+HANDSHAKE_DIR = os.environ.get("MONITOR_HANDSHAKE_DIR") or (
+    "C:\\temp" if sys.platform == "win32" else tempfile.gettempdir())
+
+# ค่าคงที่ของ inotify (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def parse_pid(text):
+    """แปลงเนื้อหาไฟล์ PID เป็นตัวเลข ; None ถ้าไฟล์ไม่มีหรือยังเขียนไม่เสร็จ"""
+    try:
+        return int(text.strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+def _inotify():
+    """คืน libc ที่มี inotify หรือ None (ไม่ใช่ Linux / เรียกไม่ได้)"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """
+    เฝ้าไฟล์ใน directory เดียวบน background thread แล้วเก็บสถานะล่าสุดไว้ในหน่วยความจำ
+    - Linux ใช้ inotify บน directory (ไม่มี syscall เลยขณะไม่มีอะไรเปลี่ยน)
+    - ระบบอื่น (หรือ inotify ใช้ไม่ได้) ใช้ os.stat เทียบ mtime/size ทุก poll_interval วินาที
+      อ่านเนื้อหาไฟล์ใหม่เฉพาะเมื่อ stat เปลี่ยน
+    - ผู้ใช้อ่าน exists()/text() ได้ทุก tick โดยไม่แตะ filesystem
+    - wait(timeout) บล็อกจนมีไฟล์เปลี่ยนหรือหมดเวลา ใช้แทน time.sleep ในลูปรอ
+    - subscribe(callback) : callback(name, text) ถูกเรียกบน watcher thread ทันทีที่ไฟล์เปลี่ยน
+      text เป็น None เมื่อไฟล์ถูกลบ
+    """
+
+    def __init__(self, directory=HANDSHAKE_DIR, names=(PID_FILE, FLAG_FILE), poll_interval=0.5):
+        self.directory = directory
+        self.names = tuple(names)
+        self.poll_interval = poll_interval
+        self.state = {name: (None, None) for name in self.names}  # name -> (stat key, text)
+        self.callbacks = []
+        self.changed = threading.Event()
+        self.lock = threading.Lock()
+        self.backend = None
+        self.thread = None
+        self.running = False
+        self.fd = None
+        for name in self.names:
+            self._refresh(name, notify=False)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+
+    def exists(self, name):
+        return self.state[name][0] is not None
+
+    def text(self, name):
+        return self.state[name][1]
+
+    def wait(self, timeout=None):
+        """รอจนมีไฟล์เปลี่ยน (True) หรือหมดเวลา (False)"""
+        fired = self.changed.wait(timeout)
+        self.changed.clear()
+        return fired
+
+    def _refresh(self, name, notify=True):
+        path = self.path(name)
+        try:
+            st = os.stat(path)
+            key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            key = None
+        with self.lock:
+            if key == self.state[name][0]:
+                return
+            text = None
+            if key is not None:
+                try:
+                    with open(path, "r") as f:
+                        text = f.read()
+                except OSError:
+                    key = None
+            self.state[name] = (key, text)
+        if notify:
+            self.changed.set()
+            for callback in self.callbacks:
+                callback(name, text)
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        libc = _inotify()
+        if libc is not None and os.path.isdir(self.directory):
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(fd, os.fsencode(self.directory), WATCH_MASK) >= 0:
+                self.fd = fd
+                self.backend = "inotify"
+            elif fd >= 0:
+                os.close(fd)
+        if self.backend is None:
+            self.backend = "stat"
+        target = self._run_inotify if self.backend == "inotify" else self._run_stat
+        self.thread = threading.Thread(target=target, name="FileWatcher", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self.backend = None
+
+    def _run_stat(self):
+        while self.running:
+            for name in self.names:
+                self._refresh(name)
+            time.sleep(self.poll_interval)
+
+    def _run_inotify(self):
+        # timeout ของ select ใช้เพื่อเช็ค self.running เท่านั้น ไม่ได้ stat ไฟล์
+        while self.running:
+            ready, _, _ = select.select([self.fd], [], [], 0.5)
+            if not ready:
+                continue
+            try:
+                buf = os.read(self.fd, 4096)
+            except BlockingIOError:
+                continue
+            touched = set()
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(buf):
+                _, mask, _, length = EVENT_HEADER.unpack_from(buf, offset)
+                offset += EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    touched.update(self.names)
+                elif name in self.state:
+                    touched.add(name)
+            for name in touched:
+                self._refresh(name)
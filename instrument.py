@@ -0,0 +1,152 @@
+import time
+import psutil
+from sampler import cpu_seconds, MB
+
+clock = time.perf_counter_ns
+
+SUB_BUCKETS = 4  # bucket ต่อช่วงกำลังสอง (ความคลาดเคลื่อนของ percentile ไม่เกิน ~12%)
+N_BUCKETS = 4 * 40  # ครอบคลุมถึง ~2^41 ns (ประมาณ 36 นาที)
+
+
+def bucket_index(ns):
+    """ตำแหน่ง bucket แบบ log-linear: 4 bucket ต่อช่วง [2^k, 2^(k+1))"""
+    if ns < 4:
+        return max(ns, 0)
+    b = ns.bit_length()
+    return min(SUB_BUCKETS * (b - 2) + ((ns >> (b - 3)) & 3), N_BUCKETS - 1)
+
+
+def bucket_bounds(idx):
+    """(ค่าต่ำสุด, ค่าสูงสุด) ns ของ bucket"""
+    if idx < 4:
+        return idx, idx + 1
+    b, sub = idx // SUB_BUCKETS + 2, idx % SUB_BUCKETS
+    low = (4 + sub) << (b - 3)
+    return low, low + (1 << (b - 3))
+
+
+class LatencyHistogram:
+    """
+    histogram ของเวลาที่ใช้ (ns) แบบ rolling window
+    - เพิ่มค่าเป็น O(1): หา bucket ด้วย bit_length ไม่มีการเรียง/เก็บค่าดิบ
+    - เก็บ 2 ช่วง (ปัจจุบัน + ก่อนหน้า) หมุนทุก window วินาที ผลจึงครอบคลุม window ถึง 2*window วินาทีล่าสุด
+    """
+
+    def __init__(self, window=60.0):
+        self.window_ns = int(window * 1e9)
+        self.current = [0] * N_BUCKETS
+        self.previous = [0] * N_BUCKETS
+        self.current_max = self.previous_max = 0
+        self.started = clock()
+        self.rotate_at = self.started + self.window_ns
+        self.total = 0  # จำนวนครั้งทั้งหมดตั้งแต่เริ่ม
+        self.total_ns = 0
+
+    def add(self, ns, now):
+        if now >= self.rotate_at:
+            if now >= self.rotate_at + self.window_ns:  # ว่างนานเกิน 2 window: ช่วงก่อนหน้าไม่มีข้อมูล
+                self.current, self.current_max = [0] * N_BUCKETS, 0
+                self.rotate_at = now
+            self.previous, self.previous_max = self.current, self.current_max
+            self.current, self.current_max = [0] * N_BUCKETS, 0
+            self.started = self.rotate_at - self.window_ns
+            self.rotate_at = now + self.window_ns
+        self.current[bucket_index(ns)] += 1
+        if ns > self.current_max:
+            self.current_max = ns
+        self.total += 1
+        self.total_ns += ns
+
+    def counts(self):
+        return [a + b for a, b in zip(self.current, self.previous)]
+
+    def percentile(self, q, counts=None):
+        """percentile (ns) ประมาณจากจุดกึ่งกลางของ bucket ; ไม่มีข้อมูลคืน None"""
+        counts = counts or self.counts()
+        n = sum(counts)
+        if not n:
+            return None
+        rank = q / 100 * n
+        seen = 0
+        for idx, c in enumerate(counts):
+            seen += c
+            if c and seen >= rank:
+                low, high = bucket_bounds(idx)
+                return (low + high) / 2
+        return None
+
+    def stats(self):
+        """(จำนวนใน window, ครั้ง/วินาที, p50, p95, p99, max) เวลาเป็น ns"""
+        counts = self.counts()
+        n = sum(counts)
+        span = max((clock() - self.started) / 1e9, 1e-9)
+        worst = max(self.current_max, self.previous_max)
+        # จุดกึ่งกลาง bucket อาจเกินค่าสูงสุดจริง: จำกัดไว้ไม่ให้ p99 > max
+        p50, p95, p99 = (None if p is None else min(p, worst)
+                         for p in (self.percentile(q, counts) for q in (50, 95, 99)))
+        return n, n / span, p50, p95, p99, worst
+
+
+class SelfCost:
+    """CPU (% ของหนึ่ง core) และ RSS ของโปรเซส monitor เอง คิดจากช่วงระหว่างการเรียก read() ติดกัน"""
+
+    def __init__(self):
+        self.proc = psutil.Process()
+        self.last_time = time.monotonic()
+        self.last_cpu = cpu_seconds(self.proc.cpu_times())
+
+    def read(self):
+        with self.proc.oneshot():
+            cpu_time = cpu_seconds(self.proc.cpu_times())
+            rss = self.proc.memory_info().rss
+            threads = self.proc.num_threads()
+        now = time.monotonic()
+        elapsed = now - self.last_time
+        cpu = (cpu_time - self.last_cpu) / elapsed * 100 if elapsed > 0 else 0.0
+        self.last_time, self.last_cpu = now, cpu_time
+        return cpu, rss / MB, threads
+
+
+class Instruments:
+    """
+    ตัวจับเวลาของ hot path (detect, sample, buffer, flush, table, plot ...)
+    ใช้แบบ
+        t0 = clock()
+        ...
+        STATS.record("sample", t0)
+    แต่ละชื่อมี LatencyHistogram ของตัวเอง ; ต้นทุนต่อครั้งประมาณ 1 µs
+    """
+
+    def __init__(self, window=60.0):
+        self.window = window
+        self.histograms = {}
+        self.self_cost = SelfCost()
+
+    def record(self, name, start):
+        now = clock()
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms.setdefault(name, LatencyHistogram(self.window))
+        hist.add(now - start, now)
+
+    def report(self):
+        """list ของ (ชื่อ, จำนวน, ครั้ง/วินาที, p50, p95, p99, max) เวลาเป็น ms เรียงตามชื่อ"""
+        rows = []
+        for name in sorted(self.histograms):
+            n, rate, *times = self.histograms[name].stats()
+            rows.append((name, n, rate, *[t / 1e6 if t is not None else None for t in times]))
+        return rows
+
+    def format_report(self):
+        """ข้อความตารางสำหรับแสดงใน GUI / CLI"""
+        cpu, rss, threads = self.self_cost.read()
+        lines = [f"Monitor process: CPU {cpu:.1f}% of one core, RSS {rss:.1f} MB, {threads} threads",
+                 f"Latency over the last {self.window:g}-{2 * self.window:g} s (ms):",
+                 f"{'stage':<14} {'count':>8} {'per s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+        for name, n, rate, p50, p95, p99, worst in self.report():
+            cells = " ".join(f"{v:>9.3f}" if v is not None else f"{'-':>9}" for v in (p50, p95, p99, worst))
+            lines.append(f"{name:<14} {n:>8} {rate:>8.1f} {cells}")
+        return "\n".join(lines)
+
+
+STATS = Instruments()  # ตัวเดียวต่อโปรเซส ใช้ร่วมกันทุกโมดูล
@@ -0,0 +1,153 @@
+import os
+import re
+import json
+import time
+import psutil
+from collections import deque
+
+MATCHER_CONFIG = "matcher.json"
+MB = 1024 * 1024
+
+# กฎเริ่มต้น: Python ที่รันไฟล์ .py แต่ไม่ใช่ language server / Jupyter kernel / debugger / pip
+DEFAULT_RULES = {
+    "label": "python",
+    "include": {
+        "name": [r"python"],
+        "cmdline": [r"\.py\b"],
+    },
+    "exclude": {
+        "cmdline": [
+            r"language[_-]?server", r"pylsp", r"pyright", r"jedi", r"pylance",
+            r"ipykernel", r"jupyter", r"debugpy", r"pydevd",
+            r"\bpip\b", r"setup\.py", r"site-packages[/\\](black|flake8|mypy|pylint)",
+        ],
+    },
+}
+FIELDS = ("name", "cmdline", "user", "cwd")
+
+
+class MatchRules:
+    """
+    กฎเลือก training process แบบ include/exclude regex บน name, cmdline, user, cwd
+    - regex ถูก compile ครั้งเดียวตอนสร้าง (รวมหลาย pattern เป็น regex เดียวต่อ field)
+    - user/cwd อ่านจากโปรเซสเฉพาะเมื่อมีกฎของ field นั้น (เป็น syscall เพิ่ม)
+    - ทุก pattern ใน include ต้องตรงอย่างน้อยหนึ่งตัวต่อ field ; ถ้าตรง exclude ตัวใดตัวหนึ่งจะถูกตัดทิ้ง
+    ไฟล์ตั้งค่า (matcher.json) มีรูปแบบเดียวกับ DEFAULT_RULES
+    """
+
+    def __init__(self, config=DEFAULT_RULES):
+        self.label = config.get("label", "python")
+        self.include = self._compile(config.get("include", {}))
+        self.exclude = self._compile(config.get("exclude", {}))
+        self.rejections = deque(maxlen=20)  # (pid, name, เหตุผล) ของโปรเซสที่ถูกตัดล่าสุด
+
+    @staticmethod
+    def _compile(section):
+        compiled = {}
+        for field, patterns in section.items():
+            if field not in FIELDS:
+                raise ValueError(f"unknown match field: {field}")
+            if patterns:
+                compiled[field] = re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+        return compiled
+
+    @classmethod
+    def load(cls, path=MATCHER_CONFIG):
+        """โหลดกฎจากไฟล์ JSON ถ้ามี ไม่เช่นนั้นใช้กฎเริ่มต้น"""
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f))
+        return cls()
+
+    @staticmethod
+    def _field(proc, field, name, cmdline):
+        if field == "name":
+            return name
+        if field == "cmdline":
+            return cmdline
+        try:
+            return proc.username() if field == "user" else proc.cwd()
+        except psutil.Error:
+            return ""
+
+    def classify(self, proc, name, cmdline):
+        """ใช้เป็นตัวจำแนกของ discovery.ProcessIndex: คืน label หรือ None"""
+        cmdline = " ".join(cmdline)
+        values = {}
+        for field, regex in self.include.items():
+            values[field] = self._field(proc, field, name, cmdline)
+            if not regex.search(values[field]):
+                return None
+        for field, regex in self.exclude.items():
+            value = values[field] if field in values else self._field(proc, field, name, cmdline)
+            m = regex.search(value)
+            if m:
+                self.rejections.append((proc.pid, name, f"{field} matches /{m.group(0)}/"))
+                return None
+        return self.label
+
+
+class CandidateRanker:
+    """
+    จัดอันดับ candidate ด้วยการใช้ CPU ต่อเนื่องและ RSS ในช่วงสังเกต window วินาที
+    - score = CPU (% ของทั้งเครื่อง เฉลี่ยตลอด window) + RSS (% ของ RAM ทั้งเครื่อง)
+    - ตัดสินใจเมื่อสังเกต candidate อย่างน้อย 1 ตัวครบ window แล้วเท่านั้น
+    - อ่านเพียง cpu_times + memory_info ของ candidate (ไม่กี่ตัว) ต่อรอบ จึงเรียกได้ทุก tick
+    """
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self.cpu_count = psutil.cpu_count() or 1
+        self.total_ram = psutil.virtual_memory().total
+        self.history = {}  # pid -> deque ของ (monotonic, cpu วินาที, rss)
+
+    def observe(self, entries):
+        now = time.monotonic()
+        alive = set()
+        for entry in entries:
+            try:
+                with entry.proc.oneshot():
+                    times = entry.proc.cpu_times()
+                    rss = entry.proc.memory_info().rss
+            except psutil.Error:
+                continue
+            alive.add(entry.pid)
+            h = self.history.setdefault(entry.pid, deque())
+            h.append((now, times.user + times.system, rss))
+            while len(h) > 2 and now - h[1][0] >= self.window:
+                h.popleft()
+        for pid in self.history.keys() - alive:
+            del self.history[pid]
+
+    def stats(self, pid):
+        """(cpu %, rss MB, ระยะเวลาที่สังเกต) ของ candidate"""
+        h = self.history.get(pid)
+        if not h:
+            return 0.0, 0.0, 0.0
+        (t0, c0, _), (t1, c1, rss) = h[0], h[-1]
+        span = t1 - t0
+        cpu = (c1 - c0) / span * 100 / self.cpu_count if span > 0 else 0.0
+        return cpu, rss / MB, span
+
+    def pick(self, entries):
+        """
+        สังเกตรอบนี้แล้วคืน (entry ที่ดีที่สุด, เหตุผล)
+        ถ้ายังสังเกตไม่ครบ window คืน (None, เหตุผล)
+        """
+        if not entries:
+            return None, "no candidates"
+        self.observe(entries)
+        scored = []
+        for entry in entries:
+            cpu, rss, span = self.stats(entry.pid)
+            score = cpu + rss * MB / self.total_ram * 100
+            scored.append((score, cpu, rss, span, entry))
+        if max(s[3] for s in scored) < self.window:
+            return None, f"observing {len(entries)} candidate(s)"
+        scored.sort(key=lambda s: s[0], reverse=True)
+        score, cpu, rss, span, best = scored[0]
+        reason = f"PID {best.pid} {best.name}: CPU {cpu:.1f}% RSS {rss:.0f} MB over {span:.1f}s (score {score:.1f})"
+        others = [f"PID {e.pid} score {s:.1f}" for s, _, _, _, e in scored[1:4]]
+        if others:
+            reason += "; beat " + ", ".join(others)
+        return best, reason
@@ -0,0 +1,153 @@
+import math
+import psutil
+from collections import namedtuple
+from operator import methodcaller
+from aggregate import window_header, MISSED
+
+MB = 1024 * 1024
+SLOW_INTERVAL = 5.0  # วินาทีระหว่างการอ่าน metric ที่แพง (memory_full_info อ่าน smaps ทั้งไฟล์)
+
+
+def open_handles(proc):
+    """จำนวน file descriptor (POSIX) / handle (Windows) ที่เปิดอยู่ ; ถูกกว่า open_files() มาก"""
+    if hasattr(proc, "num_fds"):
+        return proc.num_fds()
+    return proc.num_handles()
+
+
+def page_faults(proc):
+    """
+    (page fault ทั้งหมด, major fault) สะสม จาก memory_info() ซึ่งอยู่ใน oneshot() เดียวกับ RSS (Windows/macOS)
+    Linux: psutil ไม่มีค่านี้ ; ProcStatSampler ให้ค่าจากไฟล์ stat ที่อ่านแล้วใน tick นั้นแทน (MetricCollector.provide)
+    ระบบ/backend ที่ไม่มีค่าคืน NaN
+    """
+    info = proc.memory_info()
+    if hasattr(info, "pfaults"):  # macOS
+        return info.pfaults, info.pageins
+    if hasattr(info, "num_page_faults"):  # Windows (ไม่แยก major)
+        return info.num_page_faults, math.nan
+    return math.nan, math.nan
+
+
+# metric หนึ่งตัว
+# name   = ชื่อคอลัมน์ใน session log / store / Prometheus
+# header = หัวตาราง/หัวคอลัมน์ export
+# call   = ฟังก์ชัน (proc) -> ค่าดิบ ; metric ที่ใช้ call เดียวกันถูกอ่านครั้งเดียวต่อ tick
+# value  = ดึงค่าของ metric จากค่าดิบ
+# rate   = True ถ้าค่าดิบเป็น counter สะสม (แสดงเป็นต่อวินาที)
+# slow   = True ถ้าแพง: อ่านทุก SLOW_INTERVAL วินาที ระหว่างนั้นใช้ค่าล่าสุด
+# fmt    = รูปแบบตัวเลขในตาราง
+Metric = namedtuple("Metric", ["name", "header", "call", "value", "rate", "slow", "fmt"])
+
+io_counters = methodcaller("io_counters")
+memory_full_info = methodcaller("memory_full_info")
+
+METRICS = {m.name: m for m in (
+    Metric("io_read", "Read (MB/s)", io_counters, lambda c: c.read_bytes / MB, True, False, ".2f"),
+    Metric("io_write", "Write (MB/s)", io_counters, lambda c: c.write_bytes / MB, True, False, ".2f"),
+    Metric("threads", "Threads", methodcaller("num_threads"), lambda n: n, False, False, ".0f"),
+    Metric("ctx_switches", "Ctx switches (/s)", methodcaller("num_ctx_switches"),
+           lambda c: c.voluntary + c.involuntary, True, False, ".0f"),
+    Metric("open_files", "Open files", open_handles, lambda n: n, False, False, ".0f"),
+    Metric("page_faults", "Page faults (/s)", page_faults, lambda f: f[0], True, False, ".0f"),
+    Metric("major_faults", "Major faults (/s)", page_faults, lambda f: f[1], True, False, ".0f"),
+    Metric("uss", "USS (MB)", memory_full_info, lambda m: m.uss / MB, False, True, ".2f"),
+    Metric("pss", "PSS (MB)", memory_full_info, lambda m: m.pss / MB, False, True, ".2f"),
+    Metric("affinity", "CPU affinity (cores)", methodcaller("cpu_affinity"), len, False, False, ".0f"),
+)}
+
+
+def parse_metrics(text):
+    """ข้อความ "io_read,threads" / "all" / "" เป็น tuple ของชื่อ metric ; ชื่อที่ไม่รู้จักโยน ValueError"""
+    text = (text or "").strip()
+    if text == "all":
+        return tuple(METRICS)
+    names = tuple(n.strip() for n in text.split(",") if n.strip())
+    unknown = [n for n in names if n not in METRICS]
+    if unknown:
+        raise ValueError(f"unknown metric(s) {', '.join(unknown)}; choose from {', '.join(METRICS)}")
+    return names
+
+
+def header(name):
+    """หัวคอลัมน์ของชื่อ field (สถิติต่อ window เช่น cpu_max ดู aggregate.py ; ชื่ออื่นที่ไม่อยู่ใน registry ใช้ชื่อเดิม)"""
+    metric = METRICS.get(name)
+    if metric:
+        return metric.header
+    return window_header(name) or name
+
+
+def format_value(name, value):
+    """แปลงค่าเป็นข้อความตาม fmt ของ metric (field อื่นใช้ .2f) ; ค่าที่อ่านไม่ได้ (NaN) แสดงเป็น -"""
+    if value is None or value != value:
+        return "-"
+    metric = METRICS.get(name)
+    return format(value, metric.fmt if metric else ".0f" if name == MISSED else ".2f")
+
+
+def export_value(value):
+    """ค่าสำหรับ CSV/Excel: NaN (อ่านไม่ได้บนระบบนี้) เป็นช่องว่าง"""
+    return None if value != value else value
+
+
+class MetricCollector:
+    """
+    อ่าน metric ที่เปิดใช้ของโปรเซสหนึ่งตัว (เรียกภายใน proc.oneshot() ของ sampler)
+    - metric ที่ใช้ call เดียวกัน (เช่น io_read/io_write) อ่านครั้งเดียว
+    - counter สะสมถูกแปลงเป็นต่อวินาทีด้วยเวลาจริงตั้งแต่การอ่านครั้งก่อนของ call นั้น
+    - call ที่ slow อ่านทุก slow_interval วินาที
+    - ค่าที่อ่านไม่ได้บนระบบนี้ (ไม่มี API / AccessDenied) เป็น NaN ; NoSuchProcess ถูกโยนต่อ
+    """
+
+    def __init__(self, names, slow_interval=SLOW_INTERVAL):
+        self.names = tuple(names)
+        self.slow_interval = slow_interval
+        self.values = [math.nan] * len(self.names)
+        self.groups = {}  # call -> list ของ (ตำแหน่งใน values, Metric)
+        for i, name in enumerate(self.names):
+            metric = METRICS[name]
+            self.groups.setdefault(metric.call, []).append((i, metric))
+        self.slow = {call for call, members in self.groups.items() if any(m.slow for _, m in members)}
+        self.elapsed = dict.fromkeys(self.groups, 0.0)  # เวลาตั้งแต่อ่าน call นั้นครั้งล่าสุด
+        self.last_raw = [None] * len(self.names)
+        self.sources = {}  # call -> ฟังก์ชันที่ sampler ให้มาแทน (ดู provide)
+        self.first = True
+
+    def provide(self, call, source, proc):
+        """
+        ใช้ source(proc) แทน call (เช่น ค่าที่ sampler อ่านไว้แล้วใน tick นั้น ไม่ต้องอ่านซ้ำ)
+        แล้วตั้งค่าตั้งต้นของ counter จาก source ใหม่ ; call ที่ไม่ได้เปิดใช้ไม่มีผล
+        """
+        if call not in self.groups:
+            return
+        self.sources[call] = source
+        raw = source(proc)
+        for i, metric in self.groups[call]:
+            if metric.rate:
+                self.last_raw[i] = metric.value(raw)
+
+    def read(self, proc, interval):
+        """คืน tuple ของค่าตามลำดับ self.names"""
+        for call, members in self.groups.items():
+            elapsed = self.elapsed[call] + interval
+            if call in self.slow and not self.first and elapsed < self.slow_interval:
+                self.elapsed[call] = elapsed
+                continue
+            self.elapsed[call] = 0.0
+            try:
+                raw = self.sources.get(call, call)(proc)
+            except psutil.NoSuchProcess:
+                raise
+            except (psutil.AccessDenied, AttributeError):
+                continue  # ค่าคงเป็น NaN
+            for i, metric in members:
+                try:
+                    value = metric.value(raw)
+                except AttributeError:  # field ที่ไม่มีบนระบบนี้ (เช่น pss นอก Linux)
+                    continue
+                if metric.rate:
+                    last, self.last_raw[i] = self.last_raw[i], value
+                    value = (value - last) / elapsed if last is not None and elapsed > 0 else math.nan
+                self.values[i] = value
+        self.first = False
+        return tuple(self.values)
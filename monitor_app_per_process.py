@@ -1,13 +1,21 @@
-import sys, psutil, time, threading, csv, os
-from datetime import datetime
+import sys, psutil, threading
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QLabel,
-    QFileDialog, QHBoxLayout, QDoubleSpinBox, QCheckBox,
-    QTableWidget, QTableWidgetItem
+    QHBoxLayout, QDoubleSpinBox, QCheckBox,
+    QTableView, QHeaderView
 )
 from PyQt5.QtGui import QPainter, QPen, QFont, QColor
 from PyQt5.QtCore import Qt, QRectF
-from openpyxl import Workbook
+from scheduler import DeadlineScheduler
+from sampler import ProcessSampler
+from table_model import SampleTableModel
+from pipeline import SampleChannel, ChannelPump
+from session_log import SessionLogWriter, session_path, format_timestamp
+from sample_store import SampleStore
+from discovery import ProcessIndex, matlab_or
+from matcher import MatchRules, CandidateRanker
+from filewatch import FileWatcher, FLAG_FILE
+from export_worker import start_export
 
 # หน้าครึ่งวงกลมแสดงค่า %/MB หรือค่าที่แปลงแล้วของ CPU/RAM
 class HalfCircleGauge(QWidget):
@@ -56,9 +64,19 @@ class MonitorApp(QWidget):
         #ตัวแปรควบคุมสถานะการ monitor
         self.monitoring = False
         self.training_source = "Manual"
-        self.training_pid = None
-        self.data = []
+        self.training_pid = None  # ตรึงไว้ตลอด session: ตรวจจับใหม่เฉพาะตอน idle
+        self.detect_reason = ""  # เหตุผลที่เลือก process (แสดงใน status)
+        self.store = SampleStore()  # เก็บข้อมูลแบบ columnar (ไม่เก็บเวลาเป็นข้อความ)
         self.sampling_rate = 1.0
+        self.scheduler = DeadlineScheduler(self.sampling_rate)  # ตั้งเวลาเก็บตัวอย่างตาม deadline
+        self.sampler = None  # ถือ handle ของ process ไว้ข้าม tick
+        self.auto_start = False  # สำเนาค่าจาก checkbox ให้ worker thread อ่าน
+        self.channel = SampleChannel()  # worker thread -> GUI thread
+        self.rules = MatchRules.load()  # กฎ include/exclude (matcher.json ถ้ามี)
+        self.discovery = ProcessIndex(matlab_or(self.rules.classify))  # ดัชนีโปรเซสแบบ incremental
+        self.ranker = CandidateRanker()  # เลือก candidate ที่ใช้ CPU/RAM มากที่สุด
+        self.handshake = FileWatcher(names=(FLAG_FILE,)).start()  # เฝ้าไฟล์ flag ของ MATLAB
+        self.session_log = None  # ไฟล์ append-only ของ session ปัจจุบัน/ล่าสุด
         
         #ตัวเเสดงค่าที่ได้ 
         self.cpu_gauge = HalfCircleGauge("CPU")
@@ -72,10 +90,14 @@ class MonitorApp(QWidget):
         self.ram_label.setAlignment(Qt.AlignCenter)
         self.ram_label.setFont(QFont("Arial", 11, QFont.Bold))
         # ตารางแสดงข้อมูล
-        self.table = QTableWidget(0, 3)
-        self.table.setHorizontalHeaderLabels(["Time", "CPU (%)", "RAM (MB)"])
+        self.table_model = SampleTableModel([("Time", "time", format_timestamp), ("CPU (%)", "cpu", ".1f"), ("RAM (MB)", "ram", ".1f")], self.store)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         # widget UI อื่น ๆ
         self.status_label = QLabel("Status: Idle")
+        self.source_label = QLabel("")  # process ที่ตรวจจับได้และเหตุผลที่เลือก
+        self.source_label.setWordWrap(True)
         self.sampling_spinbox = QDoubleSpinBox()
         self.sampling_spinbox.setRange(0.1, 10.0)
         self.sampling_spinbox.setValue(1.0)
@@ -91,10 +113,19 @@ class MonitorApp(QWidget):
         self.btn_export_excel.clicked.connect(self.export_excel)
         self.btn_export_csv.clicked.connect(self.export_csv)
         self.btn_exit.clicked.connect(self.close)
+        self.sampling_spinbox.valueChanged.connect(self.set_sampling_rate)
+        self.auto_start_checkbox.toggled.connect(self.set_auto_start)
         # ตั้งค่า layout
         self.setup_ui()
+        self.pump = ChannelPump(self.channel, self.handle_events, fps=10, parent=self)  # อัพเดตหน้าจอ 10 ครั้ง/วินาที
         threading.Thread(target=self.monitor_loop, daemon=True).start()  # สร้าง thread สำหรับ monitor loop
 
+    def set_sampling_rate(self, value):
+        self.sampling_rate = value
+
+    def set_auto_start(self, checked):
+        self.auto_start = checked
+
     def setup_ui(self):  #layout ของหน้าจอ
         layout = QVBoxLayout()
         gauge_layout = QHBoxLayout()
@@ -119,6 +150,7 @@ class MonitorApp(QWidget):
         control_layout.addWidget(self.btn_exit)
         #layout หลัก
         layout.addWidget(self.status_label)
+        layout.addWidget(self.source_label)
         layout.addWidget(self.auto_start_checkbox)
         layout.addLayout(gauge_layout)
         layout.addWidget(self.table)
@@ -126,125 +158,121 @@ class MonitorApp(QWidget):
         self.setLayout(layout)
     
     def reset_table(self):  # reset ตาราง
-        self.data.clear() 
-        self.table.setRowCount(0)
+        self.table_model.clear()
         self.status_label.setText("Table reset.")
 
     def detect_flag_file(self):  # ตรวจสอบว่า MATLAB สร้างไฟล์ flag หรือเปล่า
-        return os.path.exists("C:\\temp\\monitoring_flag.txt")
+        return self.handshake.exists(FLAG_FILE)  # สถานะจาก watcher ไม่แตะ filesystem
 
     def detect_training_process(self):   # ตรวจจับ process ที่ train 
+        self.discovery.scan()  # อ่านข้อมูลเฉพาะโปรเซสใหม่ ที่เหลือใช้ผลที่จำไว้
         if self.detect_flag_file():
-            for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
+            for entry in self.discovery.candidates("matlab"):
                 try:
-                    if "matlab" in proc.info['name'].lower():
-                        if proc.memory_info().rss > 200 * 1024 * 1024:
-                            self.training_source = "MATLAB (via flag)"
-                            self.training_pid = proc.pid
-                            return True
-                except:
+                    if entry.proc.memory_info().rss > 200 * 1024 * 1024:
+                        self.training_source = "MATLAB (via flag)"
+                        self.training_pid = entry.pid
+                        self.detect_reason = "flag file"
+                        return True
+                except psutil.Error:
                     continue
 
-        my_pid = psutil.Process().pid     # ตรวจหา process ที่เป็น Python script
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if proc.pid == my_pid:
-                    continue
-                name = proc.info['name'].lower()
-                cmdline = ' '.join(proc.info.get('cmdline', [])).lower()
-                if "python" in name and ".py" in cmdline:
-                    self.training_source = "Python"
-                    self.training_pid = proc.pid
-                    return True
-            except:
-                continue
+        # ตรวจหา process ที่เป็น Python script: เลือกตัวที่หนักที่สุดในช่วงสังเกต
+        entry, reason = self.ranker.pick(self.discovery.candidates(self.rules.label))
+        if entry is not None:
+            self.training_source = f"Python: {entry.cmdline.lower()}"
+            self.training_pid = entry.pid
+            self.detect_reason = reason
+            return True
         return False
 
-    def get_training_process_resource(self): # อ่านค่า CPU/RAM ของ process ที่จับได้
-        try:
-            if self.training_pid:
-                proc = psutil.Process(self.training_pid)
-                proc.cpu_percent(interval=None)
-                time.sleep(self.sampling_rate)
-                cpu = proc.cpu_percent(interval=None) / psutil.cpu_count()
-                ram = proc.memory_info().rss / (1024 * 1024)
-                ram_percent = (proc.memory_info().rss / psutil.virtual_memory().total) * 100
-                return cpu, ram, ram_percent
-        except:
-            pass
-        return None, None, None
-
-    def monitor_loop(self):  # วนลูปตรวจจับข้อมูลทุก sampling rate
+    def monitor_loop(self):  # วนลูปตรวจจับข้อมูลทุก sampling rate (worker thread: ไม่แตะ widget)
         while True:
-            if not self.monitoring and self.auto_start_checkbox.isChecked():
-                if self.detect_training_process():
+            if not self.monitoring:
+                # ตรวจจับเฉพาะตอน idle ; ระหว่าง monitor ใช้ PID ที่ตรึงไว้ตอนเริ่มเท่านั้น
+                if self.auto_start and self.detect_training_process():
                     self.start_monitoring()
+                else:
+                    self.handshake.wait(0.3)  # ตื่นทันทีเมื่อไฟล์ flag เปลี่ยน
+                continue
 
-            if self.monitoring:
-                if self.auto_start_checkbox.isChecked() and not self.detect_training_process():
-                    self.monitoring = False
-                    self.status_label.setText("Training stopped. Waiting...")
-                    continue
+            self.scheduler.set_interval(self.sampling_rate)
+            tick = self.scheduler.wait()
+            try:
+                cpu, ram, ram_percent = self.sampler.sample(tick.interval)
+            except psutil.Error:  # process ที่ตรึงไว้จบแล้ว (หรืออ่านไม่ได้อีก)
+                self.stop_monitoring()
+                continue
+            if self.training_source.startswith("MATLAB") and not self.detect_flag_file():
+                self.stop_monitoring()  # MATLAB ลบไฟล์ flag เมื่อ train เสร็จ
+                continue
 
-                self.sampling_rate = self.sampling_spinbox.value()
-                cpu, ram, ram_percent = self.get_training_process_resource()
-                if cpu is None:
-                    continue
-                
-                # อัพเดตขอมูล
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                self.cpu_gauge.setValue(cpu)
-                self.ram_gauge.setValue(ram_percent)
-                self.cpu_label.setText(f"CPU (%): {cpu:.1f} %")
-                self.ram_label.setText(f"RAM (MB): {int(ram)} MB")
-                # เก็บข้อมูล
-                self.data.append((timestamp, cpu, ram, self.training_source))
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-                self.table.setItem(row, 0, QTableWidgetItem(timestamp))
-                self.table.setItem(row, 1, QTableWidgetItem(f"{cpu:.1f}"))
-                self.table.setItem(row, 2, QTableWidgetItem(f"{ram:.1f}"))
+            self.session_log.append(tick.time, cpu, ram, tick.interval)  # เขียนลงไฟล์ทันที
+            # ส่งข้อมูลไป GUI thread
+            self.channel.put(("sample", (tick.time, cpu, ram, tick.interval), ram_percent))
+
+    def start_monitoring(self): # เริ่มการ monitor (worker thread) โดยตรึง training_pid ไว้จนจบ session
+        try:
+            self.sampler = ProcessSampler(self.training_pid)
+        except psutil.Error:  # process จบไปก่อนเริ่ม: กลับไปตรวจจับรอบถัดไป
+            self.sampler = None
+            return
+        self.scheduler = DeadlineScheduler(self.sampling_rate)
+        self.scheduler.start()
+        self.session_log = SessionLogWriter(session_path(), self.training_source, self.training_pid)
+        self.monitoring = True
+        self.channel.put(("start", self.training_source, self.detect_reason))
 
+    def stop_monitoring(self): # จบ session (worker thread)
+        self.monitoring = False
+        self.sampler = None
+        self.session_log.close()
+        self.channel.put(("stop",))
+
+    def handle_events(self, batch):  # GUI thread: รับข้อมูลเป็นชุดจาก ChannelPump
+        rows = []
+        last = None
+        for event in batch:
+            if event[0] == "sample":
+                rows.append(event[1])
+                last = event
+            elif event[0] == "start":
+                rows.clear()
+                last = None
+                self.table_model.clear(event[1])
+                self.cpu_gauge.setValue(0)
+                self.ram_gauge.setValue(0)
+                self.status_label.setText("Monitoring started (Auto).")
+                self.source_label.setText(f"Detected from: {event[1]}\nWhy: {event[2]}")
+            elif event[0] == "stop":
+                self.table_model.extend(rows)
+                rows = []
+                self.status_label.setText("Training stopped. Waiting...")
+        self.table_model.extend(rows)
+        if last is not None:  # อัพเดต gauge/label ด้วยค่าล่าสุดของชุดเท่านั้น
+            (t, cpu, ram, _), ram_percent = last[1], last[2]
+            self.cpu_gauge.setValue(cpu)
+            self.ram_gauge.setValue(ram_percent)
+            self.cpu_label.setText(f"CPU (%): {cpu:.1f} %")
+            self.ram_label.setText(f"RAM (MB): {int(ram)} MB")
+            if self.monitoring:
                 self.status_label.setText(
-                    f"{self.training_source}: {timestamp} CPU: {cpu:.1f}% RAM: {ram:.1f} MB"
+                    f"{self.store.source}: {format_timestamp(t)} CPU: {cpu:.1f}% RAM: {ram:.1f} MB"
                 )
-            else:
-                time.sleep(0.3)
 
-    def start_monitoring(self): # เริ่มการ monitor
-        self.sampling_rate = self.sampling_spinbox.value()
-        self.monitoring = True
-        self.data.clear()
-        self.cpu_gauge.setValue(0)
-        self.ram_gauge.setValue(0)
-        self.table.setRowCount(0)
-        self.status_label.setText("Monitoring started (Auto).")
-
-    def export_excel(self): # บันทึกข้อมูลเป็น Excel
-        if not self.data:
+    def export_excel(self): # บันทึกข้อมูลเป็น Excel (ทำงานบน background thread)
+        if not len(self.store):
             self.status_label.setText("Status: No data to export")
             return
-        path, _ = QFileDialog.getSaveFileName(self, "Save Excel File", "", "Excel Files (*.xlsx)")
-        if path:
-            wb = Workbook()
-            ws = wb.active
-            ws.append(["Time", "CPU (%)", "RAM (MB)", "Source"])
-            for row in self.data:
-                ws.append(row)
-            wb.save(path)
-            self.status_label.setText(f"Excel saved to {path}")
-
-    def export_csv(self): # บันทึกข้อมูลเป็น CSV
-        if not self.data:
+        self.session_log.flush()
+        start_export(self, self.session_log.path, "excel", self.status_label)
+
+    def export_csv(self): # บันทึกข้อมูลเป็น CSV (ทำงานบน background thread)
+        if not len(self.store):
             self.status_label.setText("Status: No data to export")
             return
-        path, _ = QFileDialog.getSaveFileName(self, "Save CSV File", "", "CSV Files (*.csv)")
-        if path:
-            with open(path, mode='w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow(["Time", "CPU (%)", "RAM (MB)", "Source"])
-                writer.writerows(self.data)
-            self.status_label.setText(f"CSV saved to {path}")
+        self.session_log.flush()
+        start_export(self, self.session_log.path, "csv", self.status_label)
 
 # ตัวรัน
 if __name__ == "__main__":
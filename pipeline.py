@@ -0,0 +1,57 @@
+from collections import deque
+from PyQt5.QtCore import QObject, QTimer
+from instrument import STATS, clock
+
+
+class SampleChannel:
+    """
+    ช่องส่งข้อมูลจาก thread เก็บตัวอย่าง (producer) ไปยัง GUI thread (consumer)
+    ใช้ deque เพราะ append/popleft เป็น thread-safe โดยไม่ต้องใช้ lock
+    ฝั่ง producer จึงไม่ถูกบล็อกโดยการวาดหน้าจอเลย
+    """
+
+    def __init__(self):
+        self.queue = deque()
+
+    def put(self, item):
+        self.queue.append(item)
+
+    def drain(self, limit=None):
+        """ดึงข้อมูลที่ค้างอยู่ออกมาเป็น list (สูงสุด limit รายการ)"""
+        items = []
+        popleft = self.queue.popleft
+        while limit is None or len(items) < limit:
+            try:
+                items.append(popleft())
+            except IndexError:
+                break
+        return items
+
+    def __len__(self):
+        return len(self.queue)
+
+
+class ChannelPump(QObject):
+    """
+    QTimer บน GUI thread ที่ดึงข้อมูลจาก SampleChannel เป็นชุดตาม frame rate ที่กำหนด
+    แล้วส่งให้ handler ครั้งเดียวต่อ frame (ไม่ว่า sampler จะเร็วแค่ไหน event loop ก็ไม่ท่วม)
+    """
+
+    def __init__(self, channel, handler, fps=10, parent=None):
+        super().__init__(parent)
+        self.channel = channel
+        self.handler = handler
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.pump)
+        self.set_fps(fps)
+        self.timer.start()
+
+    def set_fps(self, fps):
+        self.timer.setInterval(max(1, int(1000 / max(fps, 0.1))))
+
+    def pump(self):
+        batch = self.channel.drain()
+        if batch:
+            t0 = clock()
+            self.handler(batch)
+            STATS.record("pump", t0)  # เวลาที่ GUI thread ใช้ต่อ frame (รวม flush/table/plot)
@@ -0,0 +1,96 @@
+import time
+import psutil
+from sampler import create_sampler
+from session_log import SessionLogWriter, session_path, FIELDS
+from analytics import StreamAnalyzer
+
+
+class Target:
+    """โปรเซสหนึ่งตัวใน SamplerPool: sampler ของตัวเอง + ไฟล์ session ของตัวเอง + สถิติ/event แบบ streaming"""
+
+    def __init__(self, pid, source, tree=False, metrics=()):
+        self.pid = pid
+        self.source = source
+        self.sampler = create_sampler(pid, metrics, tree)
+        self.log = SessionLogWriter(session_path(tag=pid), source, pid, FIELDS + tuple(metrics))
+        self.analyzer = StreamAnalyzer()
+        self.samples = 0
+
+    def close(self):
+        self.sampler.close()
+        self.log.close()
+
+
+class SamplerPool:
+    """
+    อ่านค่า CPU/RAM ของหลายโปรเซสใน tick เดียวกัน (scheduler ตัวเดียว)
+    - ค่าใช้จ่ายที่ไม่ขึ้นกับจำนวน target ทำครั้งเดียวต่อ tick: psutil.pids() หนึ่งครั้ง ใช้ตรวจว่า target ยังอยู่
+    - ต่อ target เหลือเพียงการอ่าน counter ใน oneshot() ครั้งเดียว
+      (โหมด tree: แต่ละ ProcessTreeSampler ค้นหาลูกหลานใน tree ของตัวเองตามรอบ discover_interval)
+    - ตรวจ create_time ของทุก target (กัน PID ถูกนำกลับมาใช้) ทุก verify_every tick
+      tick อื่นใช้การมีอยู่ของ PID ใน psutil.pids() แทน
+    - metrics = ชื่อ metric เพิ่มเติม (metrics.METRICS) ของทุก target ; ต่อท้ายแถวหลัง interval
+    - ทุกแถวผ่าน StreamAnalyzer ของ target ; event ของ tick ล่าสุดอยู่ใน self.events เป็น (pid, Event)
+    """
+
+    def __init__(self, tree=False, verify_every=10, metrics=()):
+        self.tree = tree
+        self.verify_every = verify_every
+        self.metrics = tuple(metrics)
+        self.targets = {}  # pid -> Target
+        self.ticks = 0
+        self.last_cost = 0.0  # เวลาที่ใช้ใน sample() ครั้งล่าสุด (วินาที)
+        self.events = []
+
+    def __len__(self):
+        return len(self.targets)
+
+    def __contains__(self, pid):
+        return pid in self.targets
+
+    def add(self, pid, source):
+        """เพิ่ม target ; โยน psutil.Error ถ้าโปรเซสหายไปแล้ว"""
+        target = Target(pid, source, self.tree, self.metrics)
+        self.targets[pid] = target
+        return target
+
+    def remove(self, pid):
+        target = self.targets.pop(pid, None)
+        if target is not None:
+            target.close()
+        return target
+
+    def close(self):
+        for pid in list(self.targets):
+            self.remove(pid)
+
+    def sample(self, tick):
+        """
+        อ่านทุก target ตาม tick ของ DeadlineScheduler แล้วเขียนลงไฟล์ session ของแต่ละตัว
+        คืน (rows, gone) : rows = {pid: (time, cpu, ram, interval, *metrics)}, gone = list ของ Target ที่จบแล้ว
+        """
+        start = time.perf_counter()
+        pids = set(psutil.pids())
+        verify = self.ticks % self.verify_every == 0
+        self.ticks += 1
+
+        rows, gone = {}, []
+        self.events = []
+        for pid, target in list(self.targets.items()):
+            sampler = target.sampler
+            if pid not in pids or (verify and not sampler.is_alive()):
+                gone.append(self.remove(pid))
+                continue
+            try:
+                cpu, ram, _ = sampler.sample(tick.interval)
+            except psutil.Error:
+                gone.append(self.remove(pid))
+                continue
+            row = (tick.time, cpu, ram, tick.interval) + sampler.extra
+            target.log.append(*row)
+            target.samples += 1
+            rows[pid] = row
+            for event in target.analyzer.add(tick.time, cpu, ram):
+                self.events.append((pid, event))
+        self.last_cost = time.perf_counter() - start
+        return rows, gone
@@ -0,0 +1,73 @@
+import time
+import numpy as np
+from session_log import SessionLog
+
+MAX_SPEED = 1000.0
+MAX_BATCH = 50000  # แถวสูงสุดต่อชุด (ความเร็วสูงมากจะถูกจำกัดที่ขนาดนี้ต่อรอบ)
+
+
+class SessionReplay:
+    """
+    แหล่งข้อมูลแทน sampler จริง: เล่นไฟล์ session (.mlog) ซ้ำตามเวลาที่บันทึกไว้ เร็วขึ้น speed เท่า (1 - 1000)
+    - ไฟล์ถูกเปิดผ่าน SessionLog.array() (memory map) จึงเปิดได้ทันทีแม้เป็น trace หลายวัน
+    - wait() คืนทุกแถวที่ถึงเวลาแล้วเป็นชุดเดียว ไม่ sleep ต่อแถว (1000x ของ 0.01 s = 100k แถว/วินาที)
+    - แถวมีรูปแบบเดียวกับตัวอย่างสด (time, cpu, ram, interval, *extra) ส่งเข้าตาราง/กราฟได้ตรง ๆ
+    - set_speed() เรียกจาก thread อื่นได้ (สลับ anchor เป็น tuple เดียว)
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.log = SessionLog(path)
+        self.path = path
+        self.source = self.log.source
+        self.extra = self.log.extra
+        self.data = self.log.array()
+        self.times = self.data[:, 0]
+        self.count = len(self.data)
+        self.position = 0
+        self.speed = self.clamp(speed)
+        self.anchor = None  # (เวลาใน session, time.monotonic(), speed) ณ จุดที่เริ่ม/เปลี่ยนความเร็ว
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def clamp(speed):
+        return min(max(float(speed), 1.0), MAX_SPEED)
+
+    def session_time(self):
+        """เวลาใน session (epoch ตามไฟล์) ที่เล่นมาถึงตอนนี้"""
+        start, started, speed = self.anchor
+        return start + (time.monotonic() - started) * speed
+
+    def set_speed(self, speed):
+        self.speed = self.clamp(speed)
+        if self.anchor is not None:
+            self.anchor = (self.session_time(), time.monotonic(), self.speed)
+
+    def done(self):
+        return self.position >= self.count
+
+    def progress(self):
+        """(แถวที่เล่นแล้ว, แถวทั้งหมด)"""
+        return self.position, self.count
+
+    def wait(self, step=0.05, max_sleep=0.25):
+        """
+        รอจนแถวถัดไปถึงเวลา (อย่างน้อย step ไม่เกิน max_sleep วินาที) แล้วคืน list ของแถวที่ถึงเวลา
+        list ว่าง = ยังไม่มีแถวถึงเวลา (ช่วงห่างยาวที่ความเร็วต่ำ) ; None = เล่นครบทุกแถวแล้ว
+        """
+        if self.done():
+            return None
+        if self.anchor is None:
+            self.anchor = (self.times[0], time.monotonic(), self.speed)
+        delay = (self.times[self.position] - self.session_time()) / self.anchor[2]
+        time.sleep(min(max(delay, step), max_sleep))
+        # ค้นเฉพาะช่วงถัดไปไม่เกิน MAX_BATCH แถว (searchsorted บนคอลัมน์ทั้งไฟล์จะคัดลอกทั้งคอลัมน์)
+        window = self.times[self.position:self.position + MAX_BATCH]
+        end = self.position + int(np.searchsorted(window, self.session_time(), side="right"))
+        rows = self.data[self.position:end].tolist()
+        self.position = end
+        return rows
+
+    def close(self):
+        self.data = self.times = None  # ปล่อย memory map (progress/len ยังใช้ได้)
@@ -0,0 +1,198 @@
+import math
+import numpy as np
+from downsample import minmax_downsample
+
+# ขนาดของ rollup แต่ละชั้น: (ความกว้าง bucket วินาที, จำนวน bucket ที่เก็บ)
+# 1 s x 1 ชม., 10 s x 12 ชม., 1 min x 7 วัน, 10 min x 30 วัน (~20k bucket รวม ~1.8 MB)
+TIERS = ((1.0, 3600), (10.0, 4320), (60.0, 10080), (600.0, 4320))
+RAW_CAPACITY = 36000  # ตัวอย่างดิบล่าสุด (1 ชม. ที่ 0.1 s)
+
+# คอลัมน์ของ bucket: เวลาเริ่ม bucket, จำนวนตัวอย่าง, min/max/sum/last ของ CPU และ RAM, ผลรวม interval
+T, N, CPU_MIN, CPU_MAX, CPU_SUM, CPU_LAST, RAM_MIN, RAM_MAX, RAM_SUM, RAM_LAST, INTERVAL = range(11)
+BUCKET_FIELDS = 11
+RAW_FIELDS = 4  # x, cpu, ram, interval
+
+
+class Ring:
+    """ring buffer ขนาดคงที่ของหลายคอลัมน์ float64 ; เมื่อเต็ม แถวที่เก่าที่สุดถูกเขียนทับ"""
+
+    def __init__(self, capacity, n_fields):
+        self.data = np.empty((capacity, n_fields))
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+        self.dropped = 0  # จำนวนแถวที่ถูกเขียนทับไปแล้ว
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row):
+        self.data[(self.start + self.size) % self.capacity] = row
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+            self.dropped += 1
+
+    def rows(self):
+        """ทุกแถวเรียงจากเก่าไปใหม่ (view เมื่อไม่วนรอบ ไม่เช่นนั้นเป็นสำเนา)"""
+        end = self.start + self.size
+        if end <= self.capacity:
+            return self.data[self.start:end]
+        return np.concatenate((self.data[self.start:], self.data[:end - self.capacity]))
+
+    def first_x(self):
+        return self.data[self.start, 0] if self.size else math.inf
+
+    def covers(self, x):
+        """True ถ้ายังมีข้อมูลตั้งแต่ตำแหน่ง x (ไม่เคยถูกเขียนทับหรือแถวแรกยังเก่ากว่า x)"""
+        return not self.dropped or self.first_x() <= x
+
+    def clear(self):
+        self.start = self.size = self.dropped = 0
+
+
+class Accumulator:
+    """สะสม min/max/sum/last ของ CPU และ RAM ใน bucket เดียว"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.cpu_min = self.ram_min = math.inf
+        self.cpu_max = self.ram_max = -math.inf
+        self.cpu_sum = self.ram_sum = self.interval = 0.0
+        self.cpu_last = self.ram_last = 0.0
+
+    def add(self, cpu, ram, interval):
+        self.n += 1
+        if cpu < self.cpu_min:
+            self.cpu_min = cpu
+        if cpu > self.cpu_max:
+            self.cpu_max = cpu
+        if ram < self.ram_min:
+            self.ram_min = ram
+        if ram > self.ram_max:
+            self.ram_max = ram
+        self.cpu_sum += cpu
+        self.ram_sum += ram
+        self.cpu_last = cpu
+        self.ram_last = ram
+        self.interval += interval
+
+    def row(self, x):
+        return (x, self.n, self.cpu_min, self.cpu_max, self.cpu_sum, self.cpu_last,
+                self.ram_min, self.ram_max, self.ram_sum, self.ram_last, self.interval)
+
+
+class Tier:
+    """rollup หนึ่งชั้น: bucket กว้าง width วินาที เก็บใน Ring + bucket ที่ยังเปิดอยู่"""
+
+    def __init__(self, width, capacity):
+        self.width = width
+        self.ring = Ring(capacity, BUCKET_FIELDS)
+        self.acc = Accumulator()
+        self.bucket = None
+
+    def add(self, x, cpu, ram, interval):
+        bucket = math.floor(x / self.width)
+        if bucket != self.bucket:
+            if self.acc.n:
+                self.ring.append(self.acc.row(self.bucket * self.width))
+                self.acc.reset()
+            self.bucket = bucket
+        self.acc.add(cpu, ram, interval)
+
+    def rows(self):
+        """bucket ทั้งหมดรวม bucket ที่ยังเปิดอยู่"""
+        rows = self.ring.rows()
+        if self.acc.n:
+            rows = np.vstack((rows, self.acc.row(self.bucket * self.width)))
+        return rows
+
+    def clear(self):
+        self.ring.clear()
+        self.acc.reset()
+        self.bucket = None
+
+
+class Rollup:
+    """
+    ประวัติหลายความละเอียดที่ใช้หน่วยความจำคงที่
+    - ตัวอย่างดิบล่าสุด RAW_CAPACITY แถวใน Ring
+    - rollup ตาม TIERS (1 s / 10 s / 1 min / 10 min) เก็บ min/max/mean/last ต่อ bucket
+      ทุกตัวอย่างถูกเพิ่มลงทุกชั้นโดยตรง ค่า peak จึงอยู่ครบทุกชั้นแม้ run นานเป็นสัปดาห์
+    - select() เลือกชั้นที่ละเอียดที่สุดที่ยังครอบคลุมช่วงที่ขอ และมีจำนวนจุดไม่เกินที่กำหนด
+    แกน x เป็นวินาที (epoch หรือเวลาที่ผ่านไป) และต้องเพิ่มขึ้นเสมอ
+    """
+
+    def __init__(self, raw_capacity=RAW_CAPACITY, tiers=TIERS):
+        self.raw = Ring(raw_capacity, RAW_FIELDS)
+        self.tiers = [Tier(width, capacity) for width, capacity in tiers]
+        self.count = 0
+        self.last_x = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, x, cpu, ram, interval):
+        self.raw.append((x, cpu, ram, interval))
+        for tier in self.tiers:
+            tier.add(x, cpu, ram, interval)
+        self.count += 1
+        self.last_x = x
+
+    def clear(self):
+        self.raw.clear()
+        for tier in self.tiers:
+            tier.clear()
+        self.count = 0
+        self.last_x = 0.0
+
+    def select(self, x0, x1, max_points):
+        """
+        คืน (width, rows) สำหรับช่วง [x0, x1]
+        width = 0 หมายถึงข้อมูลดิบ (คอลัมน์ x, cpu, ram, interval) ไม่เช่นนั้นเป็น bucket ของชั้นนั้น
+        ถ้าไม่มีชั้นใดมีจุดไม่เกิน max_points จะใช้ชั้นที่หยาบที่สุด
+        """
+        span = max(x1 - x0, 0.0)
+        if self.raw.covers(x0):
+            rows = self.raw.rows()
+            lo, hi = np.searchsorted(rows[:, 0], [x0, x1])
+            if hi - lo <= max_points:
+                return 0.0, rows
+        for tier in self.tiers:
+            if tier.ring.covers(x0) and span / tier.width <= max_points:
+                return tier.width, tier.rows()
+        coarsest = self.tiers[-1]
+        return coarsest.width, coarsest.rows()
+
+    def envelope(self, column, x0, x1, n_bins):
+        """
+        จุดของเส้น column ("cpu" หรือ "ram") ในช่วง [x0, x1] ไม่เกิน 2 * n_bins จุด
+        ข้อมูลจาก rollup วาดทั้ง min และ max ของแต่ละ bucket (peak ไม่หาย)
+        """
+        width, rows = self.select(x0, x1, 2 * n_bins)
+        if not len(rows):
+            return np.empty(0), np.empty(0)
+        if not width:
+            y = rows[:, 1] if column == "cpu" else rows[:, 2]
+            return minmax_downsample(rows[:, 0], y, n_bins, x0, x1)
+        lo, hi = (CPU_MIN, CPU_MAX) if column == "cpu" else (RAM_MIN, RAM_MAX)
+        x = np.repeat(rows[:, T] + width / 2, 2)
+        y = np.column_stack((rows[:, lo], rows[:, hi])).ravel()
+        return minmax_downsample(x, y, n_bins, x0, x1)
+
+
+def suggest_resolution(span, samples, max_rows, tiers=TIERS):
+    """
+    ความละเอียดของ export ที่ละเอียดที่สุดที่ได้ไม่เกิน max_rows แถว
+    None = ทุกตัวอย่าง ; ไม่เช่นนั้นเป็นความกว้างของชั้นใน TIERS
+    """
+    if samples <= max_rows:
+        return None
+    for width, _ in tiers:
+        if span / width <= max_rows:
+            return width
+    return tiers[-1][0]
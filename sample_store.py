@@ -0,0 +1,65 @@
+from array import array
+
+COLUMNS = ("time", "cpu", "ram", "interval")
+CAPACITY = 100000  # จำนวนแถวดิบล่าสุดที่เก็บในหน่วยความจำ (ทั้ง session อยู่ในไฟล์ session)
+
+
+class SampleStore:
+    """
+    ที่เก็บตัวอย่างแบบ columnar ในหน่วยความจำ
+    - แต่ละคอลัมน์เป็น array('d') (float64) : time = epoch วินาที, cpu (%), ram (MB), interval (s)
+    - source (ชื่อ/cmdline ของโปรเซส) เก็บครั้งเดียวต่อ session ไม่ซ้ำทุกแถว
+    - ไม่เก็บเวลาเป็นข้อความ แปลงเฉพาะตอนแสดงผลหรือ export
+    - เก็บไม่เกิน capacity แถวล่าสุด (None = ไม่จำกัด) ; แถวที่เก่ากว่าถูกตัดทิ้งด้วย drop_oldest
+    - extra = ชื่อ metric เพิ่มเติม (metrics.METRICS) เป็นคอลัมน์ต่อท้าย interval ตามลำดับในแถว
+    ใช้หน่วยความจำ 32 ไบต์ต่อตัวอย่าง (+8 ไบต์ต่อ metric เพิ่มเติม)
+    """
+
+    def __init__(self, source="", capacity=CAPACITY, extra=()):
+        self.source = source
+        self.capacity = capacity
+        self.dropped = 0  # จำนวนแถวที่ถูกตัดทิ้งไปแล้วตั้งแต่ต้น session
+        self._make_columns(extra)
+
+    def _make_columns(self, extra):
+        self.extra = tuple(extra)
+        self.columns = {name: array('d') for name in COLUMNS + self.extra}
+        self.time, self.cpu, self.ram, self.interval = (self.columns[name] for name in COLUMNS)
+        self.arrays = tuple(self.columns.values())  # ลำดับเดียวกับค่าในแถว
+
+    def __len__(self):
+        return len(self.time)
+
+    def append(self, *row):
+        """row = (time, cpu, ram, interval, *extra)"""
+        for column, value in zip(self.arrays, row):
+            column.append(value)
+
+    def extend(self, rows):
+        """เพิ่มหลายแถว ; แต่ละแถวเป็น (time, cpu, ram, interval, *extra)"""
+        for row in rows:
+            self.append(*row)
+
+    def value(self, column, i):
+        if column == "source":
+            return self.source
+        return self.columns[column][i]
+
+    def row(self, i):
+        return tuple(column[i] for column in self.arrays)
+
+    def drop_oldest(self, n):
+        for col in self.columns.values():
+            del col[:n]
+        self.dropped += n
+
+    def clear(self, source=None, extra=None):
+        """ล้างข้อมูล ; extra (ถ้าระบุ) เปลี่ยนชุด metric เพิ่มเติมสำหรับ session ใหม่"""
+        if extra is not None:
+            self._make_columns(extra)
+        else:
+            for col in self.arrays:
+                del col[:]
+        self.dropped = 0
+        if source is not None:
+            self.source = source
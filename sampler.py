@@ -0,0 +1,325 @@
+import os
+import sys
+import time
+import psutil
+from collections import namedtuple
+from metrics import MetricCollector, page_faults
+
+# ค่าที่อ่านได้ในแต่ละ tick
+# cpu         = CPU (%) เทียบกับทุก core ของเครื่อง
+# ram         = RSS (MB)
+# ram_percent = RSS เทียบกับ RAM ทั้งเครื่อง (%)
+Sample = namedtuple("Sample", ["cpu", "ram", "ram_percent"])
+
+# ค่าของแต่ละโปรเซสในโหมด process tree (ใช้แสดง breakdown)
+ChildSample = namedtuple("ChildSample", ["pid", "name", "cpu", "ram"])
+
+MB = 1024 * 1024
+# Linux: อ่าน /proc/<pid>/stat, statm ตรง ๆ (ProcStatSampler) ; ระบบอื่นใช้ psutil
+FAST_PATH = sys.platform.startswith("linux") and hasattr(os, "preadv")
+ZOMBIE = ord("Z")
+DISCOVER_INTERVAL = 1.0  # วินาทีระหว่างการค้นหาลูกหลานใหม่ของ ProcessTreeSampler
+# Linux: รายชื่อลูกของแต่ละ thread อยู่ใน /proc/<pid>/task/<tid>/children (ต้องเปิด CONFIG_PROC_CHILDREN)
+PROC_CHILDREN = FAST_PATH and os.path.exists(f"/proc/{os.getpid()}/task/{os.getpid()}/children")
+
+
+def cpu_seconds(times):
+    """เวลา CPU สะสม (user + system) จากผลของ cpu_times() หน่วยวินาที"""
+    return times.user + times.system
+
+
+def parse_int(buf, pos):
+    """เลขฐานสิบที่ตำแหน่ง pos ของ buffer อ่านทีละหลักบน buffer เดิม (ไม่ตัด slice) ; คืน (ค่า, ตำแหน่งหลังตัวเลข)"""
+    value = 0
+    digit = buf[pos] - 48
+    while 0 <= digit <= 9:
+        value = value * 10 + digit
+        pos += 1
+        digit = buf[pos] - 48
+    return value, pos
+
+
+def proc_children(pid):
+    """PID ลูกโดยตรงของโปรเซสจาก /proc/<pid>/task/*/children (อ่านเฉพาะ thread ของโปรเซสนี้)"""
+    try:
+        tids = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return []
+    children = []
+    for tid in tids:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children", "rb") as f:
+                children.extend(map(int, f.read().split()))
+        except OSError:
+            continue
+    return children
+
+
+def descendants(proc):
+    """
+    PID ลูกหลานทั้งหมดของ proc
+    Linux เดินลงจาก proc ผ่าน /proc/<pid>/task/*/children: ต้นทุนตามขนาด tree ไม่ใช่จำนวนโปรเซสทั้งเครื่อง
+    ระบบอื่นใช้ psutil children(recursive=True)
+    """
+    if not PROC_CHILDREN:
+        return [child.pid for child in proc.children(recursive=True)]
+    found, stack = [], [proc.pid]
+    while stack:
+        children = proc_children(stack.pop())
+        found.extend(children)
+        stack.extend(children)
+    return found
+
+
+class ProcessSampler:
+    """
+    อ่านค่า CPU/RAM ของโปรเซสเดียว โดยถือ psutil.Process ไว้ข้าม tick
+    - ตรวจตัวตนของโปรเซสด้วย pid + create_time (กันกรณี PID ถูกนำกลับมาใช้ใหม่)
+    - อ่าน counter ทั้งหมดใน oneshot() ครั้งเดียวต่อ tick
+    - ค่าคงที่ของเครื่อง (จำนวน core, RAM ทั้งหมด) อ่านครั้งเดียวตอนสร้าง
+    - CPU% และอัตราของ metric หารด้วยเวลาจริงตั้งแต่การอ่านครั้งก่อนของ sampler นี้ (self.last_time)
+      ไม่ใช่ระยะ tick: target ที่เพิ่มเข้ามาระหว่าง tick จึงได้ค่าแรกที่ถูกต้อง
+    - metrics = ชื่อ metric เพิ่มเติมจาก metrics.METRICS อ่านใน oneshot() เดียวกัน ผลอยู่ใน self.extra
+    """
+
+    def __init__(self, pid, metrics=()):
+        self.cpu_count = psutil.cpu_count() or 1
+        self.total_ram = psutil.virtual_memory().total
+        self.pid = pid
+        self.proc = psutil.Process(pid)
+        self.collector = MetricCollector(metrics) if metrics else None
+        self.extra = ()
+        with self.proc.oneshot():
+            self.create_time = self.proc.create_time()
+            self.last_cpu_time = cpu_seconds(self.proc.cpu_times())
+            self.last_time = time.monotonic()
+            if self.collector is not None:
+                self.collector.read(self.proc, 0.0)  # ค่าตั้งต้นของ counter: tick แรกจึงมีอัตราต่อวินาที
+
+    def is_alive(self):
+        """
+        True ถ้าโปรเซสของ handle เดิมยังทำงานอยู่ (is_running เทียบ pid + create_time ให้ ไม่สร้าง Process ใหม่)
+        โปรเซสที่หายไปแล้วคืน False เสมอ ผู้เรียกไม่ต้องจับ NoSuchProcess เอง
+        """
+        try:
+            return self.proc.is_running()
+        except psutil.NoSuchProcess:
+            return False
+
+    def close(self):
+        """คืนทรัพยากรที่ถือไว้ (psutil ไม่มี ; ProcStatSampler ปิด fd)"""
+
+    def _elapsed(self):
+        """เวลาจริง (วินาที) ตั้งแต่การอ่านครั้งก่อน แล้วเลื่อน self.last_time มาเป็นตอนนี้"""
+        now = time.monotonic()
+        elapsed = now - self.last_time
+        self.last_time = now
+        return elapsed
+
+    def sample(self, interval):
+        """
+        อ่านค่าหนึ่ง tick; interval คือระยะ tick ของตัวจัดเวลา (วินาที) ใช้เมื่อวัดเวลาจริงไม่ได้ (0) เท่านั้น
+        โยน psutil.NoSuchProcess / AccessDenied ต่อให้ผู้เรียกจัดการ
+        (โปรเซสที่จบแล้วแต่ parent ยังไม่เก็บ (zombie) ถือว่าจบ: โยน psutil.ZombieProcess)
+        """
+        with self.proc.oneshot():
+            if self.proc.status() == psutil.STATUS_ZOMBIE:  # อ่านจากไฟล์ stat ชุดเดียวกับ cpu_times
+                raise psutil.ZombieProcess(self.pid)
+            cpu_time = cpu_seconds(self.proc.cpu_times())
+            elapsed = self._elapsed() or interval
+            rss = self.proc.memory_info().rss
+            if self.collector is not None:
+                self.extra = self.collector.read(self.proc, elapsed)
+        cpu = (cpu_time - self.last_cpu_time) / elapsed * 100 / self.cpu_count if elapsed > 0 else 0.0
+        self.last_cpu_time = cpu_time
+        return Sample(cpu, rss / MB, rss / self.total_ram * 100)
+
+
+class ProcStatSampler(ProcessSampler):
+    """
+    backend เฉพาะ Linux สำหรับ sampling ถี่ (ถึง 10 ms)
+    - เปิด /proc/<pid>/stat และ /proc/<pid>/statm ค้างไว้ แล้วอ่านซ้ำด้วย os.preadv ลง buffer เดิม
+      ไม่เปิดไฟล์ใหม่ ไม่ผ่าน object ของ psutil ในแต่ละ tick
+    - หา utime/stime (jiffies), page fault และ resident (pages) ด้วย find + parse_int บน buffer เดิม
+      ไม่ split ทั้งบรรทัดและไม่ตัด slice ใหม่ในแต่ละ tick
+    - สถานะ alive มาจากการอ่านของ sample() เอง (ESRCH / zombie) is_alive จึงไม่ต้องอ่านไฟล์เพิ่ม
+    - fd ผูกกับโปรเซสเดิม: ถ้าโปรเซสจบ การอ่านได้ ESRCH แม้ PID จะถูกนำกลับมาใช้
+    metric เพิ่มเติม (ถ้ามี) ยังอ่านผ่าน psutil ใน oneshot() ต่อ tick ยกเว้น page fault ซึ่งอ่านจากไฟล์ stat เดียวกัน
+    """
+
+    def __init__(self, pid, metrics=()):
+        super().__init__(pid, metrics)
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.stat_buffer = [bytearray(4096)]
+        self.statm_buffer = [bytearray(256)]
+        self.stat_fd = os.open(f"/proc/{pid}/stat", os.O_RDONLY)
+        self.statm_fd = None
+        self.alive = True
+        try:
+            self.statm_fd = os.open(f"/proc/{pid}/statm", os.O_RDONLY)
+            self.last_cpu_time = self._cpu_time()
+            self.last_time = time.monotonic()
+            if self.collector is not None:
+                self.collector.provide(page_faults, self._faults, self.proc)
+        except (OSError, psutil.Error):
+            os.close(self.stat_fd)
+            if self.statm_fd is not None:
+                os.close(self.statm_fd)
+            raise
+
+    def _read(self, fd, buffers):
+        try:
+            return os.preadv(fd, buffers, 0)
+        except ProcessLookupError:
+            self.alive = False
+            raise psutil.NoSuchProcess(self.pid)
+
+    def _cpu_time(self):
+        """
+        อ่าน /proc/<pid>/stat หนึ่งครั้ง: คืน utime + stime (วินาที) และเก็บ page fault ไว้ใน self.faults
+        เดินไปข้างหน้าครั้งเดียวจาก state ถึง stime และอ่านตัวเลขบน buffer เดิม ; โยน ZombieProcess ถ้าโปรเซสเป็น zombie
+        """
+        n = self._read(self.stat_fd, self.stat_buffer)
+        buf = self.stat_buffer[0]
+        pos = buf.rfind(b")", 0, n) + 2  # comm อาจมีช่องว่าง/วงเล็บ: เริ่มนับหลัง ')' ตัวสุดท้าย
+        if buf[pos] == ZOMBIE:
+            self.alive = False
+            raise psutil.ZombieProcess(self.pid)
+        for _ in range(7):  # field ที่ 3 (state) -> field ที่ 10 (minflt)
+            pos = buf.find(b" ", pos) + 1
+        minor, pos = parse_int(buf, pos)
+        pos = buf.find(b" ", pos + 1) + 1  # ข้าม cminflt -> field ที่ 12 (majflt)
+        major, pos = parse_int(buf, pos)
+        pos = buf.find(b" ", pos + 1) + 1  # ข้าม cmajflt -> field ที่ 14 (utime)
+        utime, pos = parse_int(buf, pos)
+        stime, _ = parse_int(buf, pos + 1)
+        self.faults = (minor + major, major)
+        return (utime + stime) / self.clock_ticks
+
+    def _faults(self, proc):
+        """(minflt + majflt, majflt) ของ tick นี้ (field ที่ 10 และ 12 ของ proc(5)) ที่ _cpu_time อ่านไว้แล้ว"""
+        return self.faults
+
+    def _rss(self):
+        """resident (bytes) = field ที่ 2 ของ /proc/<pid>/statm (หน่วย page)"""
+        self._read(self.statm_fd, self.statm_buffer)
+        buf = self.statm_buffer[0]
+        return parse_int(buf, buf.find(b" ") + 1)[0] * self.page_size
+
+    def is_alive(self):
+        """ผลของการอ่านครั้งล่าสุด (sample ตั้งค่าให้) ไม่อ่านไฟล์ซ้ำ"""
+        return self.alive
+
+    def close(self):
+        if self.stat_fd is not None:
+            os.close(self.stat_fd)
+            os.close(self.statm_fd)
+            self.stat_fd = self.statm_fd = None
+
+    def sample(self, interval):
+        cpu_time = self._cpu_time()
+        elapsed = self._elapsed() or interval
+        rss = self._rss()
+        if self.collector is not None:
+            with self.proc.oneshot():
+                self.extra = self.collector.read(self.proc, elapsed)
+        cpu = (cpu_time - self.last_cpu_time) / elapsed * 100 / self.cpu_count if elapsed > 0 else 0.0
+        self.last_cpu_time = cpu_time
+        return Sample(cpu, rss / MB, rss / self.total_ram * 100)
+
+
+def create_sampler(pid, metrics=(), tree=False, fast=FAST_PATH):
+    """
+    sampler ที่เหมาะกับระบบ: tree -> ProcessTreeSampler ; Linux -> ProcStatSampler ; อื่น ๆ -> ProcessSampler
+    ถ้าเปิด /proc ไม่ได้ (เช่น mount ด้วย hidepid) จะกลับไปใช้ psutil
+    """
+    if tree:
+        return ProcessTreeSampler(pid, metrics)
+    if fast:
+        try:
+            return ProcStatSampler(pid, metrics)
+        except PermissionError:
+            pass
+        except OSError:
+            raise psutil.NoSuchProcess(pid)
+    return ProcessSampler(pid, metrics)
+
+
+class ProcessTreeSampler(ProcessSampler):
+    """
+    อ่านค่า CPU/RAM รวมของโปรเซสหลักและลูกหลานทั้งหมด (เช่น DataLoader workers, MATLAB parpool)
+    - ค้นหาลูกหลานทุก discover_interval วินาที (ไม่ใช่ทุก tick) โดยเดินเฉพาะ tree นี้ (ดู descendants)
+      ต้นทุนต่อ tick จึงขึ้นกับจำนวนสมาชิกเท่านั้น ไม่ขึ้นกับจำนวนโปรเซสทั้งเครื่อง
+    - สมาชิกระบุด้วย (pid, create_time): PID ที่ถูกนำกลับมาใช้เป็นสมาชิกใหม่ ไม่ต่อ counter ของตัวเก่า
+    - ลูกใหม่เริ่มนับ CPU ตั้งแต่ตอนที่พบ (ช่วงก่อนพบไม่เกิน discover_interval วินาทีไม่ถูกนับ)
+    - ลูกที่จบไปแล้วถูกตัดออกเมื่ออ่านค่าไม่ได้ หรือไม่อยู่ใน tree ตอนค้นหาครั้งถัดไป
+    ผลรวมคืนเป็น Sample ส่วนรายโปรเซสอยู่ใน self.breakdown (list ของ ChildSample)
+    metric เพิ่มเติม (self.extra) เป็นของโปรเซสหลักเท่านั้น
+    """
+
+    def __init__(self, pid, metrics=(), discover_interval=DISCOVER_INTERVAL):
+        super().__init__(pid, metrics)
+        self.name = self.proc.name()
+        self.discover_interval = discover_interval
+        self.members = {}  # (pid, create_time) -> [Process, name, last_cpu_time, last_time]
+        self.breakdown = []
+        self.next_discover = 0.0
+        self.discover()
+
+    def discover(self):
+        """ค้นหาลูกหลานตอนนี้: เพิ่มตัวที่ยังไม่รู้จัก (baseline CPU = ค่าปัจจุบัน) และตัดตัวที่ไม่อยู่ใน tree แล้ว"""
+        self.next_discover = time.monotonic() + self.discover_interval
+        try:
+            pids = descendants(self.proc)
+        except psutil.Error:
+            return
+        current = set()
+        for pid in pids:
+            try:
+                proc = psutil.Process(pid)
+                key = (pid, proc.create_time())
+                current.add(key)
+                if key not in self.members:
+                    with proc.oneshot():
+                        self.members[key] = [proc, proc.name(), cpu_seconds(proc.cpu_times()), time.monotonic()]
+            except psutil.Error:
+                continue
+        for key in self.members.keys() - current:
+            del self.members[key]
+
+    def sample(self, interval):
+        # อ่านก่อนค้นหา: ลูกที่เพิ่งพบมี baseline ตอนนี้ และเริ่มนับใน tick ถัดไปด้วยเวลาจริงตั้งแต่ baseline
+        result = self.read(interval)
+        if time.monotonic() >= self.next_discover:
+            self.discover()
+        return result
+
+    def read(self, interval):
+        """อ่านค่ารวมของสมาชิกปัจจุบันโดยไม่ค้นหาลูกใหม่"""
+        root = super().sample(interval)
+        total_cpu, total_rss = root.cpu, root.ram * MB
+        breakdown = [ChildSample(self.pid, self.name, root.cpu, root.ram)]
+        for key, member in list(self.members.items()):
+            proc = member[0]
+            try:
+                with proc.oneshot():
+                    cpu_time = cpu_seconds(proc.cpu_times())
+                    now = time.monotonic()
+                    rss = proc.memory_info().rss
+            except psutil.Error:
+                del self.members[key]
+                continue
+            elapsed = now - member[3] or interval  # ลูกที่เพิ่งพบนับจาก baseline ตอนค้นหา ไม่ใช่ทั้ง tick
+            cpu = (cpu_time - member[2]) / elapsed * 100 / self.cpu_count if elapsed > 0 else 0.0
+            member[2] = cpu_time
+            member[3] = now
+            total_cpu += cpu
+            total_rss += rss
+            breakdown.append(ChildSample(key[0], member[1], cpu, rss / MB))
+        self.breakdown = breakdown
+        return Sample(total_cpu, total_rss / MB, total_rss / self.total_ram * 100)
+
+    def top_children(self, n=5):
+        """ลูกที่ใช้ CPU มากที่สุด n ตัว (ไม่รวมโปรเซสหลัก)"""
+        return sorted(self.breakdown[1:], key=lambda c: c.cpu, reverse=True)[:n]
@@ -0,0 +1,84 @@
+import time
+from collections import namedtuple
+
+# ข้อมูลของแต่ละ tick ที่ scheduler ปล่อยออกมา
+# index    = ลำดับ deadline (นับรวม tick ที่พลาดไปด้วย)
+# time     = เวลาจริงที่เก็บตัวอย่าง (epoch วินาที)
+# interval = ระยะห่างจริงจากตัวอย่างก่อนหน้า (วินาที, วัดด้วย monotonic)
+# missed   = จำนวน tick ที่พลาดสะสมตั้งแต่เริ่ม
+Tick = namedtuple("Tick", ["index", "time", "interval", "missed"])
+
+
+class DeadlineScheduler:
+    """
+    ตัวตั้งเวลาการเก็บตัวอย่างแบบ deadline คงที่บนนาฬิกา monotonic
+    - deadline ที่ k = start + k * interval จึงไม่มีการสะสมความคลาดเคลื่อน (drift)
+    - ถ้างานในรอบก่อนช้าจนเลย deadline ไปแล้ว จะข้าม tick เหล่านั้นและนับเป็น missed
+      แทนการเลื่อนเวลาทั้งชุดออกไป
+    """
+
+    def __init__(self, interval, clock=time.monotonic, sleep=time.sleep, wall_clock=time.time):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = float(interval)
+        self.clock = clock
+        self.sleep = sleep
+        self.wall_clock = wall_clock
+        self.start()
+
+    def start(self):
+        """ตั้งจุดเริ่มต้นใหม่ที่เวลาปัจจุบัน (tick ที่ 0)"""
+        now = self.clock()
+        self.anchor = now
+        self.anchor_index = 0
+        self.next_index = 1
+        self.last_time = now
+        self.missed = 0
+        self.fired = 0
+        return now
+
+    def set_interval(self, interval):
+        """เปลี่ยน interval ระหว่างทำงาน โดยยึด deadline ล่าสุดเป็นจุดเริ่มใหม่"""
+        interval = float(interval)
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if interval == self.interval:
+            return
+        self.anchor = self.deadline(self.next_index - 1)
+        self.anchor_index = self.next_index - 1
+        self.interval = interval
+
+    def deadline(self, index):
+        return self.anchor + (index - self.anchor_index) * self.interval
+
+    def wait(self):
+        """รอจนถึง deadline ถัดไปแล้วคืนค่า Tick"""
+        delay = self.delay()
+        if delay > 0:
+            self.sleep(delay)
+        return self.fire()
+
+    def delay(self):
+        """วินาทีที่เหลือจนถึง deadline ถัดไป (0 ถ้าเลยแล้ว) ; engine ใช้กับ asyncio.sleep"""
+        return max(0.0, self.deadline(self.next_index) - self.clock())
+
+    def fire(self):
+        """คืน Tick ของเวลาปัจจุบัน (เรียกเมื่อถึง deadline แล้ว)"""
+        index = self.next_index
+        now = self.clock()
+        if now > self.deadline(index + 1):
+            # ช้ากว่ากำหนด: ข้ามไปยัง deadline ล่าสุดที่ผ่านมาแล้ว
+            latest = self.anchor_index + int((now - self.anchor) / self.interval)
+            if latest > index:
+                self.missed += latest - index
+                index = latest
+
+        interval = now - self.last_time
+        self.last_time = now
+        self.next_index = index + 1
+        self.fired += 1
+        return Tick(index, self.wall_clock(), interval, self.missed)
+
+    def expected_samples(self):
+        """จำนวนตัวอย่างที่ควรได้ตาม deadline ที่ผ่านมาแล้ว (= fired + missed)"""
+        return self.fired + self.missed
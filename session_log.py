@@ -0,0 +1,200 @@
+import os
+import sys
+import csv
+import json
+import struct
+import threading
+import time
+import numpy as np
+from datetime import datetime
+from metrics import header, export_value
+
+# รูปแบบไฟล์ session (.mlog)
+#   MAGIC | ความยาว header (uint32) | header JSON (source, pid, start, fields) | record ...
+# แต่ละ record เป็น float64 ต่อ field (little-endian) ขนาดคงที่ จึงอ่านต่อได้แม้ไฟล์ถูกตัดกลางคัน
+# header JSON เติมช่องว่างท้ายให้ record เริ่มที่ offset หาร 8 ลงตัว (memory map เป็น float64 ได้ตรง ๆ)
+MAGIC = b"MONLOG1\n"
+FIELDS = ("time", "cpu", "ram", "interval")
+SESSION_DIR = "sessions"
+
+
+_second_cache = (None, "")
+
+
+def format_timestamp(epoch):
+    """แปลงเวลา epoch เป็นข้อความ YYYY-MM-DD HH:MM:SS.mmm (strftime เฉพาะเมื่อวินาทีเปลี่ยน)"""
+    global _second_cache
+    second = int(epoch)
+    cached_second, prefix = _second_cache
+    if second != cached_second:
+        prefix = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+        _second_cache = (second, prefix)
+    return f"{prefix}.{int((epoch - second) * 1000):03d}"
+
+
+def session_path(directory=SESSION_DIR, tag=""):
+    """ชื่อไฟล์ session ใหม่ตามเวลาปัจจุบัน ; tag (เช่น PID) ต่อท้ายเพื่อแยกหลาย session ที่เริ่มพร้อมกัน"""
+    suffix = f"_{tag}" if tag else ""
+    return os.path.join(directory, f"session_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{suffix}.mlog")
+
+
+class SessionLogWriter:
+    """
+    เขียนตัวอย่างลงไฟล์แบบ append-only ระหว่าง monitor
+    - รวม record ไว้ในหน่วยความจำแล้วเขียนทีละชุด (batch_size record)
+    - flush + fsync ทุก fsync_interval วินาที ข้อมูลที่อาจหายเมื่อเครื่องดับจึงไม่เกินช่วงนี้
+    - append/flush ป้องกันด้วย lock เพราะ GUI อาจสั่ง flush ก่อน export ขณะ worker กำลังเขียน
+    """
+
+    def __init__(self, path, source, pid=None, fields=FIELDS, batch_size=256, fsync_interval=5.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.source = source
+        self.fields = tuple(fields)
+        self.record = struct.Struct("<" + "d" * len(self.fields))
+        self.batch_bytes = batch_size * self.record.size
+        self.fsync_interval = fsync_interval
+        self.pending = bytearray()
+        self.count = 0
+        self.lock = threading.Lock()
+        self.closed = False
+
+        header = json.dumps({
+            "source": source,
+            "pid": pid,
+            "start": time.time(),
+            "fields": list(self.fields),
+        }).encode("utf-8")
+        header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+        self.file = open(path, "wb")
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        self._sync()
+
+    def append(self, *values):
+        with self.lock:
+            if self.closed:
+                return
+            self.pending += self.record.pack(*values)
+            self.count += 1
+            if len(self.pending) >= self.batch_bytes:
+                self._write()
+            if time.monotonic() - self.last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _write(self):
+        if self.pending:
+            self.file.write(self.pending)
+            self.pending.clear()
+
+    def _sync(self):
+        self._write()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_sync = time.monotonic()
+
+    def flush(self):
+        """เขียนข้อมูลที่ค้างทั้งหมดลงไฟล์ (เรียกก่อนอ่านไฟล์ระหว่าง monitor)"""
+        with self.lock:
+            if not self.closed:
+                self._write()
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self._sync()
+            self.file.close()
+            self.closed = True
+
+
+class SessionLog:
+    """อ่านไฟล์ session ; record ที่เขียนไม่ครบ (เช่นเครื่องดับ) ท้ายไฟล์จะถูกข้าม"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a session log")
+            (size,) = struct.unpack("<I", f.read(4))
+            self.meta = json.loads(f.read(size).decode("utf-8"))
+        self.data_offset = len(MAGIC) + 4 + size
+        self.fields = tuple(self.meta["fields"])
+        self.source = self.meta.get("source", "")
+        self.extra = self.fields[len(FIELDS):]  # metric เพิ่มเติมต่อท้าย interval (ดู metrics.METRICS)
+        self.record = struct.Struct("<" + "d" * len(self.fields))
+
+    def __len__(self):
+        return (os.path.getsize(self.path) - self.data_offset) // self.record.size
+
+    def time_range(self):
+        """(เวลาตัวอย่างแรก, เวลาตัวอย่างสุดท้าย) เป็น epoch ; ไฟล์ว่างคืน (start, start)"""
+        n = len(self)
+        start = self.meta.get("start", 0.0)
+        if not n:
+            return start, start
+        size = self.record.size
+        with open(self.path, "rb") as f:
+            f.seek(self.data_offset)
+            first = self.record.unpack(f.read(size))[0]
+            f.seek(self.data_offset + (n - 1) * size)
+            last = self.record.unpack(f.read(size))[0]
+        return first, last
+
+    def array(self):
+        """
+        ทุก record เป็น numpy array (n, len(fields)) แบบ memory map: เปิดได้ทันทีไม่ว่าไฟล์ใหญ่แค่ไหน
+        OS อ่านจากดิสก์เฉพาะหน้าที่ถูกใช้จริง ; record ที่เขียนไม่ครบท้ายไฟล์ถูกตัดออก
+        """
+        n = len(self)
+        if not n:
+            return np.empty((0, len(self.fields)))
+        return np.memmap(self.path, dtype="<f8", mode="r", offset=self.data_offset, shape=(n, len(self.fields)))
+
+    def flush(self):
+        """ไฟล์ที่อ่านอย่างเดียวไม่มีข้อมูลค้าง (ให้ใช้แทน SessionLogWriter ตอน export ได้)"""
+
+    def iter_records(self, chunk=4096):
+        """คืน tuple ของค่าตาม self.fields ทีละ record (อ่านไฟล์ทีละ chunk record)"""
+        size = self.record.size
+        with open(self.path, "rb") as f:
+            f.seek(self.data_offset)
+            while True:
+                block = f.read(chunk * size)
+                usable = len(block) - len(block) % size
+                if usable:
+                    yield from self.record.iter_unpack(block[:usable])
+                if len(block) < chunk * size:
+                    break
+
+    def headers(self):
+        """หัวคอลัมน์ของ iter_rows"""
+        return ["Time", "CPU (%)", "RAM (MB)", "Interval (s)", *map(header, self.extra), "Source"]
+
+    def iter_rows(self):
+        """แถวรูปแบบเดียวกับตาราง: (Time, CPU, RAM, Interval, metric เพิ่มเติม ..., Source)"""
+        source = self.source
+        for t, *values in self.iter_records():
+            yield (format_timestamp(t), *map(export_value, values), source)
+
+
+def recover_to_csv(path, out_path):
+    """แปลงไฟล์ session (รวมถึงไฟล์ที่ค้างจากโปรแกรมปิดผิดปกติ) เป็น CSV"""
+    log = SessionLog(path)
+    with open(out_path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(log.headers())
+        writer.writerows(log.iter_rows())
+    return len(log)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python session_log.py <session.mlog> [output.csv]")
+        sys.exit(1)
+    src = sys.argv[1]
+    dst = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(src)[0] + ".csv"
+    n = recover_to_csv(src, dst)
+    print(f"📁 Recovered {n} samples to {os.path.abspath(dst)}")
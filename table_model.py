@@ -0,0 +1,74 @@
+from functools import partial
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from metrics import header, format_value
+
+
+class SampleTableModel(QAbstractTableModel):
+    """
+    โมเดลตารางที่อ่านข้อมูลจาก SampleStore โดยตรง (ไม่สร้าง QTableWidgetItem ต่อ cell)
+    - columns = list ของ (หัวตาราง, ชื่อคอลัมน์ใน store หรือ "source", รูปแบบตัวเลข / ฟังก์ชันแปลงค่า / None)
+      metric เพิ่มเติมของ store (store.extra) ถูกแทรกเป็นคอลัมน์ก่อน Source อัตโนมัติ
+    - แปลงค่าเป็นข้อความเฉพาะ cell ที่กำลังแสดงใน data()
+    - เพิ่มข้อมูลทีละชุดด้วย beginInsertRows ครั้งเดียวต่อชุด
+    - เมื่อ store เต็ม (capacity) ตัดแถวเก่าทีละก้อน 10% ของ capacity ด้วย beginRemoveRows
+      (ย้ายข้อมูลไม่บ่อย และ view เลื่อนตามได้ถูกต้อง)
+    """
+
+    def __init__(self, columns, store, parent=None):
+        super().__init__(parent)
+        self.base_columns = columns
+        self.store = store
+        self.columns = self.make_columns()
+
+    def make_columns(self):
+        extra = [(header(name), name, partial(format_value, name)) for name in self.store.extra]
+        base = [c for c in self.base_columns if c[1] != "source"]
+        return base + extra + [c for c in self.base_columns if c[1] == "source"]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        _, column, fmt = self.columns[index.column()]
+        val = self.store.value(column, index.row())
+        if callable(fmt):
+            return fmt(val)
+        return format(val, fmt) if fmt else str(val)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section][0]
+        return str(self.store.dropped + section + 1)  # เลขแถวนับต่อจากแถวที่ถูกตัดทิ้ง
+
+    def extend(self, rows):
+        """เพิ่มแถวชุดใหม่ (time, cpu, ram, interval, *extra) ท้ายตาราง"""
+        if not rows:
+            return
+        capacity = self.store.capacity
+        if capacity:
+            if len(rows) > capacity:
+                self.store.dropped += len(rows) - capacity
+                rows = rows[-capacity:]
+            overflow = len(self.store) + len(rows) - capacity
+            if overflow > 0:
+                drop = min(len(self.store), max(overflow, capacity // 10))
+                self.beginRemoveRows(QModelIndex(), 0, drop - 1)
+                self.store.drop_oldest(drop)
+                self.endRemoveRows()
+        first = len(self.store)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.store.extend(rows)
+        self.endInsertRows()
+
+    def clear(self, source=None, extra=None):
+        self.beginResetModel()
+        self.store.clear(source, extra)
+        self.columns = self.make_columns()
+        self.endResetModel()
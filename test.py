@@ -1,46 +1,347 @@
-import sys, psutil, time, threading, csv, os
-from datetime import datetime
+import sys, psutil, time, threading, os, asyncio
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QLabel,
-    QFileDialog, QHBoxLayout, QDoubleSpinBox, QCheckBox,
-    QTableWidget, QTableWidgetItem, QSplitter, QHeaderView
+    QFileDialog, QHBoxLayout, QDoubleSpinBox, QSpinBox, QCheckBox,
+    QTableView, QSplitter, QHeaderView, QComboBox, QStackedWidget, QDialog,
+    QToolButton, QMenu
 )
-from PyQt5.QtCore import Qt
-from openpyxl import Workbook
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtCore import Qt, QTimer
 from matplotlib.backends.backend_qt5agg import (
     FigureCanvasQTAgg as FigureCanvas,
     NavigationToolbar2QT as NavigationToolbar
 )
 from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+import numpy as np
+from downsample import MinMaxBins
+from rollup import Rollup
+from table_model import SampleTableModel
+from pipeline import SampleChannel, ChannelPump
+from session_log import SessionLogWriter, session_path, format_timestamp, FIELDS, SESSION_DIR
+from sample_store import SampleStore
+from discovery import ProcessIndex
+from matcher import MatchRules, CandidateRanker
+from filewatch import FileWatcher, PID_FILE, parse_pid
+from export_worker import start_export
+from scheduler import DeadlineScheduler
+from sampler import ProcessTreeSampler, create_sampler
+from pool import SamplerPool
+from engine import monitor as monitor_samples, monitor_pool
+from instrument import STATS, clock
+from metrics import METRICS, header
+from replay import SessionReplay, MAX_SPEED
+from analytics import StreamAnalyzer
+
+# คอลัมน์ของตาราง: อ่านจาก SampleStore โดยตรง (แปลงเป็นข้อความเฉพาะ cell ที่แสดง)
+TABLE_COLUMNS = [
+    ("Time", "time", format_timestamp),
+    ("CPU (%)", "cpu", ".2f"),
+    ("RAM (MB)", "ram", ".2f"),
+    ("Interval (s)", "interval", ".3f"),
+    ("Source", "source", None),
+]
+
+def format_elapsed(seconds, pos=None):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+class TimedCanvas(FigureCanvas):
+    """FigureCanvas ที่จับเวลาการวาดทั้ง figure (ช่วงที่แพงที่สุดของกราฟ)"""
+
+    def draw(self):
+        t0 = clock()
+        super().draw()
+        STATS.record("draw", t0)
+
+class DiagnosticsDialog(QDialog):
+    """แสดง latency histogram ของแต่ละขั้นตอน + CPU/RSS ของตัว monitor เอง (อัปเดตทุกวินาที)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics")
+        self.label = QLabel()
+        self.label.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout = QVBoxLayout()
+        layout.addWidget(self.label)
+        self.setLayout(layout)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        self.label.setText(STATS.format_report())
 
 class PlotCanvas(QWidget):
+    """
+    กราฟ CPU/RAM แบบเพิ่มข้อมูลทีละชุด
+    - เส้นถูกสร้างครั้งเดียวแล้วอัปเดตด้วย set_data (ไม่ ax.clear() ทุกครั้ง)
+    - ข้อมูลถูกลดจุดด้วย min/max binning ตามความกว้าง pixel ของกราฟ
+    - ถ้าแกนไม่ต้องขยาย จะ blit เฉพาะเส้น แทนการวาดทั้ง figure ใหม่
+    - ประวัติเก็บใน rollup.Rollup (ข้อมูลดิบล่าสุด + 1 s/10 s/1 min/10 min) หน่วยความจำคงที่แม้ run หลายวัน
+      ตอนซูมจะเลือกชั้นที่ละเอียดที่สุดที่ครอบคลุมช่วงที่เห็น
+    - metric เพิ่มเติมของ session มี Rollup ของตัวเอง (ค่าเก็บในช่อง cpu) เลือกแสดงได้ทีละตัวบนแกนขวา
+    - session ที่มีสถิติต่อ window (cpu_max / ram_max จาก CLI) วาดค่าสูงสุดเป็นเส้นจางคู่กับค่าเฉลี่ย (peak band)
+    """
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.figure = Figure()
         self.ax = self.figure.add_subplot(111)
-        self.canvas = FigureCanvas(self.figure)
+        self.canvas = TimedCanvas(self.figure)
         self.toolbar = NavigationToolbar(self.canvas, self)
+        for action in self.toolbar.actions():
+            if action.text() == "Home":  # ทำงานหลัง home ของ toolbar เอง: กลับไปตามข้อมูลล่าสุด
+                action.triggered.connect(self.follow_latest)
+        self.metric_combo = QComboBox()
+        self.metric_combo.currentIndexChanged.connect(self.on_metric_changed)
 
         layout = QVBoxLayout()
-        layout.addWidget(self.toolbar)
+        top = QHBoxLayout()
+        top.addWidget(self.toolbar, 1)
+        top.addWidget(QLabel("Right axis:"))
+        top.addWidget(self.metric_combo)
+        layout.addLayout(top)
         layout.addWidget(self.canvas)
         self.setLayout(layout)
         self.ax.set_title("CPU and RAM Usage Over Time")
-        self.ax.set_xlabel("Time")
+        self.ax.set_xlabel("Elapsed Time")
         self.ax.set_ylabel("Usage")
+        self.ax.grid(True)
+        self.ax.xaxis.set_major_formatter(FuncFormatter(format_elapsed))
+        self.cpu_line, = self.ax.plot([], [], '-', label='CPU (%)', animated=True)
+        self.ram_line, = self.ax.plot([], [], '-', label='RAM (MB)', animated=True)
+        self.cpu_peak_line, = self.ax.plot([], [], '-', color=self.cpu_line.get_color(), alpha=0.35,
+                                           linewidth=0.8, animated=True)
+        self.ram_peak_line, = self.ax.plot([], [], '-', color=self.ram_line.get_color(), alpha=0.35,
+                                           linewidth=0.8, animated=True)
+        self.ax2 = self.ax.twinx()  # แกนขวาของ metric เพิ่มเติมที่เลือก
+        self.extra_line, = self.ax2.plot([], [], '-', color='tab:green', linewidth=0.8, animated=True)
+        self.ax2.set_visible(False)
         self.figure.tight_layout()
 
-    def plot(self, timestamps, cpu_vals, ram_vals):
-        self.ax.clear()
-        self.ax.plot(timestamps, cpu_vals, '-o', label='CPU (%)')
-        self.ax.plot(timestamps, ram_vals, '-o', label='RAM (MB)')
-        self.ax.legend()
-        self.ax.set_xlabel("Time")
-        self.ax.set_ylabel("Usage")
-        self.ax.set_title("CPU and RAM Usage Over Time")
-        self.ax.grid(True)
-        self.figure.autofmt_xdate()
-        self.canvas.draw()
+        self.background = None
+        self.setting_limits = False
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.canvas.mpl_connect('resize_event', self.on_resize)
+        self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+        self.clear()
+
+    def clear(self, metrics=()):
+        """ล้างกราฟ ; metrics = ชื่อ metric เพิ่มเติมที่ต่อท้ายแถวของ session ใหม่"""
+        self.history = Rollup()  # แกน x = เวลาที่ผ่านไป
+        self.extra_history = [Rollup() for _ in metrics]
+        self.elapsed = 0.0
+        self.follow = True  # False เมื่อผู้ใช้ซูม/เลื่อนกราฟจนไม่เห็นตัวอย่างล่าสุด
+        self.cpu_bins = MinMaxBins(self.pixel_width())
+        self.ram_bins = MinMaxBins(self.pixel_width())
+        self.cpu_line.set_data([], [])
+        self.ram_line.set_data([], [])
+        self.peaks = []  # (เส้น, ตำแหน่งใน metrics) ของ cpu_max / ram_max ที่ session นี้มี
+        for column, line in (("cpu", self.cpu_peak_line), ("ram", self.ram_peak_line)):
+            name = f"{column}_max"
+            line.set_data([], [])
+            line.set_label(header(name) if name in metrics else "_nolegend_")
+            if name in metrics:
+                self.peaks.append((line, metrics.index(name)))
+        self.peak_bins = [MinMaxBins(self.pixel_width()) for _ in self.peaks]
+        self.ax.legend(loc="upper left")
+        self.set_limits(1.0, 1.0)
+        self.metric_combo.blockSignals(True)
+        self.metric_combo.clear()
+        self.metric_combo.addItem("None", None)
+        for i, name in enumerate(metrics):
+            self.metric_combo.addItem(header(name), i)
+        self.metric_combo.blockSignals(False)
+        self.metric_combo.setEnabled(bool(metrics))
+        self.on_metric_changed(0)
+
+    def pixel_width(self):
+        return max(2, int(self.ax.bbox.width))
+
+    def append(self, rows, redraw=True):
+        """เพิ่มแถว (time, cpu, ram, interval, *extra) ; แกน x คือเวลาที่ผ่านไปสะสมจาก interval"""
+        if not rows:
+            return
+        t = np.empty(len(rows))
+        for i, row in enumerate(rows):
+            self.elapsed += row[3]
+            t[i] = self.elapsed
+            self.history.add(self.elapsed, row[1], row[2], row[3])
+            for history, value in zip(self.extra_history, row[4:]):
+                if value == value:  # NaN = อ่านไม่ได้ ไม่ลงกราฟ
+                    history.add(self.elapsed, value, 0.0, row[3])
+        self.cpu_bins.add(t, [row[1] for row in rows])
+        self.ram_bins.add(t, [row[2] for row in rows])
+        for (_, i), bins in zip(self.peaks, self.peak_bins):
+            y = np.array([row[4 + i] for row in rows])
+            valid = ~np.isnan(y)
+            bins.add(t[valid], y[valid])
+        if self.metric is not None:
+            y = np.array([row[4 + self.metric] for row in rows])
+            valid = ~np.isnan(y)
+            self.extra_bins.add(t[valid], y[valid])
+        if redraw:
+            self.refresh()
+
+    def refresh(self):
+        if not len(self.history):
+            return
+        if self.follow:
+            self.cpu_line.set_data(*self.cpu_bins.points())
+            self.ram_line.set_data(*self.ram_bins.points())
+            x_max = self.ax.get_xlim()[1]
+            y_max = self.ax.get_ylim()[1]
+            top = max(self.cpu_bins.max(), self.ram_bins.max())
+            for (line, _), bins in zip(self.peaks, self.peak_bins):
+                line.set_data(*bins.points())
+                top = max(top, bins.max())
+            grow = False
+            if self.metric is not None:
+                self.extra_line.set_data(*self.extra_bins.points())
+                extra_top = self.extra_bins.max()
+                if extra_top > self.ax2.get_ylim()[1]:
+                    self.ax2.set_ylim(0, extra_top * 1.2)
+                    grow = True
+            if grow or self.elapsed > x_max or top > y_max:
+                # ขยายแกนแบบเท่าตัว จำนวนครั้งที่ต้องวาดใหม่ทั้งหมดจึงเป็น O(log n)
+                self.set_limits(max(self.elapsed * 1.25, x_max), max(top * 1.2, y_max))
+                self.canvas.draw_idle()
+                return
+        else:
+            self.set_view_data()
+        self.blit()
+
+    def set_view_data(self):
+        x0, x1 = self.ax.get_xlim()
+        width = self.pixel_width()
+        self.cpu_line.set_data(*self.history.envelope("cpu", x0, x1, width))
+        self.ram_line.set_data(*self.history.envelope("ram", x0, x1, width))
+        for line, i in self.peaks:
+            line.set_data(*self.extra_history[i].envelope("cpu", x0, x1, width))
+        if self.metric is not None:
+            self.extra_line.set_data(*self.extra_history[self.metric].envelope("cpu", x0, x1, width))
+
+    def set_limits(self, x_max, y_max):
+        self.setting_limits = True
+        self.ax.set_xlim(0, x_max)
+        self.ax.set_ylim(0, y_max)
+        self.setting_limits = False
+
+    def blit(self):
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        t0 = clock()
+        self.canvas.restore_region(self.background)
+        self.draw_lines()
+        self.canvas.blit(self.ax.bbox)
+        STATS.record("blit", t0)
+
+    def draw_lines(self):
+        self.ax.draw_artist(self.cpu_line)
+        self.ax.draw_artist(self.ram_line)
+        for line, _ in self.peaks:
+            self.ax.draw_artist(line)
+        if self.metric is not None:
+            self.ax2.draw_artist(self.extra_line)
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_lines()
+
+    def on_metric_changed(self, index):
+        """เลือก metric บนแกนขวา: สร้าง bin ใหม่จาก Rollup ของ metric นั้นทั้ง session"""
+        self.metric = self.metric_combo.itemData(index) if index >= 0 else None
+        self.extra_bins = MinMaxBins(self.pixel_width())
+        self.extra_line.set_data([], [])
+        self.ax2.set_visible(self.metric is not None)
+        if self.metric is not None:
+            name = self.metric_combo.itemText(index)
+            self.ax2.set_ylabel(name)
+            self.extra_line.set_label(name)
+            self.extra_bins.add(*self.extra_history[self.metric].envelope("cpu", 0.0, self.elapsed, self.pixel_width()))
+            self.ax2.set_ylim(0, max(self.extra_bins.max() * 1.2, 1.0))
+            if self.follow:
+                self.extra_line.set_data(*self.extra_bins.points())
+            else:
+                self.set_view_data()
+        self.figure.tight_layout()  # เว้นที่ให้ป้ายแกนขวา
+        self.canvas.draw_idle()
+
+    def on_resize(self, event):
+        # จำนวน bin ผูกกับความกว้าง pixel: คำนวณใหม่จากชั้นของ rollup ที่ครอบคลุมทั้ง session เมื่อขนาดเปลี่ยน
+        width = self.pixel_width()
+        if width == self.cpu_bins.n_bins:
+            return
+        self.cpu_bins = MinMaxBins(width)
+        self.ram_bins = MinMaxBins(width)
+        self.extra_bins = MinMaxBins(width)
+        self.cpu_bins.add(*self.history.envelope("cpu", 0.0, self.elapsed, width))
+        self.ram_bins.add(*self.history.envelope("ram", 0.0, self.elapsed, width))
+        self.peak_bins = [MinMaxBins(width) for _ in self.peaks]
+        for (_, i), bins in zip(self.peaks, self.peak_bins):
+            bins.add(*self.extra_history[i].envelope("cpu", 0.0, self.elapsed, width))
+        if self.metric is not None:
+            self.extra_bins.add(*self.extra_history[self.metric].envelope("cpu", 0.0, self.elapsed, width))
+        self.refresh()
+
+    def on_xlim_changed(self, ax):
+        if self.setting_limits:
+            return
+        x0, x1 = self.ax.get_xlim()
+        self.follow = x0 <= self.elapsed <= x1  # ยังเห็นตัวอย่างล่าสุด: ตามข้อมูลใหม่ต่อ
+        if not self.follow and len(self.history):
+            self.set_view_data()
+
+    def follow_latest(self):
+        """ปุ่ม Home: แกน x ครอบคลุมทั้ง session อีกครั้งและตามข้อมูลล่าสุด"""
+        self.follow = True
+        self.set_limits(max(self.elapsed * 1.25, 1.0), self.ax.get_ylim()[1])
+        self.refresh()
+        self.canvas.draw_idle()
+
+    def save(self, path):
+        # เส้นแบบ animated จะไม่ถูกวาดตอน savefig ต้องปิดชั่วคราว
+        lines = (self.cpu_line, self.ram_line, self.cpu_peak_line, self.ram_peak_line, self.extra_line)
+        for line in lines:
+            line.set_animated(False)
+        try:
+            self.figure.savefig(path)
+        finally:
+            for line in lines:
+                line.set_animated(True)
+
+class TargetView:
+    """ข้อมูลและกราฟของ target หนึ่งตัวในโหมด multi-target (ใช้บน GUI thread เท่านั้น)"""
+
+    def __init__(self, pid, source, log, parent=None):
+        self.pid = pid
+        self.log = log  # SessionLogWriter ของ target (worker เขียน, GUI flush ก่อน export)
+        metrics = log.fields[len(FIELDS):]
+        self.store = SampleStore(source, extra=metrics)
+        self.table_model = SampleTableModel(TABLE_COLUMNS, self.store)
+        self.graph = PlotCanvas(parent)
+        self.graph.clear(metrics)
+        self.pending = []
+        self.running = True
+
+    def title(self):
+        state = "" if self.running else " (stopped)"
+        return f"[{self.pid}] {self.store.source[:60]}{state}"
+
+    def flush(self, redraw):
+        if not self.pending:
+            return
+        t0 = clock()
+        self.table_model.extend(self.pending)
+        t1 = clock()
+        STATS.record("table", t0)
+        self.graph.append(self.pending, redraw)
+        STATS.record("plot", t1)
+        self.pending.clear()
 
 class MonitorApp(QWidget):
     def __init__(self):
@@ -51,7 +352,7 @@ class MonitorApp(QWidget):
         self.monitoring = False
         self.training_source = "Manual"
         self.training_pid = None
-        self.data = []
+        self.store = SampleStore()  # ตัวอย่างทั้ง session แบบ columnar (time เป็น epoch)
         self.buffered_data = []
         self.sampling_rate = 1.0
         self.training_start_time = None
@@ -59,139 +360,243 @@ class MonitorApp(QWidget):
         self.update_interval = 2
         self.initial_buffer_flushed = False # เพิ่มตัวแปรสถานะ
 
-        self.table = QTableWidget(0, 4)
-        self.table.setHorizontalHeaderLabels(["Time", "CPU (%)", "RAM (MB)", "Source"])
-        header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.Stretch)
+        self.scheduler = DeadlineScheduler(self.sampling_rate)
+        self.sampler = None
+        # ค่าตั้งค่าที่ worker thread อ่าน (สำเนาจาก widget ผ่าน signal)
+        self.auto_start = False
+        self.tree_mode = False
+        self.multi_mode = False
+        self.metrics = ()  # metric เพิ่มเติมที่เลือก (ใช้กับ session ถัดไป)
+        self.pool = None  # SamplerPool ของโหมด multi-target (worker thread)
+        self.matlab_target = None
+        self.next_scan = 0.0
+        self.target_views = {}  # pid -> TargetView (GUI thread)
+        self.channel = SampleChannel()
+        self.rules = MatchRules.load()
+        self.discovery = ProcessIndex(self.rules.classify)
+        self.ranker = CandidateRanker()
+        self.detect_reason = ""
+        # ไฟล์ PID ของ MATLAB: watcher เก็บสถานะไว้ ลูปไม่ต้องเปิดไฟล์เองทุกรอบ
+        self.handshake = FileWatcher(names=(PID_FILE,)).start()
+        self.session_log = None  # ไฟล์ append-only ของ session ปัจจุบัน/ล่าสุด (worker thread เป็นเจ้าของ)
+        self.replay_log = None  # ไฟล์ของ replay ล่าสุด (GUI thread) ; export ใช้แทน session_log จนกว่าจะเริ่ม session สด
+        self.replay = None  # SessionReplay ที่กำลังเล่น (worker thread) แทน sampler จริง
+        self.replay_request = None  # SessionReplay ที่ GUI เปิดไว้ รอ worker รับไปเล่น
+        self.analyzer = StreamAnalyzer()  # สถิติ/event ของ session ปัจจุบัน (worker thread)
+        self.last_event = ""  # ข้อความ event ล่าสุด (GUI thread)
+
+        self.table_model = SampleTableModel(TABLE_COLUMNS, self.store)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        table_header = self.table.horizontalHeader()
+        # จำนวนคอลัมน์ขึ้นกับ metric เพิ่มเติม: ทุกคอลัมน์กว้างตามเนื้อหา ยกเว้น Source (คอลัมน์สุดท้าย) ยืดเต็ม
+        table_header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        table_header.setStretchLastSection(True)
+        table_header.setResizeContentsPrecision(100)  # วัดความกว้างคอลัมน์จาก 100 แถว ไม่ใช่ทั้งตาราง
 
         self.status_label = QLabel("Status: Idle")
         self.source_label = QLabel("")
+        self.children_label = QLabel("")
 
         self.sampling_spinbox = QDoubleSpinBox()
-        self.sampling_spinbox.setRange(0.1, 10.0)
+        self.sampling_spinbox.setRange(0.01, 10.0)  # 10 ms ใช้ได้จริงกับ ProcStatSampler (Linux)
         self.sampling_spinbox.setValue(1.0)
 
         self.auto_start_checkbox = QCheckBox("Auto Start When Training Detected")
         self.plot_mode_checkbox = QCheckBox("Plot only after training finished")
         self.buffer_mode_checkbox = QCheckBox("Use sampling-based update (tick = sampling rate, untick = buffered)")
         self.buffer_mode_checkbox.setChecked(False)
+        self.tree_mode_checkbox = QCheckBox("Include child processes (DataLoader / parallel pool workers)")
+        self.multi_mode_checkbox = QCheckBox("Monitor every training process on this node (multi-target)")
+        self.target_combo = QComboBox()
+        self.target_combo.addItem("Single target", None)
+        self.metrics_button = QToolButton()
+        self.metrics_button.setText("Extra metrics: none")
+        self.metrics_button.setToolTip("Read together with CPU/RAM in one batch; applies to the next session")
+        self.metrics_button.setPopupMode(QToolButton.InstantPopup)
+        metrics_menu = QMenu(self.metrics_button)
+        for name, metric in METRICS.items():
+            action = metrics_menu.addAction(metric.header)
+            action.setCheckable(True)
+            action.setData(name)
+            action.toggled.connect(self.set_metrics)
+        self.metrics_button.setMenu(metrics_menu)
+        self.fps_spinbox = QSpinBox()
+        self.fps_spinbox.setRange(1, 60)
+        self.fps_spinbox.setValue(10)
+        self.replay_speed_spinbox = QSpinBox()
+        self.replay_speed_spinbox.setRange(1, int(MAX_SPEED))
+        self.replay_speed_spinbox.setValue(100)
+        self.replay_speed_spinbox.setSuffix("x")
+
+        self.sampling_spinbox.valueChanged.connect(self.set_sampling_rate)
+        self.auto_start_checkbox.toggled.connect(self.set_auto_start)
+        self.tree_mode_checkbox.toggled.connect(self.set_tree_mode)
+        self.multi_mode_checkbox.toggled.connect(self.set_multi_mode)
+        self.target_combo.currentIndexChanged.connect(self.show_target)
+        self.replay_speed_spinbox.valueChanged.connect(self.set_replay_speed)
 
         self.btn_reset = QPushButton("Reset Table")
         self.btn_export_excel = QPushButton("Export to Excel")
         self.btn_export_csv = QPushButton("Export to CSV")
         self.btn_save_graph = QPushButton("Save Graph")
+        self.btn_diagnostics = QPushButton("Diagnostics")
+        self.btn_replay = QPushButton("Replay Session")
         self.btn_exit = QPushButton("Exit")
 
         self.btn_reset.clicked.connect(self.reset_table)
         self.btn_export_excel.clicked.connect(self.export_excel)
         self.btn_export_csv.clicked.connect(self.export_csv)
         self.btn_save_graph.clicked.connect(self.save_graph)
+        self.btn_diagnostics.clicked.connect(self.show_diagnostics)
+        self.btn_replay.clicked.connect(self.open_replay)
+        self.diagnostics = None
         self.btn_exit.clicked.connect(self.close)
 
         self.graph = PlotCanvas(self)
+        self.graph_stack = QStackedWidget()  # กราฟของ single target + กราฟของแต่ละ target
+        self.graph_stack.addWidget(self.graph)
         self.setup_ui()
+        self.pump = ChannelPump(self.channel, self.handle_events, self.fps_spinbox.value(), self)
+        self.fps_spinbox.valueChanged.connect(self.pump.set_fps)
         threading.Thread(target=self.monitor_loop, daemon=True).start()
 
+    def set_sampling_rate(self, value):
+        self.sampling_rate = value
+
+    def set_auto_start(self, checked):
+        self.auto_start = checked
+
+    def set_tree_mode(self, checked):
+        self.tree_mode = checked
+
+    def set_multi_mode(self, checked):
+        self.multi_mode = checked
+
+    def set_replay_speed(self, value):
+        replay = self.replay or self.replay_request
+        if replay is not None:
+            replay.set_speed(value)
+
+    def set_metrics(self, checked):
+        actions = self.metrics_button.menu().actions()
+        self.metrics = tuple(a.data() for a in actions if a.isChecked())
+        self.metrics_button.setText(f"Extra metrics: {', '.join(self.metrics) or 'none'}")
+
     def setup_ui(self):
         layout = QVBoxLayout()
         control_layout = QHBoxLayout()
 
         control_layout.addWidget(QLabel("Sampling Rate (s):"))
         control_layout.addWidget(self.sampling_spinbox)
+        control_layout.addWidget(QLabel("Refresh (fps):"))
+        control_layout.addWidget(self.fps_spinbox)
         control_layout.addWidget(self.btn_reset)
         control_layout.addWidget(self.btn_export_excel)
         control_layout.addWidget(self.btn_export_csv)
         control_layout.addWidget(self.btn_save_graph)
+        control_layout.addWidget(self.btn_diagnostics)
+        control_layout.addWidget(self.btn_replay)
+        control_layout.addWidget(QLabel("Speed:"))
+        control_layout.addWidget(self.replay_speed_spinbox)
         control_layout.addWidget(self.btn_exit)
 
         layout.addWidget(self.status_label)
         layout.addWidget(self.source_label)
+        layout.addWidget(self.children_label)
         layout.addWidget(self.auto_start_checkbox)
         layout.addWidget(self.plot_mode_checkbox)
         layout.addWidget(self.buffer_mode_checkbox)
+        layout.addWidget(self.tree_mode_checkbox)
+        layout.addWidget(self.multi_mode_checkbox)
+        target_layout = QHBoxLayout()
+        target_layout.addWidget(QLabel("Target:"))
+        target_layout.addWidget(self.target_combo, 1)
+        target_layout.addWidget(self.metrics_button)
+        layout.addLayout(target_layout)
 
         splitter = QSplitter(Qt.Horizontal)
         splitter.addWidget(self.table)
-        splitter.addWidget(self.graph)
+        splitter.addWidget(self.graph_stack)
         layout.addWidget(splitter)
         layout.addLayout(control_layout)
         self.setLayout(layout)
 
+    def current_view(self):
+        """TargetView ที่เลือกใน combo (None = single target)"""
+        return self.target_views.get(self.target_combo.currentData())
+
+    def show_target(self, index):
+        view = self.current_view()
+        if view is None:
+            self.table.setModel(self.table_model)
+            self.graph_stack.setCurrentWidget(self.graph)
+            return
+        self.table.setModel(view.table_model)
+        self.graph_stack.setCurrentWidget(view.graph)
+        view.graph.refresh()
+
     def reset_table(self):
-        self.data.clear()
+        view = self.current_view()
+        if view is not None:
+            view.table_model.clear()
+            view.graph.clear(view.store.extra)
+            self.status_label.setText("Table reset.")
+            return
+        self.table_model.clear()
         self.buffered_data.clear()
-        self.table.setRowCount(0)
-        self.graph.ax.clear()
-        self.graph.canvas.draw()
+        self.graph.clear(self.store.extra)
         self.status_label.setText("Table reset.")
         self.source_label.setText("")
+        self.children_label.setText("")
 
     def detect_training_process(self):
-        try:
-            with open("C:\\temp\\training_pid.txt", "r") as f:
-                pid = int(f.read().strip())
+        pid = parse_pid(self.handshake.text(PID_FILE))
+        if pid is not None:
+            try:
                 proc = psutil.Process(pid)
                 if proc.is_running():
                     cmd = ' '.join(proc.cmdline())
                     self.training_source = f"MATLAB (PID: {pid}) CMD: {cmd}"
                     self.training_pid = pid
+                    self.detect_reason = "PID file"
                     return True
-        except:
-            pass
-
-        my_pid = psutil.Process().pid
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if proc.pid == my_pid:
-                    continue
-                name = proc.info['name'].lower()
-                cmdline = ' '.join(proc.info.get('cmdline', [])).lower()
-                if "python" in name and ".py" in cmdline:
-                    self.training_source = f"Python: {cmdline}"
-                    self.training_pid = proc.pid
-                    return True
-            except:
-                continue
+            except psutil.Error:
+                pass
+
+        # อ่าน cmdline เฉพาะโปรเซสใหม่นับจาก scan ก่อน (ดู discovery.ProcessIndex)
+        # แล้วเลือก candidate ที่ใช้ CPU/RAM มากที่สุดในช่วงสังเกต
+        self.discovery.scan()
+        entry, reason = self.ranker.pick(self.discovery.candidates(self.rules.label))
+        if entry is not None:
+            self.training_source = f"Python: {entry.cmdline.lower()}"
+            self.training_pid = entry.pid
+            self.detect_reason = reason
+            return True
         return False
 
-    def get_training_process_resource(self):
-        try:
-            if self.training_pid:
-                proc = psutil.Process(self.training_pid)
-                proc.cpu_percent(interval=None)
-                cpu = proc.cpu_percent(interval=self.sampling_rate) / psutil.cpu_count()
-                ram = proc.memory_info().rss / (1024 * 1024)
-                return cpu, ram
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            self.finish_monitoring()
-        except Exception:
-            pass
-        return None, None
-
     def flush_buffer_to_table_and_graph(self):
         if not self.buffered_data:
             return
-        for rowdata in self.buffered_data:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            for i, val in enumerate(rowdata):
-                if i == 1 or i == 2:
-                    self.table.setItem(row, i, QTableWidgetItem(f"{val:.2f}"))
-                else:
-                    self.table.setItem(row, i, QTableWidgetItem(str(val)))
-
-        self.data.extend(self.buffered_data)
-
-        if not self.plot_mode_checkbox.isChecked():
-            timestamps = [d[0] for d in self.data]
-            cpu_vals = [d[1] for d in self.data]
-            ram_vals = [d[2] for d in self.data]
-            self.graph.plot(timestamps, cpu_vals, ram_vals)
+        t0 = clock()
+        self.table_model.extend(self.buffered_data)
+        STATS.record("table", t0)
+        self.update_children_label()
+        # ส่งเฉพาะแถวใหม่ให้กราฟ ; ถ้าเลือก plot หลังจบ จะเก็บข้อมูลไว้แต่ยังไม่วาด
+        t1 = clock()
+        self.graph.append(self.buffered_data, redraw=not self.plot_mode_checkbox.isChecked())
+        STATS.record("plot", t1)
 
         self.buffered_data.clear()
+        STATS.record("flush", t0)
+
+    def update_children_label(self):
+        if not isinstance(self.sampler, ProcessTreeSampler):
+            self.children_label.setText("")
+            return
+        top = ", ".join(f"{c.name}[{c.pid}] {c.cpu:.1f}% {c.ram:.0f}MB" for c in self.sampler.top_children())
+        self.children_label.setText(f"Child processes: {len(self.sampler.breakdown) - 1}  {top}")
 
     def get_dynamic_update_interval(self, elapsed_seconds):
         """คำนวณช่วงเวลาการแสดงผลแบบไดนามิกตามเงื่อนไขใหม่"""
@@ -208,106 +613,335 @@ class MonitorApp(QWidget):
         return 1800
 
     def monitor_loop(self):
+        # ทำงานบน worker thread: ห้ามแตะ widget ใด ๆ ส่งทุกอย่างผ่าน self.channel
+        # การเก็บตัวอย่างใช้ engine.monitor / monitor_pool บน event loop ของ thread นี้ (ชุดเดียวกับ CLI และ daemon)
+        try:
+            asyncio.run(self.run_worker())
+        except RuntimeError:
+            if threading.main_thread().is_alive():
+                raise
+            # โปรแกรมกำลังปิด: executor ของ run_blocking ไม่รับงานใหม่แล้ว worker (daemon) จบเงียบ ๆ
+
+    async def run_blocking(self, func, *args):
+        """เรียกฟังก์ชันที่รอแบบ blocking (เช่น FileWatcher.wait) โดยไม่บล็อก event loop ของ worker"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def run_worker(self):
         while True:
-            if not self.monitoring and self.auto_start_checkbox.isChecked():
-                if self.detect_training_process():
+            if self.replay_request is not None and not self.monitoring and self.pool is None:
+                await self.replay_session()
+                continue
+
+            if self.multi_mode and self.auto_start and not self.monitoring:
+                await self.monitor_targets()
+                continue
+
+            if not self.monitoring and self.auto_start:
+                t0 = clock()
+                found = self.detect_training_process()
+                STATS.record("detect", t0)
+                if found:
                     self.start_monitoring()
 
             if self.monitoring:
-                if 'matlab' in self.training_source.lower():
-                    if not os.path.exists("C:\\temp\\training_pid.txt"):
-                        self.finish_monitoring()
-                        continue
-
-                if not psutil.pid_exists(self.training_pid):
-                    self.finish_monitoring()
-                    continue
-
-                self.sampling_rate = self.sampling_spinbox.value()
-                cpu, ram = self.get_training_process_resource()
-
-                if cpu is not None and ram is not None:
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    self.buffered_data.append((timestamp, cpu, ram, self.training_source))
-                    
-                    is_sampling_mode = self.buffer_mode_checkbox.isChecked()
-
-                    if is_sampling_mode:
-                        self.flush_buffer_to_table_and_graph()
-                        self.last_update_time = time.time()
-                    else:
-                        elapsed = time.time() - self.training_start_time
-                        
-                        if not self.initial_buffer_flushed and elapsed >= 10:
-                            self.flush_buffer_to_table_and_graph()
-                            self.last_update_time = time.time()
-                            self.initial_buffer_flushed = True
-                        
-                        elif self.initial_buffer_flushed:
-                            self.update_interval = self.get_dynamic_update_interval(elapsed)
-                            if time.time() - self.last_update_time >= self.update_interval:
-                                self.flush_buffer_to_table_and_graph()
-                                self.last_update_time = time.time()
+                await self.monitor_target()
             else:
-                time.sleep(0.3)
+                # ตื่นทันทีเมื่อไฟล์ PID ถูกสร้าง ; timeout ไว้สำหรับ scan หา Python
+                await self.run_blocking(self.handshake.wait, 0.3)
+
+    async def monitor_target(self):
+        """
+        (worker thread) อ่าน target เดียวด้วย engine.monitor จนโปรเซสจบ (generator หยุดเมื่อ sampler โยน psutil.Error)
+        หรือไฟล์ PID ของ MATLAB ถูกลบ ; interval ตาม spinbox ถูกปรับที่ scheduler ทุก tick
+        """
+        is_matlab = 'matlab' in self.training_source.lower()
+        if self.sampler is not None:
+            async for reading in monitor_samples(self.sampler, self.sampling_rate, scheduler=self.scheduler):
+                t0 = clock()
+                row = reading.row
+                self.session_log.append(*row)
+                self.channel.put(("sample", row))
+                STATS.record("buffer", t0)
+                t1 = clock()
+                for event in self.analyzer.add(reading.time, reading.cpu, reading.ram):
+                    self.channel.put(("event", event))
+                STATS.record("analyze", t1)
+                if is_matlab and not self.handshake.exists(PID_FILE):
+                    break
+                self.scheduler.set_interval(self.sampling_rate)
+        self.finish_monitoring()
+
+    async def replay_session(self):
+        """(worker thread) เล่นไฟล์ session ซ้ำแทน sampler จริง ; แถวถูกส่งเป็นชุดผ่านช่องทางเดียวกับตัวอย่างสด"""
+        self.replay, self.replay_request = self.replay_request, None
+        self.analyzer = StreamAnalyzer()
+        self.monitoring = True
+        self.channel.put(("replay", self.replay, self.replay.log))
+        while True:
+            rows = await self.run_blocking(self.replay.wait)
+            if rows is None:
+                break
+            if rows:
+                self.channel.put(("samples", rows))
+                for row in rows:
+                    for event in self.analyzer.add(row[0], row[1], row[2]):
+                        self.channel.put(("event", event))
+        replay, self.replay = self.replay, None
+        self.monitoring = False
+        self.channel.put(("replay_stop", replay, self.analyzer))
+        replay.close()
+
+    def adopt_targets(self):
+        """(worker thread) เพิ่มทุก candidate ที่ยังไม่อยู่ใน pool: Python ตามกฎ + MATLAB จากไฟล์ PID"""
+        self.discovery.scan()
+        found = [(e.pid, f"Python: {e.cmdline.lower()}") for e in self.discovery.candidates(self.rules.label)]
+        pid = parse_pid(self.handshake.text(PID_FILE))
+        if pid is not None and pid not in self.pool and psutil.pid_exists(pid):
+            found.append((pid, f"MATLAB (PID: {pid})"))
+            self.matlab_target = pid
+        for pid, source in found:
+            if pid in self.pool:
+                continue
+            try:
+                target = self.pool.add(pid, source)
+            except psutil.Error:
+                continue
+            self.channel.put(("target", pid, source, target.log))
+
+    def scan_targets(self):
+        if time.monotonic() >= self.next_scan:
+            t0 = clock()
+            self.adopt_targets()
+            STATS.record("detect", t0)
+            self.next_scan = time.monotonic() + 2.0
+
+    async def monitor_targets(self):
+        """
+        (worker thread) โหมด multi-target: อ่านทุก target ใน tick เดียวกันด้วย engine.monitor_pool
+        จนกว่าจะปิดโหมด (ปิด multi-target หรือ auto start) แล้วปิดไฟล์ session ของทุก target
+        """
+        self.pool = SamplerPool(self.tree_mode, metrics=self.metrics)
+        self.scheduler = DeadlineScheduler(self.sampling_rate)
+        self.next_scan = 0.0
+        while self.multi_mode and self.auto_start:
+            self.scan_targets()
+            if not len(self.pool):
+                await self.run_blocking(self.handshake.wait, 0.3)
+                continue
+            self.scheduler.start()  # ไม่นับช่วงที่ pool ว่างเป็น deadline ที่พลาด
+            async for tick, rows, gone in monitor_pool(self.pool, self.sampling_rate, scheduler=self.scheduler):
+                if self.matlab_target in self.pool and not self.handshake.exists(PID_FILE):
+                    gone.append(self.pool.remove(self.matlab_target))
+                if rows:
+                    self.channel.put(("targets", rows))
+                for pid, event in self.pool.events:
+                    self.channel.put(("event", event, pid))
+                for target in gone:
+                    self.channel.put(("target_stop", target.pid, target.samples))
+                if not (self.multi_mode and self.auto_start):
+                    break
+                self.scan_targets()
+                self.scheduler.set_interval(self.sampling_rate)
+        for pid in list(self.pool.targets):
+            target = self.pool.remove(pid)
+            self.channel.put(("target_stop", pid, target.samples))
+        self.pool = None
 
     def finish_monitoring(self):
         self.monitoring = False
-        self.status_label.setText("Training stopped. Showing result...")
-        self.flush_buffer_to_table_and_graph()
-        if self.plot_mode_checkbox.isChecked():
-            timestamps = [d[0] for d in self.data]
-            cpu_vals = [d[1] for d in self.data]
-            ram_vals = [d[2] for d in self.data]
-            self.graph.plot(timestamps, cpu_vals, ram_vals)
-        self.source_label.setText(f"Detected from: {self.training_source}")
+        self.session_log.close()
+        if self.sampler is not None:
+            self.sampler.close()
+        self.channel.put(("stop", self.training_source, self.scheduler.missed, self.scheduler.expected_samples(),
+                          self.analyzer))
 
     def start_monitoring(self):
-        self.sampling_rate = self.sampling_spinbox.value()
+        metrics = self.metrics
+        try:
+            self.sampler = create_sampler(self.training_pid, metrics, self.tree_mode)
+        except psutil.Error:
+            self.sampler = None
+        self.scheduler = DeadlineScheduler(self.sampling_rate)
+        self.analyzer = StreamAnalyzer()
+        self.session_log = SessionLogWriter(session_path(), self.training_source, self.training_pid,
+                                            FIELDS + metrics)
         self.monitoring = True
+        self.channel.put(("start", self.training_source, self.detect_reason, metrics))
+
+    def handle_events(self, batch):
+        # ทำงานบน GUI thread: เรียกโดย ChannelPump ครั้งเดียวต่อ frame
+        for event in batch:
+            kind = event[0]
+            if kind == "sample":
+                self.buffered_data.append(event[1])
+            elif kind == "samples":
+                self.buffered_data.extend(event[1])
+            elif kind == "replay":
+                self.on_replay_started(*event[1:])
+            elif kind == "replay_stop":
+                self.on_replay_finished(*event[1:])
+            elif kind == "event":
+                self.on_event(*event[1:])
+            elif kind == "start":
+                self.replay_log = None
+                self.on_monitoring_started(*event[1:])
+            elif kind == "stop":
+                self.on_monitoring_finished(*event[1:])
+            elif kind == "targets":
+                for pid, row in event[1].items():
+                    self.target_views[pid].pending.append(row)
+            elif kind == "target":
+                self.on_target_started(*event[1:])
+            elif kind == "target_stop":
+                self.on_target_finished(*event[1:])
+
+        if self.target_views:
+            self.flush_targets()
+
+        if not self.monitoring or not self.buffered_data:
+            return
+        if self.buffer_mode_checkbox.isChecked() or self.replay is not None:
+            # replay ใช้ทดสอบภาระของตาราง/กราฟ: วาดทุก frame
+            self.flush_buffer_to_table_and_graph()
+            if self.replay is not None:
+                done, total = self.replay.progress()
+                self.status_label.setText(f"Replaying session: {done}/{total} samples "
+                                          f"at {self.replay.speed:g}x  {self.last_event}")
+            self.last_update_time = time.time()
+        else:
+            elapsed = time.time() - self.training_start_time
+
+            if not self.initial_buffer_flushed and elapsed >= 10:
+                self.flush_buffer_to_table_and_graph()
+                self.last_update_time = time.time()
+                self.initial_buffer_flushed = True
+
+            elif self.initial_buffer_flushed:
+                self.update_interval = self.get_dynamic_update_interval(elapsed)
+                if time.time() - self.last_update_time >= self.update_interval:
+                    self.flush_buffer_to_table_and_graph()
+                    self.last_update_time = time.time()
+
+    def flush_targets(self):
+        # วาดเฉพาะกราฟที่แสดงอยู่ ; target อื่นเก็บข้อมูลเข้า bin ไว้แล้ววาดเมื่อถูกเลือก
+        current = self.current_view()
+        plot_later = self.plot_mode_checkbox.isChecked()
+        for view in self.target_views.values():
+            view.flush(redraw=view is current and not plot_later)
+
+    def on_target_started(self, pid, source, log):
+        old = self.target_views.pop(pid, None)  # PID เดิมถูกนำกลับมาใช้: แทนที่ view เก่า
+        if old is not None:
+            self.graph_stack.removeWidget(old.graph)
+            self.target_combo.removeItem(self.target_combo.findData(pid))
+        view = TargetView(pid, source, log, self)
+        self.target_views[pid] = view
+        self.graph_stack.addWidget(view.graph)
+        self.target_combo.addItem(view.title(), pid)
+        if self.current_view() is None:
+            self.target_combo.setCurrentIndex(self.target_combo.count() - 1)
+        self.update_target_status()
+
+    def on_target_finished(self, pid, samples):
+        view = self.target_views.get(pid)
+        if view is None:
+            return
+        view.running = False
+        view.flush(redraw=view is self.current_view())
+        self.target_combo.setItemText(self.target_combo.findData(pid), view.title())
+        self.update_target_status()
+
+    def update_target_status(self):
+        running = sum(1 for v in self.target_views.values() if v.running)
+        self.status_label.setText(f"Multi-target: {running} running / {len(self.target_views)} detected")
+
+    def on_event(self, event, pid=None):
+        target = f"[{pid}] " if pid is not None else ""
+        self.last_event = f"⚠️ {format_timestamp(event.time)} {target}{event.message}"
+        self.status_label.setText(self.last_event)
+
+    def on_monitoring_finished(self, source, missed, expected, analyzer):
+        if missed:
+            self.status_label.setText(
+                f"Training stopped. Showing result... (missed {missed} of {expected} samples)"
+            )
+        else:
+            self.status_label.setText("Training stopped. Showing result...")
+        if analyzer.counts:
+            self.status_label.setText(f"{self.status_label.text()} Events: {analyzer.count_text()}")
+        self.status_label.setToolTip(analyzer.format_summary())  # สถิติทั้ง session (mean/std/percentile/RSS trend)
+        self.flush_buffer_to_table_and_graph()
+        if self.plot_mode_checkbox.isChecked():
+            self.graph.refresh()
+        self.source_label.setText(f"Detected from: {source}")
+
+    def on_monitoring_started(self, source, reason, metrics):
         self.buffered_data.clear()
-        self.data.clear()
-        self.table.setRowCount(0)
-        self.graph.ax.clear()
-        self.graph.canvas.draw()
+        self.table_model.clear(source, metrics)
+        self.graph.clear(metrics)
         self.training_start_time = time.time()
         self.last_update_time = time.time()
         self.initial_buffer_flushed = False # รีเซ็ตตัวแปรสถานะ
+        self.last_event = ""
         self.status_label.setText("Monitoring started (Auto).")
-        self.source_label.setText(f"Detected from: {self.training_source}")
+        self.source_label.setText(f"Detected from: {source}\nWhy: {reason}")
 
-    def export_excel(self):
-        if not self.data:
+    def open_replay(self):
+        if self.monitoring or self.pool is not None or self.replay_request is not None:
+            self.status_label.setText("Status: Replay is available while no session is being monitored")
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Replay Session", SESSION_DIR, "Session logs (*.mlog)")
+        if not path:
+            return
+        try:
+            replay = SessionReplay(path, self.replay_speed_spinbox.value())
+        except (OSError, ValueError) as e:
+            self.status_label.setText(f"Status: Cannot open {path}: {e}")
+            return
+        if not len(replay):
+            self.status_label.setText(f"Status: {path} has no samples")
+            return
+        self.replay_request = replay  # worker รับไปเล่นในรอบถัดไป
+
+    def on_replay_started(self, replay, log):
+        self.on_monitoring_started(replay.source, f"replay of {replay.path}", replay.extra)
+        self.replay_log = log  # export ระหว่าง/หลัง replay อ่านจากไฟล์ที่เล่นอยู่
+        self.status_label.setText(f"Replaying session at {replay.speed:g}x")
+
+    def on_replay_finished(self, replay, analyzer):
+        self.on_monitoring_finished(replay.source, 0, len(replay), analyzer)
+        events = f" Events: {analyzer.count_text()}" if analyzer.counts else ""
+        self.status_label.setText(f"Replay finished: {len(replay)} samples from {os.path.basename(replay.path)}.{events}")
+
+    def export_session(self, kind):
+        # export target ที่เลือกอยู่ ; อ่านจากไฟล์ session บน background thread (GUI ไม่ค้างแม้ข้อมูลหลายล้านแถว)
+        view = self.current_view()
+        if view is not None:
+            store, log = view.store, view.log
+        else:
+            store, log = self.store, self.replay_log if self.replay_log is not None else self.session_log
+        if not len(store):
             self.status_label.setText("Status: No data to export")
             return
-        path, _ = QFileDialog.getSaveFileName(self, "Save Excel File", "", "Excel Files (*.xlsx)")
-        if path:
-            wb = Workbook()
-            ws = wb.active
-            ws.append(["Time", "CPU (%)", "RAM (MB)", "Source"])
-            for row in self.data:
-                ws.append(row)
-            ws.append(["", "", "", f"Command/Source: {self.training_source}"])
-            wb.save(path)
-            self.status_label.setText(f"Excel saved to {path}")
+        log.flush()
+        start_export(self, log.path, kind, self.status_label)
+
+    def export_excel(self):
+        self.export_session("excel")
 
     def export_csv(self):
-        if not self.data:
-            self.status_label.setText("Status: No data to export")
-            return
-        path, _ = QFileDialog.getSaveFileName(self, "Save CSV File", "", "CSV Files (*.csv)")
-        if path:
-            with open(path, mode='w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow(["Time", "CPU (%)", "RAM (MB)", "Source"])
-                writer.writerows(self.data)
-                writer.writerow(["", "", "", f"Command/Source: {self.training_source}"])
-            self.status_label.setText(f"CSV saved to {path}")
+        self.export_session("csv")
+
+    def show_diagnostics(self):
+        if self.diagnostics is None:
+            self.diagnostics = DiagnosticsDialog(self)
+        self.diagnostics.show()
+        self.diagnostics.raise_()
 
     def save_graph(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save Graph as Image", "", "PNG Files (*.png)")
         if path:
-            self.graph.figure.savefig(path)
+            self.graph_stack.currentWidget().save(path)
             self.status_label.setText(f"Graph saved to {path}")
 
 if __name__ == "__main__":
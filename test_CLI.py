@@ -1,45 +1,112 @@
 import time
+import asyncio
 import psutil
-import csv
 import os
-from openpyxl import Workbook
+import sys
 from datetime import datetime
+from sampler import create_sampler
+from session_log import SessionLog, SessionLogWriter, session_path, format_timestamp, FIELDS
+from exporter import run_export, auto_resolution
+from discovery import ProcessIndex
+from matcher import MatchRules, CandidateRanker
+from filewatch import FileWatcher, PID_FILE, parse_pid
+from pool import SamplerPool
+from instrument import STATS, clock
+from engine import monitor as monitor_samples, monitor_pool, Fanout
+from metrics import parse_metrics, header, format_value
+from analytics import StreamAnalyzer
+from aggregate import WindowAggregator, parse_window_stats, window_fields, MISSED
+from dashboard import Dashboard
+
+SUBSAMPLE_INTERVAL = 0.1  # ความถี่ sub-sample ภายในแต่ละช่วง samrate (วินาที) ; samrate ที่สั้นกว่านี้อ่านทุก samrate
+RULES = MatchRules.load()  # กฎ include/exclude (matcher.json ถ้ามี)
+DISCOVERY = ProcessIndex(RULES.classify)  # จำผลการตรวจโปรเซสไว้ข้ามการเรียก get_pid
+RANKER = CandidateRanker()  # เลือก candidate ที่ใช้ CPU/RAM มากที่สุดในช่วงสังเกต
+HANDSHAKE = FileWatcher(names=(PID_FILE,))  # เฝ้าไฟล์ PID ของ MATLAB (เริ่มใน monitor)
+SHOW_STATS = "--stats" in sys.argv  # python test_CLI.py --stats : พิมพ์ latency ของแต่ละขั้นตอนเมื่อจบ monitor
+
+def argv_value(flag, default=""):
+    """ค่าหลัง flag ใน command line เช่น --metrics io_read,threads"""
+    if flag in sys.argv[:-1]:
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+# metric เพิ่มเติม (ดู metrics.METRICS) เช่น --metrics io_read,io_write,threads หรือ --metrics all
+METRICS = parse_metrics(argv_value("--metrics"))
+# สถิติต่อ window ที่บันทึกคู่กับค่าเฉลี่ย เช่น --window-stats max,p95 (ค่าเริ่มต้น min,max,p95,last ; none = ไม่บันทึก)
+WINDOW_STATS = parse_window_stats(argv_value("--window-stats"))
+
+def matlab_pid():
+    """PID ของ MATLAB จากไฟล์ PID (HANDSHAKE_DIR/training_pid.txt) คืน (pid, source) หรือ (None, None)"""
+    pid = parse_pid(HANDSHAKE.text(PID_FILE))  # เนื้อหาล่าสุดจาก watcher ไม่ต้องเปิดไฟล์เอง
+    try:
+        if pid is not None:
+            proc = psutil.Process(pid)
+            if proc.is_running() and "matlab" in proc.name().lower():
+                return pid, f"MATLAB (PID: {pid}) CMD: {' '.join(proc.cmdline())}"
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        pass
+    return None, None
 
 def get_pid():
     """
     ตรวจหา PID ของโปรเซสที่กำลังเทรน
-    - ตรวจหาจากไฟล์ C:\\temp\\training_pid.txt สำหรับ MATLAB ก่อน
-    - หากไม่เจอ จะค้นหาโปรเซส Python ที่กำลังรันไฟล์ .py
+    - ตรวจหาจากไฟล์ PID ของ MATLAB ก่อน
+    - หากไม่เจอ จะค้นหาโปรเซส Python ที่กำลังรันไฟล์ .py ตามกฎใน RULES แล้วเลือกตัวที่หนักที่สุด
+    คืนค่า (pid, source, เหตุผลที่เลือก)
     """
     # --- ตรวจสอบ MATLAB ก่อน ---
-    pid_file_path = "C:\\temp\\training_pid.txt"
-    try:
-        if os.path.exists(pid_file_path):
-            with open(pid_file_path, "r") as f:
-                pid = int(f.read().strip())
-            proc = psutil.Process(pid)
-            if proc.is_running() and "matlab" in proc.name().lower():
-                return pid, f"MATLAB (PID: {pid}) CMD: {' '.join(proc.cmdline())}"
-    except (FileNotFoundError, psutil.NoSuchProcess, ValueError, psutil.AccessDenied):
-        pass # หากมีปัญหา ให้ข้ามไปหา Python
+    pid, source = matlab_pid()
+    if pid is not None:
+        return pid, source, "PID file"
 
-    # --- หากไม่เจอ MATLAB ให้ตรวจสอบ Python ---
-    current_pid = psutil.Process().pid
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-        try:
-            if proc.pid == current_pid:
-                continue
+    # --- หากไม่เจอ MATLAB ให้ตรวจสอบ Python (อ่าน cmdline เฉพาะโปรเซสที่เกิดใหม่) ---
+    DISCOVERY.scan()
+    entry, reason = RANKER.pick(DISCOVERY.candidates(RULES.label))
+    if entry is not None:
+        return entry.pid, f"Python: {entry.cmdline.lower()}", reason
+    return None, None, None
 
-            name = proc.info['name'].lower()
-            cmdline_list = proc.info.get('cmdline')
-            cmdline = ' '.join(cmdline_list or []).lower()
-            
-            if ("python" in name or "python.exe" in name) and ".py" in cmdline:
-                return proc.pid, f"Python: {cmdline}"
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-            
-    return None, None
+def node_targets():
+    """target ทั้งหมดบนเครื่อง: MATLAB จากไฟล์ PID + ทุก Python candidate ตามกฎใน RULES (ไม่จัดอันดับ)"""
+    targets = []
+    pid, source = matlab_pid()
+    if pid is not None:
+        targets.append((pid, source))
+    DISCOVERY.scan()
+    for entry in DISCOVERY.candidates(RULES.label):
+        targets.append((entry.pid, f"Python: {entry.cmdline.lower()}"))
+    return targets
+
+def column_width(name):
+    return max(10, len(header(name)) + 1)
+
+def format_row(row, source, names=METRICS):
+    """
+    row = (time epoch, cpu, ram, interval, *field เพิ่มเติม) ; names = ชื่อ field เพิ่มเติมตามลำดับในแถว
+    แปลงเวลาเป็นข้อความตอนแสดงผลเท่านั้น
+    """
+    extra = "".join(f"{format_value(name, value):<{column_width(name)}}" for name, value in zip(names, row[4:]))
+    return f"{format_timestamp(row[0]):<24} {row[1]:<10.2f} {row[2]:<12.2f} {row[3]:<10.3f} {extra}{source}"
+
+def row_header(names=METRICS):
+    extra = "".join(f"{header(name):<{column_width(name)}}" for name in names)
+    return f"{'Time':<24} {'CPU (%)':<10} {'RAM (MB)':<12} {'Interval':<10} {extra}Source"
+
+def format_event(event, pid=None):
+    target = f"[{pid}] " if pid is not None else ""
+    return f"⚠️ {format_timestamp(event.time)}  {target}{event.message}"
+
+def print_children(sampler):
+    """แสดง breakdown ของ child process ที่ใช้ CPU มากที่สุด"""
+    print(f"{'':<24} └ {len(sampler.breakdown) - 1} child processes")
+    for c in sampler.top_children(3):
+        print(f"{'':<26} {c.cpu:<10.2f} {c.ram:<12.2f} {c.name} (PID {c.pid})")
+
+def print_stats():
+    """พิมพ์ latency histogram ของ hot path + CPU/RAM ของตัว monitor เอง (เฉพาะเมื่อรันด้วย --stats)"""
+    if SHOW_STATS:
+        print("\n📊 " + STATS.format_report())
 
 def get_update_interval(elapsed):
     """คำนวณช่วงเวลาการแสดงผลแบบ Buffered ตามเวลาที่ผ่านไป"""
@@ -50,109 +117,347 @@ def get_update_interval(elapsed):
     elif elapsed <= 3600: return 30
     else: return 60
 
-def monitor(samrate, display_mode):
+async def windows(readings, per_window, stopped, stats=()):
+    """
+    รวม Reading ทุก per_window deadline เป็นแถวเดียว คืน (tick ล่าสุด, row)
+    row = (time, mean cpu, mean ram, interval, *สถิติตาม window_fields(stats), missed, *mean ของ metric เพิ่มเติม)
+    missed = จำนวน deadline ที่พลาดตั้งแต่แถวก่อน: tick ที่ข้ามขอบ window ไปหลาย window ยังได้แถวเดียว
+    แต่ช่องว่างนั้นปรากฏใน field missed (และ interval ที่ยาวกว่า window) ของไฟล์ session/export
+    หยุดเมื่อ stopped() เป็น True หรือโปรเซสจบ ; window สุดท้ายที่ยังไม่ครบได้แถวของตัวอย่างที่มีอยู่ (interval สั้นกว่า window)
+    """
+    aggregator = WindowAggregator(per_window, 2 + len(METRICS), stats)  # tick.index เริ่มที่ 1: ไม่เกิน per_window ตัวต่อ window
+    window_end, window_interval, missed_before = per_window, 0.0, 0
+    last = None
+
+    def emit(reading):
+        nonlocal window_interval, missed_before
+        (avg_cpu, avg_ram, *extra), peaks = aggregator.emit()
+        row = (reading.time, avg_cpu, avg_ram, window_interval, *peaks, reading.tick.missed - missed_before, *extra)
+        missed_before = reading.tick.missed
+        window_interval = 0.0
+        return row
+
+    async for reading in readings:
+        if stopped():
+            break
+        t0 = clock()
+        aggregator.add((reading.cpu, reading.ram) + reading.extra)
+        window_interval += reading.interval
+        last = reading
+        if reading.tick.index >= window_end:
+            row = emit(reading)
+            window_end = (reading.tick.index // per_window + 1) * per_window
+            STATS.record("buffer", t0)
+            yield reading.tick, row
+        else:
+            STATS.record("buffer", t0)
+    if aggregator.count:
+        yield last.tick, emit(last)
+
+async def write_log(feed, log):
+    """consumer: เขียนทุกแถวลงไฟล์ session ; คืน tick สุดท้าย"""
+    tick = None
+    async for tick, row in feed:
+        log.append(*row)
+    return tick
+
+async def analyze(feed, analyzer=None, report=print):
+    """consumer: สถิติและ event แบบ streaming (analytics.StreamAnalyzer) ; ส่ง event ให้ report ทันทีที่เกิด คืน analyzer"""
+    if analyzer is None:
+        analyzer = StreamAnalyzer()
+    async for _, row in feed:
+        t0 = clock()
+        for event in analyzer.add(row[0], row[1], row[2]):
+            report(format_event(event))
+        STATS.record("analyze", t0)
+    return analyzer
+
+async def show(feed, display_mode, source, names, tree_sampler=None):
+    """consumer: แสดงผลแบบ real-time (1) หรือ buffered (2) ; names = ชื่อ field เพิ่มเติมของแถว"""
+    training_start = last_display_time = time.time()
+    buffer = []
+    async for _, row in feed:
+        t0 = clock()
+        if display_mode == 1:
+            print(format_row(row, source, names))
+            if tree_sampler is not None:
+                print_children(tree_sampler)
+        else:
+            buffer.append(row)
+            if time.time() - last_display_time >= get_update_interval(time.time() - training_start):
+                for b in buffer:
+                    print(format_row(b, source, names))
+                buffer.clear()
+                last_display_time = time.time()
+        STATS.record("display", t0)
+    if buffer:
+        for b in buffer:
+            print(format_row(b, source, names))
+    if feed.dropped:
+        print(f"⚠️ {feed.dropped} rows were not displayed (terminal too slow); all rows are in the session log.")
+
+async def show_dashboard(feed, dashboard, panel):
+    """consumer: display mode 3 ; เติมแถวให้ panel เท่านั้น การวาดทำโดย dashboard.animate ตาม frame rate ของมันเอง"""
+    dashboard.open()
+    painter = asyncio.ensure_future(dashboard.animate())
+    try:
+        async for _, row in feed:
+            t0 = clock()
+            panel.add(row)
+            dashboard.dropped = feed.dropped
+            STATS.record("display", t0)
+    finally:
+        painter.cancel()
+        dashboard.close()
+
+def monitor(samrate, display_mode, tree_mode=False):
     """
     ฟังก์ชันหลักสำหรับติดตามและบันทึกข้อมูล CPU/RAM
+    - tree_mode=True จะรวมค่าของ child process ทั้งหมด (DataLoader workers, MATLAB parpool)
     """
-    print("🔍 Waiting for training process...")
-    pid_file_path = "C:\\temp\\training_pid.txt"
-    
+    HANDSHAKE.start()
+    print(f"🔍 Waiting for training process... (PID file: {HANDSHAKE.path(PID_FILE)}, {HANDSHAKE.backend})")
+
     while True:
-        pid, source = get_pid()
+        t0 = clock()
+        pid, source, reason = get_pid()
+        STATS.record("detect", t0)
         if pid:
             break
-        time.sleep(1)
+        HANDSHAKE.wait(1)  # ตื่นทันทีเมื่อ MATLAB สร้างไฟล์ PID
 
     print(f"\n✅ Detected training from: {source}")
-    print(f"{'Time':<10} {'CPU (%)':<10} {'RAM (MB)':<12} Source")
+    print(f"   why: {reason}")
+    print(f"   (process discovery: {DISCOVERY.summary()})")
 
-    training_start = time.time()
-    last_display_time = training_start
-    data, buffer, samples = [], [], []
     is_matlab = "matlab" in source.lower()
 
-    while True:
-        # --- เงื่อนไขการหยุด Monitor ---
-        # 1. (สำหรับ MATLAB) ตรวจสอบว่าไฟล์ PID ถูกลบไปหรือยัง (สัญญาณที่ชัดเจนที่สุด)
-        if is_matlab and not os.path.exists(pid_file_path):
-           # print("\nℹ️ MATLAB PID file deleted. Task is complete.")                  ลบได้  --------------------------#
-            break
+    # เก็บ sub-sample ทุก SUBSAMPLE_INTERVAL ตาม deadline แล้วรวบเป็น 1 แถวทุก samrate วินาที
+    # (ค่าเฉลี่ย + min/max/p95/last ตาม --window-stats ; window ที่มีตัวอย่างเดียวไม่มีสถิติเพิ่ม
+    #  + จำนวน deadline ที่พลาดใน window นั้น)
+    subsample = min(SUBSAMPLE_INTERVAL, samrate)
+    per_window = max(1, int(round(samrate / subsample)))
+    stats = WINDOW_STATS if per_window > 1 else ()
+    names = window_fields(stats) + (MISSED,) + METRICS
+    if display_mode != 3:
+        print(row_header(names))
+    try:
+        sampler = create_sampler(pid, METRICS, tree_mode)
+    except psutil.NoSuchProcess:
+        sampler = None
+    # ทุกแถวถูกเขียนลงไฟล์ session ทันที (ไม่เก็บทั้งหมดไว้ใน list) export จะอ่านจากไฟล์นี้
+    log = SessionLogWriter(session_path(), source, pid, FIELDS + names)
 
+    def stopped():
+        # 1. (สำหรับ MATLAB) ตรวจสอบว่าไฟล์ PID ถูกลบไปหรือยัง (สัญญาณที่ชัดเจนที่สุด)
+        if is_matlab and not HANDSHAKE.exists(PID_FILE):
+            return True
         # 2. ตรวจสอบว่าโปรเซสหายไปจากระบบหรือไม่ (สำหรับ Python หรือกรณี MATLAB ปิดตัวเอง)
-        if not psutil.pid_exists(pid):
+        if not sampler.is_alive():
             print("\nℹ️ Process PID not found. Stopping.")
-            break
-        
-        # --- เก็บข้อมูล CPU/RAM ---
+            return True
+        return False
+
+    async def run():
+        # producer ตัวเดียว แจกให้ 3 consumer: ไฟล์ session และ analytics (ไม่ทิ้งข้อมูล)
+        # และหน้าจอ (ทิ้งแถวเก่าถ้าแสดงไม่ทัน)
+        hub = Fanout()
+        feeds = (hub.subscribe(wait=True), hub.subscribe(wait=True), hub.subscribe())
+        rows = windows(monitor_samples(sampler, subsample), per_window, stopped, stats)
+        analyzer = StreamAnalyzer()
+        tree_sampler = sampler if tree_mode else None
+        if display_mode == 3:
+            dashboard = Dashboard("📈 Training monitor")
+            panel = dashboard.panel(None, source, names, analyzer, tree_sampler)
+            display, report = show_dashboard(feeds[2], dashboard, panel), dashboard.note
+        else:
+            display, report = show(feeds[2], display_mode, source, names, tree_sampler), print
+        _, last, _, _ = await asyncio.gather(
+            hub.pump(rows), write_log(feeds[0], log), analyze(feeds[1], analyzer, report), display)
+        return last, analyzer
+
+    last, analyzer = asyncio.run(run()) if sampler is not None else (None, None)
+
+    if sampler is not None:
+        sampler.close()
+    log.close()
+    print("\n⏹️ Training stopped.")
+    print(f"🗂️ Session log: {os.path.abspath(log.path)}")
+    if last is not None and last.missed:
+        print(f"⚠️ Missed {last.missed} of {last.index} sampling deadlines.")
+    if analyzer is not None:
+        print(analyzer.format_summary())
+    print_stats()
+    return log.path, source
+
+def monitor_node(samrate, display_mode, tree_mode=False, rescan=5.0):
+    """
+    โหมด multi-target: ติดตามทุก training process บนเครื่องพร้อมกันด้วย scheduler ตัวเดียว
+    - ทุก target ถูกอ่านใน tick เดียวกันผ่าน SamplerPool และมีไฟล์ session ของตัวเอง
+    - ค้นหา target ใหม่ทุก rescan วินาที ; จบเมื่อไม่มี target เหลือหรือกด Ctrl+C
+    - อ่านทุก samrate วินาทีโดยตรง (ไม่ sub-sample) เพื่อให้ต้นทุนต่อ target ต่ำ
+    คืน list ของ (log_path, source)
+    """
+    HANDSHAKE.start()
+    print(f"🔍 Waiting for training processes... (PID file: {HANDSHAKE.path(PID_FILE)}, {HANDSHAKE.backend})")
+    pool = SamplerPool(tree_mode, metrics=METRICS)
+    sessions = []
+    matlab = None
+    # display mode 3: หนึ่ง Panel ต่อ target ; ข้อความที่เคยพิมพ์ไปอยู่ในรายการ event ของ dashboard
+    dashboard = Dashboard("📈 Training monitor (node)  Ctrl+C to stop") if display_mode == 3 else None
+    say = dashboard.note if dashboard is not None else print
+    summaries = []
+
+    def adopt():
+        nonlocal matlab
+        t0 = clock()
+        found = node_targets()
+        STATS.record("detect", t0)
+        for pid, source in found:
+            if pid in pool:
+                continue
+            try:
+                target = pool.add(pid, source)
+            except psutil.Error:
+                continue
+            if source.startswith("MATLAB"):
+                matlab = pid
+            sessions.append((target.log.path, source))
+            say(f"➕ [{pid}] {source}")
+
+    def finish(target, reason):
+        say(f"➖ [{target.pid}] {reason} after {target.samples} samples")
+        if dashboard is None:
+            print(target.analyzer.format_summary())
+        else:
+            dashboard.panel(target.pid, target.source).status = "stopped"
+            summaries.append((target.pid, target.analyzer.format_summary()))
+
+    while not len(pool):
+        adopt()
+        if not len(pool):
+            HANDSHAKE.wait(1)
+
+    if dashboard is None:
+        print(f"{'PID':<9} " + row_header())
+    training_start = time.time()
+    last_display_time = training_start
+    buffer = []
+    rescan_every = max(1, int(round(rescan / samrate)))
+    cost, ticks, last = 0.0, 0, None
+
+    async def run():
+        nonlocal cost, ticks, last, last_display_time
+        painter = asyncio.ensure_future(dashboard.animate()) if dashboard is not None else None
         try:
-            proc = psutil.Process(pid)
-            proc.cpu_percent(interval=None) # เรียกครั้งแรกเพื่อเริ่มต้น
-            time.sleep(0.1)
-            cpu = proc.cpu_percent(interval=None) / psutil.cpu_count()
-            ram = proc.memory_info().rss / (1024 * 1024)
-        except psutil.NoSuchProcess:
-            break # ออกจากลูปหากโปรเซสหายไประหว่างทำงาน
-
-        # --- ประมวลผลและแสดงข้อมูล ---
-        samples.append((cpu, ram))
-        if (len(samples) * 0.1) >= samrate:
-            avg_cpu = sum(x[0] for x in samples) / len(samples) if samples else 0
-            avg_ram = sum(x[1] for x in samples) / len(samples) if samples else 0
-            samples.clear()
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            row = (timestamp, avg_cpu, avg_ram, source)
-
-            if display_mode == 1:
-                print(f"{timestamp:<10} {avg_cpu:<10.2f} {avg_ram:<12.2f} {source}")
-                data.append(row)
-            else:
-                buffer.append(row)
-                if time.time() - last_display_time >= get_update_interval(time.time() - training_start):
-                    for b in buffer:
-                        print(f"{b[0]:<10} {b[1]:<10.2f} {b[2]:<12.2f} {b[3]}")
-                    data.extend(buffer)
+            # ทุก target อ่านใน tick เดียวกันบน event loop เดียว (ไม่มี thread ต่อ target)
+            async for tick, rows, gone in monitor_pool(pool, samrate):
+                last = tick
+                cost += pool.last_cost
+                ticks += 1
+                t0 = clock()
+                for pid, row in rows.items():
+                    target = pool.targets[pid]
+                    if dashboard is not None:
+                        dashboard.panel(pid, target.source, METRICS, target.analyzer,
+                                        target.sampler if tree_mode else None).add(row)
+                        continue
+                    line = f"{pid:<9} " + format_row(row, target.source)
+                    if display_mode == 1:
+                        print(line)
+                    else:
+                        buffer.append(line)
+                STATS.record("display", t0)
+                for pid, event in pool.events:
+                    say(format_event(event, pid))
+                for target in gone:
+                    finish(target, "stopped")
+                # MATLAB จบเมื่อไฟล์ PID ถูกลบ
+                if matlab in pool and not HANDSHAKE.exists(PID_FILE):
+                    finish(pool.remove(matlab), "MATLAB PID file deleted")
+                if tick.index % rescan_every == 0:
+                    adopt()
+                if buffer and time.time() - last_display_time >= get_update_interval(time.time() - training_start):
+                    print("\n".join(buffer))
                     buffer.clear()
                     last_display_time = time.time()
+        finally:
+            if painter is not None:
+                painter.cancel()
 
-    if display_mode == 2 and buffer:
-        for b in buffer:
-            print(f"{b[0]:<10} {b[1]:<10.2f} {b[2]:<12.2f} {b[3]}")
-        data.extend(buffer)
+    if dashboard is not None:
+        dashboard.open()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
+        if dashboard is not None:
+            dashboard.close()
+    if buffer:
+        print("\n".join(buffer))
+    for pid, summary in summaries:
+        print(f"[{pid}] {summary}")
 
-    print("\n⏹️ Training stopped.")
-    return data, source
+    print("\n⏹️ All training processes stopped.")
+    for log_path, source in sessions:
+        print(f"🗂️ Session log: {os.path.abspath(log_path)}  ({source[:60]})")
+    if ticks:
+        print(f"   (sampling cost: avg {cost / ticks * 1000:.2f} ms per tick for up to {len(sessions)} targets)")
+    if last is not None and last.missed:
+        print(f"⚠️ Missed {last.missed} of {last.index} sampling deadlines.")
+    print_stats()
+    return sessions
 
-def export_excel(data, source):
-    """ส่งออกข้อมูลเป็นไฟล์ Excel"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Monitoring_Log"
-    ws.append(["Time", "CPU (%)", "RAM (MB)", "Source"])
-    for row in data:
-        ws.append(row)
-    ws.append([])
-    ws.append(["Command/Source:", source])
-    filename = f"monitor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+def ask_resolution():
+    """ถามความละเอียดของข้อมูลที่จะ export (Enter = เลือกอัตโนมัติตามความยาว session, 0 = ทุกตัวอย่าง)"""
+    while True:
+        r = input("🔎 Export resolution in seconds (Enter = auto, 0 = full resolution): ").strip()
+        if not r:
+            return "auto"
+        try:
+            value = float(r)
+            if value == 0:
+                return None
+            if value > 0:
+                return value
+        except ValueError:
+            pass
+        print("❌ Invalid input. Try again.")
+
+def print_progress(done, total):
+    print(f"\r⏳ Exporting... {done * 100 // total if total else 100}%", end="", flush=True)
+
+def export_session(log_path, kind, filename, label, resolution=None):
+    """ส่งออกไฟล์ session แบบ stream (หน่วยความจำคงที่) ; กด Ctrl+C เพื่อยกเลิก"""
+    log = SessionLog(log_path)
+    if resolution == "auto":
+        resolution = auto_resolution(log)
+        print(f"🔎 Resolution: {f'{resolution:g} s (min/max/mean/last)' if resolution else 'full'}")
     try:
-        wb.save(filename)
-        print(f"📁 Saved Excel to {os.path.abspath(filename)}")
+        run_export(kind, filename, log, resolution=resolution, progress=print_progress)
+        print(f"\n📁 Saved {label} to {os.path.abspath(filename)}")
+    except KeyboardInterrupt:
+        print("\n⏹️ Export cancelled.")
     except Exception as e:
-        print(f"❌ Error saving Excel file: {e}")
+        print(f"\n❌ Error saving {label} file: {e}")
+
+def export_sessions(sessions, kind, ext, label):
+    """ส่งออกทุก session (หนึ่งไฟล์ต่อ target) ; ถามความละเอียดครั้งเดียว"""
+    resolution = ask_resolution()
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    for log_path, _ in sessions:
+        suffix = f"_{SessionLog(log_path).meta.get('pid')}" if len(sessions) > 1 else ""
+        export_session(log_path, kind, f"monitor_{stamp}{suffix}.{ext}", label, resolution)
 
+def export_excel(sessions):
+    """ส่งออกข้อมูลเป็นไฟล์ Excel"""
+    export_sessions(sessions, "excel", "xlsx", "Excel")
 
-def export_csv(data, source):
+def export_csv(sessions):
     """ส่งออกข้อมูลเป็นไฟล์ CSV"""
-    filename = f"monitor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    try:
-        with open(filename, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(["Time", "CPU (%)", "RAM (MB)", "Source"])
-            writer.writerows(data)
-            writer.writerow([])
-            writer.writerow(["Command/Source:", source])
-        print(f"📁 Saved CSV to {os.path.abspath(filename)}")
-    except Exception as e:
-        print(f"❌ Error saving CSV file: {e}")
+    export_sessions(sessions, "csv", "csv", "CSV")
 
 
 def main():
@@ -161,12 +466,15 @@ def main():
         # --- 1. รับค่า Sampling Rate ---
         while True:
             try:
-                s_input = input("⏱️ Set sampling rate (0.1–10.0) sec (recommended: 1.0): ")
+                s_input = input("⏱️ Set sampling rate (0.01–10.0) sec (recommended: 1.0): ")
                 s = float(s_input)
-                if 0.1 <= s <= 10.0: break
+                if 0.01 <= s <= 10.0: break
                 else: print("❌ Invalid range. Try again.")
             except ValueError:
                 print("❌ Invalid input. Try again.")
+        tree = input("👪 Include child processes (DataLoader / parpool workers)? (y/N): ").strip().lower() == 'y'
+        node = input("🖥️ Monitor every training process on this node? (y/N): ").strip().lower() == 'y'
+        run = monitor_node if node else lambda *args: [monitor(*args)]
 
         # --- 2. Loop สำหรับเลือก Display Mode และ Action ---
         display_mode_loop = True
@@ -174,14 +482,15 @@ def main():
             print("\n📺 Select display mode:")
             print("1. Real-time display")
             print("2. Buffered display")
-            print("3. Back to sampling rate")
+            print("3. Live dashboard (in-place, fixed frame rate)")
+            print("4. Back to sampling rate")
             m = input("Choice: ").strip()
 
-            if m == '3':
+            if m == '4':
                 display_mode_loop = False # ออกจากลูปนี้เพื่อกลับไปถาม sampling rate
                 continue
 
-            if m in ['1', '2']:
+            if m in ['1', '2', '3']:
                 mode = int(m)
                 # --- [หน้าจอใหม่] ให้เลือกว่าจะเริ่มหรือจะย้อนกลับ ---
                 while True:
@@ -195,8 +504,8 @@ def main():
 
                     if action == '1':
                         # --- เริ่ม Monitor และจัดการผลลัพธ์ ---
-                        records, source = monitor(s, mode)
-                        
+                        sessions = run(s, mode, tree)
+
                         # --- เมนูหลังจบการ Monitor ---
                         while True:
                             print("\n✅ Monitoring finished. What next?")
@@ -210,12 +519,12 @@ def main():
                             if post == '1':
                                 print("\n" + "-"*40 + "\n")
                                 # กลับไปรัน monitor ใหม่ โดยใช้ค่า s และ mode เดิม
-                                records, source = monitor(s, mode)
+                                sessions = run(s, mode, tree)
                                 continue
                             elif post == '2':
-                                export_excel(records, source)
+                                export_excel(sessions)
                             elif post == '3':
-                                export_csv(records, source)
+                                export_csv(sessions)
                             elif post == '4':
                                 # ออกจากทุก Loop เพื่อไปเริ่มใหม่ทั้งหมด
                                 display_mode_loop = False
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from analytics import (Welford, P2Quantile, RollingSlope, StreamAnalyzer, WARMUP_SAMPLES, WARMUP_SECONDS,
+                       SPIKE_COOLDOWN, STALL_SECONDS, SLOPE_WINDOW, GROWTH_MB_PER_MIN)
+
+T0 = 1700000000.0
+
+
+def feed(analyzer, samples):
+    """samples = [(t จาก T0, cpu, ram)] ; คืน list ของ (t, kind) ของ event ทั้งหมด"""
+    events = []
+    for t, cpu, ram in samples:
+        events.extend((e.time - T0, e.kind) for e in analyzer.add(T0 + t, cpu, ram))
+    return events
+
+
+def steady(start, stop, cpu=50.0, ram=1000.0):
+    return [(t, cpu + (t % 2), ram) for t in range(start, stop)]  # สั่นเล็กน้อย ให้ std > 0
+
+
+def test_welford_matches_numpy():
+    values = np.random.default_rng(1).normal(10, 3, 1000)
+    stats = Welford()
+    for v in values:
+        stats.add(v)
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.std() == pytest.approx(values.std(ddof=1))
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_p2_quantile_tracks_percentile():
+    values = np.random.default_rng(2).uniform(0, 100, 20000)
+    estimator = P2Quantile(95)
+    assert estimator.value() is None
+    for v in values:
+        estimator.add(v)
+    assert estimator.value() == pytest.approx(np.percentile(values, 95), abs=1.0)
+
+
+def test_rolling_slope_uses_only_the_window():
+    slope = RollingSlope(window=100.0)
+    for t in range(500):
+        slope.add(T0 + t, 5.0 * t if t < 300 else 1500.0 + 2.0 * (t - 300))
+    assert slope.span() == pytest.approx(100.0)
+    assert slope.slope() == pytest.approx(2.0)  # เฉพาะ 100 s ล่าสุด
+
+
+def test_no_events_during_warmup():
+    analyzer = StreamAnalyzer()
+    # spike ตั้งแต่ตัวอย่างแรก ๆ และ RSS กระโดด: ยังไม่ตัดสินจนกว่าจะครบทั้งจำนวนตัวอย่างและเวลา
+    samples = steady(0, WARMUP_SAMPLES - 1) + [(WARMUP_SAMPLES - 1, 100.0, 5000.0)]
+    assert feed(analyzer, samples) == []
+    fast = StreamAnalyzer()  # ตัวอย่างครบจำนวนแต่เวลายังไม่ถึง WARMUP_SECONDS
+    samples = [(t / 10, 50.0 + (t % 2), 1000.0) for t in range(100)] + [(9.95, 100.0, 5000.0)]
+    assert WARMUP_SECONDS > 10
+    assert feed(fast, samples) == []
+
+
+def test_cpu_and_ram_spikes_with_cooldown():
+    analyzer = StreamAnalyzer()
+    events = feed(analyzer, steady(0, 60) + [(60, 100.0, 1000.0)] + steady(61, 70)
+                  + [(70, 100.0, 1000.0)]  # ยังอยู่ใน cooldown
+                  + steady(71, 60 + int(SPIKE_COOLDOWN) + 5) + [(60 + SPIKE_COOLDOWN + 5, 100.0, 1500.0)])
+    assert events == [(60, "cpu_spike"), (60 + SPIKE_COOLDOWN + 5, "cpu_spike"), (60 + SPIKE_COOLDOWN + 5, "ram_spike")]
+    assert analyzer.counts == {"cpu_spike": 2, "ram_spike": 1}
+
+
+def test_cpu_stall_once_per_episode():
+    analyzer = StreamAnalyzer()
+    stall = int(STALL_SECONDS) + 5
+    events = feed(analyzer, steady(0, 60) + [(t, 1.0, 1000.0) for t in range(60, 60 + stall)]
+                  + steady(60 + stall, 100) + [(t, 1.0, 1000.0) for t in range(100, 100 + stall)])
+    assert events == [(60 + STALL_SECONDS, "cpu_stall"), (100 + STALL_SECONDS, "cpu_stall")]
+
+
+def test_memory_growth_needs_a_full_window_and_rearms():
+    analyzer = StreamAnalyzer()
+    rate = 2 * GROWTH_MB_PER_MIN / 60  # MB/s: โตเป็นสองเท่าของเกณฑ์
+    duration = int(SLOPE_WINDOW * 2)
+    samples = [(t, 50.0 + (t % 2), 1000.0 + rate * t) for t in range(duration)]
+    events = feed(analyzer, samples)
+    assert events == [(0.8 * SLOPE_WINDOW, "memory_growth")]
+    assert analyzer.rss_slope() == pytest.approx(2 * GROWTH_MB_PER_MIN)
+    ram = 1000.0 + rate * duration
+    events = feed(analyzer, [(t, 50.0, ram) for t in range(duration, duration + int(SLOPE_WINDOW) + 1)])
+    assert events == [] and not analyzer.growing  # RSS คงที่: แนวโน้มกลับมาต่ำกว่าครึ่งเกณฑ์
+    start = duration + int(SLOPE_WINDOW) + 1
+    events = feed(analyzer, [(t, 50.0, ram + rate * (t - start)) for t in range(start, start + duration)])
+    assert [kind for _, kind in events] == ["memory_growth"]
+
+
+def test_summary():
+    analyzer = StreamAnalyzer()
+    feed(analyzer, [(t, float(t % 10), 100.0 + t) for t in range(100)])
+    s = analyzer.summary()
+    assert s["samples"] == 100
+    assert s["cpu"]["mean"] == pytest.approx(4.5)
+    assert (s["cpu"]["min"], s["cpu"]["max"]) == (0.0, 9.0)
+    assert s["ram"]["max"] == 199.0
+    assert set(s["cpu"]) >= {"p50", "p95", "p99"}
+    assert "p95" not in StreamAnalyzer(percentiles=False).summary()["cpu"]
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+import test_CLI
+from engine import Reading
+from scheduler import Tick
+
+
+async def feed(n, step=0.1, missed_at=()):
+    """Reading ทุก step วินาที: cpu = ลำดับ tick, ram = 100 ; deadline ที่อยู่ใน missed_at ถูกนับว่าพลาด"""
+    missed = 0
+    for index in range(1, n + 1):
+        missed += index in missed_at
+        yield Reading(4242, Tick(index, 1000.0 + index * step, step, missed), float(index), 100.0, ())
+
+
+def rows(readings, per_window, stopped=lambda: False, stats=("max",)):
+    async def collect():
+        return [row async for _, row in test_CLI.windows(readings, per_window, stopped, stats)]
+    return asyncio.run(collect())
+
+
+@pytest.fixture(autouse=True)
+def no_extra_metrics(monkeypatch):
+    monkeypatch.setattr(test_CLI, "METRICS", ())
+
+
+def test_full_windows():
+    table = rows(feed(10), 5, stats=("max",))
+    assert len(table) == 2
+    time, cpu, ram, interval, cpu_max, ram_max, missed = table[0]
+    assert (time, cpu, ram, cpu_max, ram_max, missed) == (1000.5, 3.0, 100.0, 5.0, 100.0, 0)
+    assert interval == pytest.approx(0.5)
+
+
+def test_trailing_partial_window_when_stream_ends():
+    table = rows(feed(12, missed_at=(11,)), 5)
+    assert len(table) == 3
+    time, cpu, _, interval, cpu_max, _, missed = table[-1]
+    assert time == pytest.approx(1001.2)
+    assert cpu == 11.5 and cpu_max == 12.0
+    assert interval == pytest.approx(0.2)  # ครอบคลุมเฉพาะตัวอย่างที่มีจริง
+    assert missed == 1
+
+
+def test_trailing_partial_window_when_stopped():
+    seen = []
+
+    async def readings():
+        async for reading in feed(20):
+            seen.append(reading)
+            yield reading
+
+    table = rows(readings(), 5, stopped=lambda: len(seen) > 7)
+    assert len(table) == 2
+    assert table[-1][0] == pytest.approx(1000.7)
+    assert table[-1][1] == 6.5  # tick 6 และ 7 ; tick ที่ 8 มาถึงหลังหยุดแล้วจึงไม่ถูกนับ
+
+
+def test_no_trailing_row_after_complete_window():
+    assert len(rows(feed(10), 5)) == 2
+    assert rows(feed(0), 5) == []
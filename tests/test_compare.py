@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from session_log import SessionLogWriter, SessionLog
+from exporter import run_export
+from compare import load_sessions, load_session, align, summarize, summary_rows, format_table, expand_paths
+
+T0 = 1700000000.0
+
+
+def write_session(path, start, n, cpu, ram_base):
+    """ตัวอย่างทุก 1 วินาที: cpu คงที่ ; ram = ram_base + ลำดับตัวอย่าง"""
+    writer = SessionLogWriter(str(path), f"Python: {path.name}")
+    for i in range(n):
+        writer.append(start + i, cpu, ram_base + i, 1.0)
+    writer.close()
+    return str(path)
+
+
+@pytest.fixture
+def two_sessions(tmp_path):
+    # เริ่มคนละเวลา: เทียบกันบน elapsed ไม่ใช่เวลาจริง
+    return [write_session(tmp_path / "bs32.mlog", T0, 60, 10.0, 100.0),
+            write_session(tmp_path / "bs64.mlog", T0 + 5000, 30, 30.0, 200.0)]
+
+
+def test_aligned_deltas_between_sessions(two_sessions):
+    sessions = load_sessions(two_sessions)
+    assert sessions.names == ["bs32.mlog", "bs64.mlog"]
+    assert sessions.rows == 90
+    grid, cpu, ram = align(sessions, step=10.0)
+    np.testing.assert_array_equal(grid, [0, 10, 20, 30, 40, 50])
+    assert cpu.shape == ram.shape == (2, 6)
+    cpu_delta, ram_delta = cpu[1] - cpu[0], ram[1] - ram[0]
+    np.testing.assert_allclose(cpu_delta[:3], 20.0)
+    np.testing.assert_allclose(ram_delta[:3], 100.0)  # ค่าเฉลี่ยของช่องเดียวกัน: 104.5 เทียบ 204.5 ...
+    assert np.isnan(cpu_delta[3:]).all()  # session ที่สั้นกว่าไม่มีตัวอย่างในช่องท้าย
+    np.testing.assert_allclose(ram[0], [104.5, 114.5, 124.5, 134.5, 144.5, 154.5])
+
+
+def test_summary_per_session(two_sessions):
+    sessions = load_sessions(two_sessions)
+    stats = summarize(sessions)
+    np.testing.assert_array_equal(stats["samples"], [60, 30])
+    np.testing.assert_array_equal(stats["duration"], [59.0, 29.0])
+    np.testing.assert_allclose(stats["cpu_mean"], [10.0, 30.0])
+    np.testing.assert_allclose(stats["cpu_seconds"], [6.0, 9.0])
+    np.testing.assert_allclose(stats["ram_peak"], [159.0, 229.0])
+    np.testing.assert_allclose(stats["ram_peak_at"], [59.0, 29.0])
+    np.testing.assert_allclose(stats["ram_p95"], [156.0, 228.0])  # nearest-rank
+    rows = list(summary_rows(sessions, stats))
+    assert rows[1][0] == "bs64.mlog" and rows[1][-1] == "Python: bs64.mlog"
+    assert format_table(rows).splitlines()[1].startswith("bs32.mlog")
+
+
+@pytest.mark.parametrize("kind, ext", [("csv", ".csv"), ("excel", ".xlsx")])
+def test_exported_files_load_like_the_session(two_sessions, tmp_path, kind, ext):
+    pytest.importorskip("openpyxl")
+    path = str(tmp_path / f"bs32{ext}")
+    run_export(kind, path, SessionLog(two_sessions[0]))
+    source, t, cpu, ram, interval = load_session(path)
+    _, t_log, cpu_log, ram_log, interval_log = load_session(two_sessions[0])
+    assert source == "Python: bs32.mlog"
+    np.testing.assert_allclose(t - t[0], t_log - t_log[0])
+    np.testing.assert_allclose(cpu, cpu_log)
+    np.testing.assert_allclose(ram, ram_log)
+    np.testing.assert_allclose(interval, interval_log)
+
+
+def test_bucketed_export_uses_mean_columns(two_sessions, tmp_path):
+    path = str(tmp_path / "bs64.csv")
+    run_export("csv", path, SessionLog(two_sessions[1]), resolution=10)
+    _, t, cpu, ram, _ = load_session(path)
+    assert len(t) == 3
+    np.testing.assert_allclose(cpu, 30.0)
+    np.testing.assert_allclose(ram, [204.5, 214.5, 224.5])
+
+
+def test_unreadable_files_are_skipped(two_sessions, tmp_path):
+    bad = tmp_path / "bad.mlog"
+    bad.write_bytes(b"not a session")
+    messages = []
+    sessions = load_sessions([str(bad)] + two_sessions, report=messages.append)
+    assert sessions.names == ["bs32.mlog", "bs64.mlog"]
+    assert len(messages) == 1 and "bad.mlog" in messages[0]
+    assert load_sessions([str(bad)], report=messages.append) is None
+    assert expand_paths([str(tmp_path)]) == sorted([str(bad)] + two_sessions)
@@ -0,0 +1,82 @@
+import sys
+import pytest
+import daemon
+from daemon import RollingWindow, prometheus_text
+
+
+def test_rolling_window_evicts_old_values_from_mean_and_max():
+    window = RollingWindow(10.0)
+    assert window.mean() == 0.0 and window.max() == 0.0
+    for t, value in enumerate([5.0, 9.0, 1.0, 3.0]):
+        window.add(float(t), value)
+    assert window.mean() == pytest.approx(4.5)
+    assert window.max() == 9.0
+    window.add(11.0, 2.0)  # t=0 และ t=1 (ค่าสูงสุด) หลุดจาก window
+    assert len(window.values) == 3
+    assert window.mean() == pytest.approx(2.0)
+    assert window.max() == 3.0
+    window.add(30.0, 4.0)  # ทุกค่าเดิมหลุด
+    assert window.mean() == 4.0 and window.max() == 4.0
+
+
+def test_rolling_window_max_matches_brute_force():
+    window = RollingWindow(5.0)
+    values = [(i * 0.5, float((i * 37) % 11)) for i in range(200)]
+    for t, value in values:
+        window.add(t, value)
+        inside = [v for s, v in values if t - 5.0 < s <= t]
+        assert window.max() == max(inside)
+        assert window.mean() == pytest.approx(sum(inside) / len(inside))
+
+
+def test_rolling_window_without_length_keeps_nothing():
+    window = RollingWindow(0.0)
+    window.add(1.0, 5.0)  # ค่าที่เพิ่งเข้าหลุดทันที: ไม่มี IndexError จาก deque ว่าง
+    window.add(2.0, 7.0)
+    assert window.mean() == 0.0 and window.max() == 0.0
+
+
+@pytest.mark.parametrize("flag", ["--rate", "--window"])
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_main_rejects_non_positive_rate_and_window(monkeypatch, capsys, flag, value):
+    monkeypatch.setattr(sys, "argv", ["daemon.py", flag, value])
+    with pytest.raises(SystemExit) as exit_info:
+        daemon.main()
+    assert exit_info.value.code == 2
+    assert f"{flag} must be positive" in capsys.readouterr().err
+
+
+def snapshot():
+    target = {"pid": 4242, "source": 'Python: train.py --name "a"', "session": "s.mlog", "samples": 10,
+              "time": 1700000000.0, "cpu": 12.5, "ram": 256.0, "cpu_mean": 10.0, "cpu_max": 20.0,
+              "ram_mean": 250.0, "ram_max": 260.0, "rss_slope": None, "events": {"cpu_spike": 2},
+              "metrics": {"threads": 8, "io_read": None}}
+    return {"time": 1700000000.0, "rate": 1.0, "window": 60.0, "targets": [target], "finished": 3,
+            "ticks": 100, "missed": 1, "sample_cost": 0.0005, "metric_names": ["threads", "io_read"],
+            "recent_events": []}
+
+
+def test_prometheus_text_exposition_format():
+    text = prometheus_text(snapshot())
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    labels = 'pid="4242",source="Python: train.py --name \\"a\\""'
+    assert f"monitor_process_cpu_percent{{{labels}}} 12.5" in lines
+    assert f'monitor_process_cpu_percent_max{{{labels},window="60"}} 20.0' in lines
+    assert f"monitor_process_threads{{{labels}}} 8" in lines
+    assert not any(line.startswith("monitor_process_io_read{") for line in lines)  # ไม่มีค่า = ไม่มี sample
+    assert not any(line.startswith("monitor_process_rss_slope_megabytes_per_minute{") for line in lines)
+    assert f'monitor_process_events_total{{{labels},kind="cpu_spike"}} 2' in lines
+    assert f"monitor_process_samples_total{{{labels}}} 10" in lines
+    assert "monitor_targets 1" in lines
+    assert "monitor_targets_finished_total 3" in lines
+    assert "monitor_missed_deadlines_total 1" in lines
+    # ทุก metric มี HELP และ TYPE ก่อน sample ของตัวเอง
+    types = dict(line.split()[2:4] for line in lines if line.startswith("# TYPE"))
+    assert sum(line.startswith("# HELP") for line in lines) == len(types)
+    assert types["monitor_ticks_total"] == "counter"
+    assert types["monitor_process_rss_megabytes_max"] == "gauge"
+    for i, line in enumerate(lines):
+        if not line.startswith("#"):
+            name = line.split("{")[0].split()[0]
+            assert lines.index(f"# TYPE {name} {types[name]}") < i
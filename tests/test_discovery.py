@@ -0,0 +1,49 @@
+import sys
+import time
+import subprocess
+import psutil
+import pytest
+from discovery import ProcessIndex
+
+
+@pytest.fixture
+def child():
+    """python ลูกที่รอ stdin ; ปิด stdin แล้วจะจบแต่ยังไม่ถูก reap (เป็น zombie) จนกว่าจะเรียก wait()"""
+    proc = subprocess.Popen([sys.executable, "-c", "import sys; sys.stdin.read()"], stdin=subprocess.PIPE)
+    yield proc
+    proc.kill()
+    proc.wait()
+
+
+def only(pid):
+    return lambda proc, name, cmdline: "child" if proc.pid == pid else None
+
+
+def test_live_candidate_is_found(child):
+    index = ProcessIndex(only(child.pid))
+    assert [e.pid for e in index.candidates()] == []
+    entry = index.find()
+    assert entry is not None and entry.pid == child.pid and entry.label == "child"
+
+
+def test_zombie_candidate_is_dropped(child):
+    index = ProcessIndex(only(child.pid))
+    index.scan()
+    assert [e.pid for e in index.candidates()] == [child.pid]
+    child.stdin.close()
+    deadline = time.monotonic() + 10
+    while psutil.Process(child.pid).status() != psutil.STATUS_ZOMBIE:
+        assert time.monotonic() < deadline, "child did not exit"
+        time.sleep(0.01)
+    assert psutil.Process(child.pid).is_running()  # เหตุผลที่ต้องตรวจ status ด้วย
+    assert index.candidates() == []
+    assert child.pid not in index.entries
+    assert index.find() is None  # scan ใหม่ไม่รับ zombie กลับมา
+
+
+def test_exited_candidate_is_dropped(child):
+    index = ProcessIndex(only(child.pid))
+    index.scan()
+    child.kill()
+    child.wait()
+    assert index.candidates() == []
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from downsample import MinMaxBins, minmax_downsample
+
+
+def brute_force(x, y, n_bins, span, origin=0.0):
+    """min/max ของแต่ละ bin บนช่วงสุดท้าย คำนวณตรง ๆ จากข้อมูลทั้งหมด"""
+    idx = np.clip(((x - origin) * (n_bins / span)).astype(int), 0, n_bins - 1)
+    lo = np.full(n_bins, np.inf)
+    hi = np.full(n_bins, -np.inf)
+    np.minimum.at(lo, idx, y)
+    np.maximum.at(hi, idx, y)
+    return lo, hi
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(7)
+    x = np.sort(rng.uniform(0, 1000, 20000))
+    y = rng.normal(50, 10, len(x))
+    y[12345] = 400.0  # spike เดียวที่ต้องไม่หายไปจากกราฟ
+    y[54] = -300.0
+    return x, y
+
+
+def test_merged_bins_match_direct_binning(series):
+    x, y = series
+    bins = MinMaxBins(64)
+    for chunk in np.array_split(np.arange(len(x)), 37):  # เพิ่มทีละชุด: ช่วงขยายและรวม bin หลายรอบ
+        bins.add(x[chunk], y[chunk])
+    assert bins.span == 1024.0
+    lo, hi = brute_force(x, y, 64, bins.span)
+    np.testing.assert_array_equal(bins.lo, lo)
+    np.testing.assert_array_equal(bins.hi, hi)
+
+
+def test_incremental_add_equals_single_add(series):
+    x, y = series
+    once, chunked = MinMaxBins(100), MinMaxBins(100)
+    once.add(x, y)
+    for start in range(0, len(x), 999):
+        chunked.add(x[start:start + 999], y[start:start + 999])
+    for a, b in zip(once.points(), chunked.points()):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_points_keep_extrema_and_stay_bounded(series):
+    x, y = series
+    bins = MinMaxBins(50)
+    bins.add(x, y)
+    xs, ys = bins.points()
+    assert len(xs) <= 2 * bins.n_bins
+    assert bins.max() == 400.0
+    assert xs[ys.argmax()] == x[12345]
+    assert ys.min() == -300.0 and xs[ys.argmin()] == x[54]
+    assert np.all(np.diff(xs) >= 0)  # ในแต่ละ bin จุดเรียงตาม x
+
+
+def test_odd_bin_count_is_rounded_up_and_empty_bins_are_skipped():
+    bins = MinMaxBins(5)
+    assert bins.n_bins == 6
+    assert bins.max() == 0.0
+    bins.add([0.1], [3.0])
+    xs, ys = bins.points()
+    assert list(xs) == [0.1, 0.1] and list(ys) == [3.0, 3.0]
+
+
+def test_minmax_downsample_short_range_returns_raw_points():
+    x = np.arange(10.0)
+    xs, ys = minmax_downsample(x, x * 2, 50, 2.5, 4.5)
+    np.testing.assert_array_equal(xs, [2.0, 3.0, 4.0, 5.0])  # รวมจุดนอกขอบข้างละหนึ่งจุด
+    np.testing.assert_array_equal(ys, xs * 2)
+
+
+def test_minmax_downsample_long_range_keeps_window_extrema(series):
+    x, y = series
+    xs, ys = minmax_downsample(x, y, 40, 100.0, 900.0)
+    assert len(xs) <= 80
+    inside = (x >= 100.0) & (x <= 900.0)
+    assert ys.max() == y[inside].max()
+    assert ys.min() == y[inside].min()
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from engine import Fanout, Subscription
+
+
+async def produce(n, delay=0.0):
+    for i in range(n):
+        yield i
+        await asyncio.sleep(delay)
+
+
+def test_slow_subscriber_does_not_block_fast_one():
+    async def scenario():
+        fanout = Fanout()
+        fast = fanout.subscribe()
+        slow = fanout.subscribe(maxsize=4)
+        received, done = [], asyncio.Event()
+
+        async def consume_fast():
+            async for item in fast:
+                received.append(item)
+            done.set()
+
+        async def consume_slow():
+            async for _ in slow:
+                await asyncio.sleep(10)  # ค้างนานกว่าทั้ง test
+
+        tasks = [asyncio.create_task(consume_fast()), asyncio.create_task(consume_slow())]
+        await asyncio.wait_for(fanout.pump(produce(100, 0.001)), 5.0)
+        await asyncio.wait_for(done.wait(), 5.0)
+        for task in tasks:
+            task.cancel()
+        return received, slow
+
+    received, slow = asyncio.run(scenario())
+    assert received == list(range(100))
+    assert slow.dropped > 0  # คิวของตัวช้าทิ้งรายการเก่า แทนที่จะรอ
+    assert slow.queue.qsize() <= 4
+
+
+def test_lossy_subscription_keeps_newest_items():
+    async def scenario():
+        subscription = Subscription(maxsize=3)
+        for i in range(10):
+            await subscription.offer(i)
+        return [subscription.queue.get_nowait() for _ in range(3)], subscription.dropped
+
+    assert asyncio.run(scenario()) == ([7, 8, 9], 7)
+
+
+def test_waiting_subscription_loses_nothing():
+    async def scenario():
+        fanout = Fanout()
+        subscription = fanout.subscribe(maxsize=2, wait=True)
+        pump = asyncio.create_task(fanout.pump(produce(50)))
+        items = [item async for item in subscription]
+        await pump
+        return items, subscription.dropped
+
+    assert asyncio.run(scenario()) == (list(range(50)), 0)
+
+
+def test_pump_closes_subscriptions_when_source_fails():
+    async def failing():
+        yield 1
+        raise RuntimeError("source failed")
+
+    async def scenario():
+        fanout = Fanout()
+        subscription = fanout.subscribe()
+        with pytest.raises(RuntimeError):
+            await fanout.pump(failing())
+        return [item async for item in subscription]
+
+    assert asyncio.run(scenario()) == [1]
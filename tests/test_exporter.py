@@ -0,0 +1,98 @@
+import csv
+import math
+import pytest
+from session_log import SessionLogWriter, SessionLog, format_timestamp, FIELDS
+from exporter import iter_export_rows, export_headers, run_export, ExportCancelled, HEADERS, ROLLUP_HEADERS
+
+T0 = 1700000000.0  # หาร 10 ลงตัว: bucket แรกเริ่มที่ T0
+
+
+@pytest.fixture
+def log(tmp_path):
+    """100 ตัวอย่างทุก 1 s: cpu = i % 10, ram = 100 + i ; cpu_max = cpu + 1 ; threads NaN ทุกแถวที่ 3 ; missed = 1 ทุกแถวที่ 7"""
+    path = str(tmp_path / "s.mlog")
+    writer = SessionLogWriter(path, "Python: train.py", 1, FIELDS + ("cpu_max", "missed", "threads"))
+    for i in range(100):
+        cpu = float(i % 10)
+        writer.append(T0 + i, cpu, 100.0 + i, 1.0, cpu + 1, float(i % 7 == 0), math.nan if i % 3 == 0 else float(i))
+    writer.close()
+    return SessionLog(path)
+
+
+def test_every_sample_without_resolution(log):
+    headers = export_headers(log)
+    assert headers == HEADERS[:4] + ["CPU max (%)", "Missed ticks", "Threads", "Events", "Source"]
+    rows = list(iter_export_rows(log))
+    assert len(rows) == 100
+    assert rows[0] == (format_timestamp(T0), 0.0, 100.0, 1.0, 1.0, 1.0, None, "", "Python: train.py")
+    assert rows[4][6] == 4.0
+    assert all(len(row) == len(headers) for row in rows)
+
+
+def test_time_range_is_inclusive(log):
+    rows = list(iter_export_rows(log, start=T0 + 20, end=T0 + 29))
+    assert [row[0] for row in rows] == [format_timestamp(T0 + i) for i in range(20, 30)]
+
+
+def test_buckets_at_resolution(log):
+    headers = export_headers(log, 10)
+    assert headers[:len(ROLLUP_HEADERS) - 1] == ROLLUP_HEADERS[:-1]
+    assert headers[-5:] == ["Window CPU max (%)", "Missed ticks", "Threads mean", "Events", "Source"]
+    rows = list(iter_export_rows(log, resolution=10))
+    assert len(rows) == 10
+    first = dict(zip(headers, rows[0]))
+    assert first["Time"] == format_timestamp(T0)
+    assert first["CPU mean (%)"] == pytest.approx(4.5)
+    assert (first["CPU min (%)"], first["CPU max (%)"], first["CPU last (%)"]) == (0.0, 9.0, 9.0)
+    assert (first["RAM min (MB)"], first["RAM max (MB)"], first["RAM last (MB)"]) == (100.0, 109.0, 109.0)
+    assert first["Interval (s)"] == 10.0
+    assert first["Window CPU max (%)"] == 10.0  # max ของ max ไม่ใช่ค่าเฉลี่ย
+    assert first["Missed ticks"] == 2.0  # ผลรวม (i = 0, 7)
+    assert first["Threads mean"] == pytest.approx((1 + 2 + 4 + 5 + 7 + 8) / 6)  # ข้าม NaN
+
+
+def test_resolution_with_time_range_starts_at_first_selected_sample(log):
+    rows = list(iter_export_rows(log, start=T0 + 15, end=T0 + 34, resolution=10))
+    assert [row[0] for row in rows] == [format_timestamp(T0 + 10), format_timestamp(T0 + 20), format_timestamp(T0 + 30)]
+    assert [row[9] for row in rows] == [5.0, 10.0, 5.0]  # จำนวนวินาทีของตัวอย่างที่อยู่ในช่วงจริง
+
+
+def test_events_are_detected_from_the_start_of_the_file(tmp_path):
+    path = str(tmp_path / "spike.mlog")
+    writer = SessionLogWriter(path, "x")
+    for i in range(60):
+        writer.append(T0 + i, 90.0 if i == 50 else 10.0, 100.0, 1.0)
+    writer.close()
+    # ช่วงที่เลือกเริ่มหลัง warmup: analyzer ยังต้องเห็นทุกแถวก่อนหน้าจึงจะตัดสิน spike ได้
+    rows = list(iter_export_rows(SessionLog(path), start=T0 + 45))
+    assert [row[0] for row in rows if row[-2]] == [format_timestamp(T0 + 50)]
+    assert "CPU spike" in rows[5][-2]
+
+
+def test_progress_and_cancel(log):
+    calls = []
+    list(iter_export_rows(log, progress=lambda done, total: calls.append((done, total)), every=40))
+    assert calls == [(40, 100), (80, 100), (100, 100)]
+    with pytest.raises(ExportCancelled):
+        list(iter_export_rows(log, cancelled=lambda: True, every=10))
+
+
+def test_run_export_csv_and_cleanup_on_cancel(log, tmp_path):
+    out = tmp_path / "out.csv"
+    run_export("csv", str(out), log, resolution=10)
+    with open(out, newline="", encoding="utf-8") as f:
+        table = list(csv.reader(f))
+    assert table[0] == export_headers(log, 10)
+    assert len(table) == 12  # header + 10 bucket + footer
+    assert table[-1][-1] == "Command/Source: Python: train.py"
+
+    path = str(tmp_path / "long.mlog")
+    writer = SessionLogWriter(path, "x")
+    for i in range(25000):  # cancelled() ถูกถามทุก 10000 record: ไฟล์ถูกเขียนไปบางส่วนแล้วตอนยกเลิก
+        writer.append(T0 + i, 1.0, 1.0, 1.0)
+    writer.close()
+    checks = []
+    partial = tmp_path / "partial.csv"
+    with pytest.raises(ExportCancelled):
+        run_export("csv", str(partial), SessionLog(path), cancelled=lambda: checks.append(1) or len(checks) > 1)
+    assert not partial.exists()
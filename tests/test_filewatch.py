@@ -0,0 +1,80 @@
+import os
+import threading
+import pytest
+import filewatch
+from filewatch import FileWatcher, parse_pid, FLAG_FILE, PID_FILE
+
+
+@pytest.fixture(params=["inotify", "stat"])
+def backend(request, monkeypatch):
+    if request.param == "stat":
+        monkeypatch.setattr(filewatch, "_inotify", lambda: None)
+    elif filewatch._inotify() is None:
+        pytest.skip("inotify ใช้ไม่ได้บนระบบนี้")
+    return request.param
+
+
+def put(path, text):
+    """เขียนไฟล์แบบ atomic (ผู้เฝ้าไม่เห็นไฟล์ที่เขียนไม่เสร็จ) ให้ลำดับ callback แน่นอน"""
+    partial = path.with_name(path.name + ".partial")
+    partial.write_text(text)
+    os.replace(partial, path)
+
+
+class Recorder:
+    """callback ที่เก็บ (name, text) และปลุก test เมื่อได้รับ"""
+
+    def __init__(self):
+        self.events = []
+        self.fired = threading.Event()
+
+    def __call__(self, name, text):
+        self.events.append((name, text))
+        self.fired.set()
+
+    def next(self, timeout=5.0):
+        assert self.fired.wait(timeout), "callback not fired"
+        self.fired.clear()
+        return self.events[-1]
+
+
+def test_flag_created_and_removed_fires_callback(tmp_path, backend):
+    watcher = FileWatcher(str(tmp_path), (FLAG_FILE, PID_FILE), poll_interval=0.05)
+    recorder = Recorder()
+    watcher.subscribe(recorder)
+    watcher.start()
+    try:
+        assert watcher.backend == backend
+        assert not watcher.exists(FLAG_FILE)
+        put(tmp_path / FLAG_FILE, "1")
+        assert recorder.next() == (FLAG_FILE, "1")
+        assert watcher.exists(FLAG_FILE) and watcher.text(FLAG_FILE) == "1"
+        (tmp_path / FLAG_FILE).unlink()
+        assert recorder.next() == (FLAG_FILE, None)
+        assert not watcher.exists(FLAG_FILE)
+    finally:
+        watcher.stop()
+    assert watcher.backend is None
+
+
+def test_other_files_in_directory_are_ignored(tmp_path, backend):
+    watcher = FileWatcher(str(tmp_path), (PID_FILE,), poll_interval=0.05).start()
+    recorder = Recorder()
+    watcher.subscribe(recorder)
+    try:
+        (tmp_path / "unrelated.txt").write_text("x")
+        put(tmp_path / PID_FILE, "4242\n")
+        assert recorder.next() == (PID_FILE, "4242\n")
+        assert recorder.events == [(PID_FILE, "4242\n")]
+        assert parse_pid(watcher.text(PID_FILE)) == 4242
+    finally:
+        watcher.stop()
+
+
+def test_initial_state_and_parse_pid(tmp_path):
+    (tmp_path / PID_FILE).write_text("123")
+    watcher = FileWatcher(str(tmp_path), (PID_FILE, FLAG_FILE))  # อ่านสถานะตั้งต้นโดยไม่ต้อง start
+    assert watcher.exists(PID_FILE) and not watcher.exists(FLAG_FILE)
+    assert parse_pid(watcher.text(PID_FILE)) == 123
+    assert parse_pid(None) is None
+    assert parse_pid("12") == 12 and parse_pid("") is None
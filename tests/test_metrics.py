@@ -0,0 +1,104 @@
+import math
+import psutil
+import pytest
+from collections import namedtuple
+from metrics import MetricCollector, parse_metrics, format_value, header, page_faults, METRICS, MB
+
+IO = namedtuple("IO", ["read_bytes", "write_bytes"])
+
+
+class FakeProcess:
+    """โปรเซสปลอม: นับจำนวนครั้งที่แต่ละ method ถูกเรียก ; counter เพิ่มขึ้นครั้งละ step"""
+
+    def __init__(self, step=MB):
+        self.calls = {}
+        self.step = step
+        self.io = 0
+
+    def count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def io_counters(self):
+        self.count("io_counters")
+        self.io += self.step
+        return IO(self.io, 2 * self.io)
+
+    def num_threads(self):
+        self.count("num_threads")
+        return 7
+
+    def num_ctx_switches(self):
+        raise psutil.AccessDenied(1)
+
+
+def test_metrics_sharing_a_call_read_it_once_per_tick():
+    proc = FakeProcess()
+    collector = MetricCollector(("io_read", "threads", "io_write"))
+    for _ in range(3):
+        collector.read(proc, 0.5)
+    assert proc.calls == {"io_counters": 3, "num_threads": 3}
+
+
+def test_first_read_of_counter_is_nan_then_rate_per_second():
+    collector = MetricCollector(("io_read", "io_write", "threads"))
+    proc = FakeProcess()
+    io_read, io_write, threads = collector.read(proc, 0.5)
+    assert math.isnan(io_read) and math.isnan(io_write)  # ยังไม่มีค่าตั้งต้นของ counter
+    assert threads == 7  # ค่าที่ไม่ใช่ counter ได้ทันที
+    assert collector.read(proc, 0.5) == (2.0, 4.0, 7)  # 1 MB / 0.5 s
+
+
+def test_unreadable_metric_stays_nan():
+    collector = MetricCollector(("ctx_switches", "threads"))
+    ctx, threads = collector.read(FakeProcess(), 1.0)
+    assert math.isnan(ctx) and threads == 7
+
+
+def test_slow_call_is_read_every_slow_interval():
+    calls = []
+
+    class Proc(FakeProcess):
+        def memory_full_info(self):
+            calls.append(1)
+            return namedtuple("Full", ["uss", "pss"])(len(calls) * MB, 0)
+
+    collector = MetricCollector(("uss",), slow_interval=2.0)
+    proc = Proc()
+    values = [collector.read(proc, 0.5)[0] for _ in range(8)]
+    assert len(calls) == 2  # ครั้งแรก และเมื่อสะสมครบ 2 วินาที
+    assert values == [1.0] * 4 + [2.0] * 4
+
+
+def test_provide_replaces_call_and_sets_counter_baseline():
+    faults = [(100, 10)]
+    collector = MetricCollector(("page_faults", "major_faults", "threads"))
+    proc = FakeProcess()
+    collector.provide(page_faults, lambda p: faults[0], proc)
+    faults[0] = (150, 12)
+    assert collector.read(proc, 0.5) == (100.0, 4.0, 7)  # มีค่าตั้งต้นจาก provide แล้ว: ไม่เป็น NaN ครั้งแรก
+    io_counters = METRICS["io_read"].call
+    collector.provide(io_counters, lambda p: IO(0, 0), proc)  # call ที่ไม่ได้เปิดใช้ไม่มีผล
+    assert io_counters not in collector.sources
+
+
+def test_page_faults_without_backend_support_is_nan():
+    class Info:
+        pass
+
+    class Proc:
+        def memory_info(self):
+            return Info()
+
+    assert all(math.isnan(v) for v in page_faults(Proc()))
+
+
+def test_parse_metrics_and_formatting():
+    assert parse_metrics("") == ()
+    assert parse_metrics(" io_read , threads ") == ("io_read", "threads")
+    assert parse_metrics("all") == tuple(METRICS)
+    with pytest.raises(ValueError, match="bogus"):
+        parse_metrics("threads,bogus")
+    assert header("threads") == "Threads"
+    assert format_value("threads", 3.0) == "3"
+    assert format_value("io_read", 1.234) == "1.23"
+    assert format_value("io_read", math.nan) == "-"
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from rollup import Ring, Rollup, suggest_resolution, T, N, CPU_MIN, CPU_MAX, CPU_SUM, CPU_LAST, RAM_MAX, INTERVAL
+
+SMALL_TIERS = ((1.0, 50), (10.0, 50), (100.0, 50))
+
+
+def fill(rollup, n, step=0.1):
+    """ตัวอย่างทุก step วินาที: cpu = ลำดับตัวอย่าง % 50 ; ram = 100 ; ตัวอย่างที่ 7777 เป็น spike"""
+    for i in range(n):
+        cpu = 1000.0 if i == 7777 else float(i % 50)
+        rollup.add(i * step, cpu, 100.0, step)
+
+
+def test_ring_keeps_latest_rows_in_order():
+    ring = Ring(4, 2)
+    for i in range(3):
+        ring.append((i, i * 10))
+    np.testing.assert_array_equal(ring.rows()[:, 0], [0, 1, 2])
+    assert ring.covers(-5.0)  # ยังไม่มีแถวถูกเขียนทับ
+    for i in range(3, 10):
+        ring.append((i, i * 10))
+    assert len(ring) == 4
+    assert ring.dropped == 6
+    np.testing.assert_array_equal(ring.rows(), [[6, 60], [7, 70], [8, 80], [9, 90]])
+    assert ring.covers(6.0) and not ring.covers(5.9)
+    ring.clear()
+    assert len(ring) == 0 and ring.covers(0.0)
+
+
+def test_buckets_keep_min_max_sum_last():
+    rollup = Rollup(raw_capacity=100, tiers=SMALL_TIERS)
+    fill(rollup, 100)  # 10 s ที่ 0.1 s
+    width, rows = rollup.select(0.0, 10.0, 50)
+    assert width == 1.0
+    assert len(rows) == 10  # bucket ที่ยังเปิดอยู่รวมด้วย
+    first = rows[0]
+    assert first[T] == 0.0 and first[N] == 10
+    assert (first[CPU_MIN], first[CPU_MAX], first[CPU_LAST]) == (0.0, 9.0, 9.0)
+    assert first[CPU_SUM] == 45.0
+    assert first[INTERVAL] == pytest.approx(1.0)
+
+
+def test_select_prefers_raw_then_finest_covering_tier():
+    rollup = Rollup(raw_capacity=1000, tiers=SMALL_TIERS)
+    fill(rollup, 3000)  # 300 s ; raw เก็บเฉพาะ 100 s ล่าสุด
+    width, rows = rollup.select(250.0, 260.0, 200)
+    assert width == 0.0 and rows[0, 0] == pytest.approx(200.0)  # ช่วงล่าสุดและจุดไม่เกิน: ข้อมูลดิบ
+    assert rollup.select(250.0, 260.0, 50)[0] == 1.0  # ดิบ 100 จุดเกิน max_points
+    assert rollup.select(150.0, 160.0, 200)[0] == 10.0  # raw และชั้น 1 s (50 bucket ล่าสุด) ไม่ครอบคลุมแล้ว
+    assert rollup.select(0.0, 300.0, 10)[0] == 100.0  # ไม่มีชั้นไหนพอ: ใช้ชั้นที่หยาบที่สุด
+
+
+def test_peaks_survive_every_tier():
+    rollup = Rollup(raw_capacity=100, tiers=SMALL_TIERS)
+    fill(rollup, 20000)  # spike ที่ x = 777.7 ถูกเขียนทับจาก raw และชั้น 1 s/10 s แล้ว
+    width, rows = rollup.select(0.0, 2000.0, 50)
+    assert width == 100.0
+    assert rows[:, CPU_MAX].max() == 1000.0
+    assert rows[rows[:, CPU_MAX].argmax(), T] == 700.0
+    assert rows[:, RAM_MAX].max() == 100.0
+
+
+def test_envelope_is_bounded_and_keeps_spike():
+    rollup = Rollup(raw_capacity=100000, tiers=SMALL_TIERS)
+    fill(rollup, 20000)
+    x, y = rollup.envelope("cpu", 0.0, 2000.0, 100)
+    assert len(x) <= 200
+    assert y.max() == 1000.0
+    x, y = rollup.envelope("ram", 0.0, 2000.0, 100)
+    assert set(y) == {100.0}
+    empty = Rollup(tiers=SMALL_TIERS)
+    assert [len(a) for a in empty.envelope("cpu", 0.0, 1.0, 10)] == [0, 0]
+
+
+def test_clear_resets_everything():
+    rollup = Rollup(raw_capacity=10, tiers=SMALL_TIERS)
+    fill(rollup, 50)
+    rollup.clear()
+    assert len(rollup) == 0
+    assert len(rollup.select(0.0, 1.0, 10)[1]) == 0
+
+
+@pytest.mark.parametrize("span, samples, expected", [
+    (3600.0, 36000, None),  # ไม่เกิน max_rows: ทุกตัวอย่าง
+    (7200.0, 72000, 1.0),
+    (86400.0, 864000, 10.0),
+    (10 * 86400.0, 10 ** 7, 60.0),
+    (60 * 86400.0, 10 ** 8, 600.0),
+    (10 ** 9, 10 ** 10, 600.0),  # เกินทุกชั้น: ชั้นที่หยาบที่สุด
+])
+def test_suggest_resolution(span, samples, expected):
+    assert suggest_resolution(span, samples, 50000) == expected
@@ -0,0 +1,90 @@
+import os
+import sys
+import subprocess
+import psutil
+import pytest
+from sampler import ProcStatSampler, parse_int, FAST_PATH
+
+pytestmark = pytest.mark.skipif(not FAST_PATH, reason="ProcStatSampler ใช้ /proc (Linux)")
+
+# field: pid (comm) state ppid pgrp session tty_nr tpgid flags minflt cminflt majflt cmajflt utime stime ...
+STAT = b"4242 (python (train) x.py) S 1 4242 4242 0 -1 4194304 1500 7 25 0 300 120 0 0 20 0 3 0 100 200 300\n"
+SHORT = b"4242 (a) R 1 2 3 0 -1 0 10 0 2 0 40 60 0\n"
+
+
+def canned(tmp_path, sampler, content):
+    """ชี้ stat_fd ของ sampler ไปที่ไฟล์ที่มีบรรทัด stat ที่กำหนด ; คืน fd เดิมไว้คืนค่าตอนจบ"""
+    path = tmp_path / "stat"
+    path.write_bytes(content)
+    original, sampler.stat_fd = sampler.stat_fd, os.open(path, os.O_RDONLY)
+    return original
+
+
+@pytest.fixture
+def sampler():
+    sampler = ProcStatSampler(os.getpid())
+    yield sampler
+    sampler.close()
+
+
+def test_parse_int_reads_digits_in_place():
+    buf = bytearray(b"x 12345 7\n")
+    assert parse_int(buf, 2) == (12345, 7)
+    assert parse_int(buf, 8) == (7, 9)
+    assert parse_int(buf, 0) == (0, 0)
+
+
+def test_stat_parsing_with_spaces_and_parentheses_in_comm(tmp_path, sampler):
+    original = canned(tmp_path, sampler, STAT)
+    buffer = sampler.stat_buffer[0]
+    try:
+        assert sampler._cpu_time() == pytest.approx(420 / sampler.clock_ticks)
+        assert sampler._faults(sampler.proc) == (1525, 25)
+        # บรรทัดที่สั้นกว่าอ่านลง buffer เดิมจาก offset 0 ; ข้อมูลเก่าที่เหลือท้าย buffer ไม่มีผล
+        (tmp_path / "stat").write_bytes(SHORT)
+        assert sampler._cpu_time() == pytest.approx(100 / sampler.clock_ticks)
+        assert sampler._faults(sampler.proc) == (12, 2)
+        assert sampler.stat_buffer[0] is buffer
+        assert sampler.is_alive()
+    finally:
+        os.close(sampler.stat_fd)
+        sampler.stat_fd = original
+
+
+def test_zombie_state_marks_sampler_not_alive(tmp_path, sampler):
+    original = canned(tmp_path, sampler, STAT.replace(b") S ", b") Z "))
+    try:
+        with pytest.raises(psutil.ZombieProcess):
+            sampler._cpu_time()
+        assert not sampler.is_alive()
+    finally:
+        os.close(sampler.stat_fd)
+        sampler.stat_fd = original
+
+
+def test_own_process_reading():
+    sampler = ProcStatSampler(os.getpid())
+    try:
+        sum(range(200000))
+        sample = sampler.sample(0.1)
+        assert sample.cpu >= 0.0
+        assert sample.ram == pytest.approx(psutil.Process().memory_info().rss / 1024 / 1024, rel=0.2)
+        assert sampler.is_alive()
+    finally:
+        sampler.close()
+
+
+def test_exited_process_raises_and_is_not_alive():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    sampler = ProcStatSampler(child.pid)
+    try:
+        assert sampler.is_alive()
+        child.kill()
+        child.wait()  # reap แล้ว: fd เดิมอ่านได้ ESRCH
+        with pytest.raises(psutil.NoSuchProcess):
+            sampler.sample(0.1)
+        assert not sampler.is_alive()
+    finally:
+        sampler.close()
+        child.kill()
+        child.wait()
@@ -0,0 +1,86 @@
+import pytest
+from scheduler import DeadlineScheduler
+
+
+class FakeClock:
+    """นาฬิกา monotonic ปลอม: sleep เลื่อนเวลาไปทันที"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_scheduler(interval=1.0):
+    clock = FakeClock()
+    return DeadlineScheduler(interval, clock=clock, sleep=clock.sleep, wall_clock=clock), clock
+
+
+def test_on_time_ticks_follow_fixed_deadlines():
+    scheduler, clock = make_scheduler()
+    ticks = [scheduler.wait() for _ in range(5)]
+    assert [t.index for t in ticks] == [1, 2, 3, 4, 5]
+    assert [t.time for t in ticks] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert all(t.interval == pytest.approx(1.0) for t in ticks)
+    assert scheduler.missed == 0
+    assert scheduler.expected_samples() == 5
+
+
+def test_late_work_within_one_interval_is_not_missed():
+    scheduler, clock = make_scheduler()
+    scheduler.wait()
+    clock.now += 1.5  # งานช้าแต่ยังไม่เลย deadline ถัดไปอีกรอบ
+    tick = scheduler.wait()
+    assert (tick.index, tick.missed) == (2, 0)
+    tick = scheduler.wait()
+    assert tick.index == 3
+    assert clock.now == pytest.approx(3.0)  # deadline ไม่เลื่อนตามความช้า (ไม่มี drift)
+
+
+def test_skipped_deadlines_are_counted_as_missed():
+    scheduler, clock = make_scheduler()
+    scheduler.wait()
+    clock.now = 4.5  # งานใช้ 3.5 s: deadline 2 และ 3 ผ่านไปแล้ว
+    tick = scheduler.wait()
+    assert tick.index == 4
+    assert tick.missed == 2
+    assert tick.interval == pytest.approx(3.5)
+    assert scheduler.expected_samples() == 4
+    tick = scheduler.wait()
+    assert (tick.index, tick.missed) == (5, 2)
+    assert clock.now == pytest.approx(5.0)
+
+
+def test_set_interval_reanchors_on_latest_deadline():
+    scheduler, clock = make_scheduler()
+    scheduler.wait()
+    scheduler.wait()
+    scheduler.set_interval(0.5)
+    assert scheduler.wait().time == pytest.approx(2.5)
+    assert scheduler.wait().time == pytest.approx(3.0)
+    assert scheduler.missed == 0
+
+
+def test_start_resets_counters():
+    scheduler, clock = make_scheduler()
+    scheduler.wait()
+    clock.now = 10.0
+    scheduler.wait()
+    assert scheduler.missed
+    scheduler.start()
+    assert scheduler.missed == 0
+    assert scheduler.wait().index == 1
+    assert clock.now == pytest.approx(11.0)
+
+
+@pytest.mark.parametrize("interval", [0, -1.0])
+def test_non_positive_interval_is_rejected(interval):
+    with pytest.raises(ValueError):
+        DeadlineScheduler(interval)
+    scheduler, _ = make_scheduler()
+    with pytest.raises(ValueError):
+        scheduler.set_interval(interval)
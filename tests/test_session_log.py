@@ -0,0 +1,95 @@
+import csv
+import math
+import struct
+import numpy as np
+import pytest
+from session_log import SessionLogWriter, SessionLog, recover_to_csv, format_timestamp, MAGIC, FIELDS
+
+EXTRA = FIELDS + ("threads", "io_read")
+
+
+def write_session(path, n, fields=FIELDS, **kwargs):
+    writer = SessionLogWriter(str(path), "Python: train.py", 4242, fields, **kwargs)
+    rows = [(1700000000.0 + i * 0.5, float(i % 100), 100.0 + i, 0.5) + (float(i),) * (len(fields) - 4)
+            for i in range(n)]
+    for row in rows:
+        writer.append(*row)
+    return writer, rows
+
+
+def test_header_layout_and_alignment(tmp_path):
+    path = tmp_path / "a.mlog"
+    writer, _ = write_session(path, 0, EXTRA)
+    writer.close()
+    raw = path.read_bytes()
+    assert raw.startswith(MAGIC)
+    (size,) = struct.unpack("<I", raw[len(MAGIC):len(MAGIC) + 4])
+    assert (len(MAGIC) + 4 + size) % 8 == 0  # record เริ่มที่ offset หาร 8 ลงตัว (memory map เป็น float64 ได้)
+    log = SessionLog(str(path))
+    assert log.fields == EXTRA
+    assert log.extra == ("threads", "io_read")
+    assert log.source == "Python: train.py"
+    assert log.meta["pid"] == 4242
+    assert len(log) == 0
+    assert log.array().shape == (0, len(EXTRA))
+    assert log.time_range()[0] == log.meta["start"]
+
+
+def test_round_trip_records_array_and_time_range(tmp_path):
+    path = tmp_path / "b.mlog"
+    writer, rows = write_session(path, 1000, EXTRA, batch_size=64)
+    writer.close()
+    log = SessionLog(str(path))
+    assert len(log) == 1000
+    assert list(log.iter_records(chunk=100)) == rows
+    array = log.array()
+    assert isinstance(array, np.memmap)
+    np.testing.assert_array_equal(array, np.array(rows))
+    assert log.time_range() == (rows[0][0], rows[-1][0])
+
+
+def test_flush_makes_pending_records_readable(tmp_path):
+    path = tmp_path / "c.mlog"
+    writer, rows = write_session(path, 10, batch_size=256)
+    assert len(SessionLog(str(path))) == 0  # ยังอยู่ใน batch
+    writer.flush()
+    assert list(SessionLog(str(path)).iter_records()) == rows
+    writer.close()
+    writer.append(*rows[0])  # หลัง close ไม่เขียนเพิ่ม
+    assert len(SessionLog(str(path))) == 10
+
+
+def test_truncated_tail_record_is_ignored(tmp_path):
+    path = tmp_path / "d.mlog"
+    writer, rows = write_session(path, 20)
+    writer.close()
+    with open(path, "r+b") as f:
+        f.truncate(path.stat().st_size - 5)  # record สุดท้ายเขียนไม่ครบ (เช่นเครื่องดับ)
+    log = SessionLog(str(path))
+    assert len(log) == 19
+    assert list(log.iter_records()) == rows[:19]
+    assert log.array().shape == (19, 4)
+    assert log.time_range()[1] == rows[18][0]
+
+
+def test_rejects_files_without_magic(tmp_path):
+    path = tmp_path / "e.mlog"
+    path.write_bytes(b"time,cpu\n1,2\n")
+    with pytest.raises(ValueError):
+        SessionLog(str(path))
+
+
+def test_recover_to_csv(tmp_path):
+    path = tmp_path / "f.mlog"
+    writer, rows = write_session(path, 5, EXTRA)
+    writer.append(1700000010.0, 1.0, 2.0, 0.5, math.nan, 3.0)  # metric ที่อ่านไม่ได้ (NaN) เป็นช่องว่าง
+    writer.flush()  # ไม่ close: เหมือนไฟล์ที่ค้างจากโปรแกรมปิดผิดปกติ
+    out = tmp_path / "f.csv"
+    assert recover_to_csv(str(path), str(out)) == 6
+    with open(out, newline="", encoding="utf-8") as f:
+        table = list(csv.reader(f))
+    assert table[0] == ["Time", "CPU (%)", "RAM (MB)", "Interval (s)", "Threads", "Read (MB/s)", "Source"]
+    assert len(table) == 7
+    assert table[1] == [format_timestamp(rows[0][0]), "0.0", "100.0", "0.5", "0.0", "0.0", "Python: train.py"]
+    assert table[6][4] == "" and table[6][5] == "3.0"
+    writer.close()